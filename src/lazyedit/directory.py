@@ -1,11 +1,22 @@
-from textual.widgets import Static, Input, Label, Button
+from textual.widget import Widget
+from textual.widgets import Input, Label, Button
 from textual.reactive import reactive
 from textual.containers import Container, Horizontal
-from rich.panel import Panel
-from rich.text import Text
+from textual.geometry import Region
+from textual.strip import Strip
+from rich.segment import Segment
+from rich.style import Style
+from functools import partial
 import os
 import shutil
 
+from .directory_tree import DirectoryTree
+from .fs_watcher import FileSystemWatcher
+from .git_status import GitStatus, CONFLICT, MODIFIED, STAGED, UNTRACKED, IGNORED
+from .path_index import PathIndex
+from .project_search import SearchPool
+from .refresh_scheduler import refresh_scheduler
+
 
 class DeleteConfirmDialog(Container):
     def __init__(self, file_path):
@@ -30,7 +41,7 @@ class DeleteConfirmDialog(Container):
                     shutil.rmtree(self.file_path)
                 else:
                     os.remove(self.file_path)
-                self.app.directory.update_directory()
+                self.app.directory.update_directory(os.path.dirname(self.file_path))
                 self.app.notify(f"Deleted: {os.path.basename(self.file_path)}")
             except Exception as e:
                 self.app.notify(f"Error deleting file: {str(e)}", severity="error")
@@ -69,7 +80,7 @@ class FileNameDialog(Container):
                 with open(file_path, "w") as f:
                     pass
                 
-                self.app.directory.update_directory()
+                self.app.directory.update_directory(self.directory_path)
                 self.app.directory.browsing = True
                 self.remove()
                 
@@ -85,44 +96,225 @@ class FileNameDialog(Container):
             self.remove()
 
 
-class Directory(Static):
-    selected_index: int = reactive(0)
-    files: list = []
+class Directory(Widget):
+    DEFAULT_CSS = """
+    Directory {
+        border: round #555555;
+        border-title-align: center;
+        border-title-color: #FFFFFF;
+        padding: 0 1;
+    }
+    """
+
+    selected_index: int = reactive(0, repaint=False)
     browsing: bool = reactive(True)
-    expanded_folders: set = set()
-    scroll_offset: int = reactive(0)
+    scroll_offset: int = reactive(0, repaint=False)
 
-    def on_mount(self):
-        self.update_directory()
+    SELECTED_STYLE = Style(color="green")
+    GIT_STYLES = {
+        CONFLICT: (" C", Style(color="#e06c75")),
+        MODIFIED: (" M", Style(color="#e5c07b")),
+        STAGED: (" S", Style(color="#98c379")),
+        UNTRACKED: (" U", Style(color="#73c991")),
+        IGNORED: ("", Style(color="#5c6370")),
+    }
 
-    def update_directory(self):
-        self.files = os.listdir(".")
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.file_tree = None
+        self.watcher = None
+        self.path_index = None
+        self.search_pool = SearchPool()
+        self.git_status = GitStatus(".")
+        self._git_paths = set()
+        self._git_full = False
+        self._git_running = False
+        self._row_cache = {}
+        self._painted_rows = []
+        self._painted_view = None
+
+    def on_mount(self):
+        self.file_tree = DirectoryTree(".")
+        self.watcher = FileSystemWatcher(self._on_fs_changes)
+        self.watcher.watch(".")
+        self.watcher.start()
+        self.path_index = PathIndex(".")
+        self.run_worker(self.path_index.load_or_build, thread=True, group="path-index")
+        self.run_worker(self._discover_git, thread=True, group="git-status")
         self.render_files()
 
-    def get_nested_files(self, folder_path, current_indent):
-        nested_items = []
+    def on_unmount(self):
+        if self.watcher:
+            self.watcher.stop()
+        self.search_pool.shutdown()
+
+    def _on_fs_changes(self, dirs, files, rescan):
+        try:
+            self.app.call_from_thread(self.apply_fs_changes, dirs, files, rescan)
+        except RuntimeError:
+            pass
+
+    def _discover_git(self):
+        if self.git_status.discover():
+            try:
+                self.app.call_from_thread(self._git_discovered)
+            except RuntimeError:
+                pass
+
+    def _git_discovered(self):
+        if self.watcher:
+            self.watcher.watch(self.git_status.git_dir)
+        self.refresh_git_status()
+
+    def refresh_git_status(self, paths=None):
+        if not self.git_status.available:
+            return
+        if paths is None:
+            self._git_full = True
+        else:
+            self._git_paths.update(paths)
+        if not self._git_running:
+            self._start_git_refresh()
+
+    def _start_git_refresh(self):
+        paths = None if self._git_full else sorted(self._git_paths)
+        self._git_full = False
+        self._git_paths = set()
+        if paths is not None and not paths:
+            return
+        self._git_running = True
+        self.run_worker(partial(self._git_status_worker, paths), thread=True, group="git-status")
+
+    def _git_status_worker(self, paths):
+        entries = self.git_status.read(paths)
         try:
-            subfiles = [os.path.join(folder_path, f) for f in os.listdir(folder_path)]
-            for subfile in sorted(subfiles):
-                nested_items.append((subfile, current_indent))
-                if os.path.isdir(subfile) and subfile in self.expanded_folders:
-                    nested_items.extend(self.get_nested_files(subfile, current_indent + 1))
-        except (PermissionError, OSError):
+            self.app.call_from_thread(self._apply_git_status, entries, paths)
+        except RuntimeError:
             pass
-        return nested_items
+
+    def _apply_git_status(self, entries, paths):
+        self._git_running = False
+        if entries is not None and self.git_status.apply(entries, paths):
+            self.request_render()
+            if hasattr(self.app, 'file_editor'):
+                self.app.file_editor.refresh_git_base()
+        self._start_git_refresh()
+
+    def _refresh_git_for_changes(self, dirs, files, rescan):
+        if not self.git_status.available:
+            return
+        git_changed = any(
+            self.git_status.is_git_path(path) and not path.endswith(".lock")
+            for path in dirs | files
+        )
+        worktree = [path for path in dirs | files if not self.git_status.is_git_path(path)]
+        if rescan or git_changed or any(os.path.normpath(path) == "." for path in worktree):
+            self.refresh_git_status()
+        elif worktree:
+            self.refresh_git_status(worktree)
+
+    def apply_fs_changes(self, dirs, files, rescan):
+        self._refresh_git_for_changes(dirs, files, rescan)
+
+        selected = None
+        if self.selected_index < len(self.file_tree.rows):
+            selected = self.file_tree.rows[self.selected_index].path
+
+        if rescan:
+            self.file_tree.refresh()
+        else:
+            for path in dirs:
+                self.file_tree.refresh_node(path)
+
+        if selected is not None:
+            index = self.file_tree.index_of(selected)
+            if index >= 0:
+                self.selected_index = index
+        self.selected_index = max(0, min(self.selected_index, len(self.file_tree.rows) - 1))
+
+        if dirs and self.path_index and self.path_index.ready:
+            self.run_worker(partial(self.path_index.update_dirs, dirs), thread=True, group="path-index")
+
+        if hasattr(self.app, 'file_editor'):
+            for path in files:
+                self.app.file_editor.mark_changed_on_disk(path)
+
+        self.request_render()
+
+    @property
+    def display_items(self):
+        return self.file_tree.rows if self.file_tree else []
+
+    def update_directory(self, path=None):
+        if self.file_tree is None:
+            self.file_tree = DirectoryTree(".")
+        elif path is None:
+            self.file_tree.refresh()
+        else:
+            self.file_tree.refresh_node(path)
+        self.selected_index = max(0, min(self.selected_index, len(self.file_tree.rows) - 1))
+        self.render_files()
+
+    def _row_key(self, node, index):
+        dirty = False
+        changed = False
+        if not node.is_dir and hasattr(self.app, 'file_editor'):
+            dirty = self.app.file_editor.has_unsaved_changes(node.path)
+            changed = node.path in self.app.file_editor.changed_on_disk
+        git = self.git_status.status_of(node.path, node.is_dir) if self.git_status.files or self.git_status.collapsed else None
+        return (node.depth, node.expanded, index == self.selected_index, dirty, changed, git)
+
+    def _render_row(self, node, key):
+        depth, expanded, selected, dirty, changed, git = key
+        file_name = node.name
+        git_style = None
+        if git is not None:
+            marker, git_style = self.GIT_STYLES[git]
+            if not node.is_dir:
+                file_name = f"{file_name}{marker}"
+        if dirty:
+            file_name = f"{file_name} *"
+        if changed:
+            file_name = f"{file_name} !"
+
+        if node.is_dir:
+            icon = "▼ " if expanded else "▶ "
+        else:
+            icon = "  "
+
+        display_text = f"{'    ' * depth}{icon}{file_name}"
+        if selected:
+            style = self.rich_style + self.SELECTED_STYLE
+        elif git_style is not None:
+            style = self.rich_style + git_style
+        else:
+            style = self.rich_style
+        return Strip([Segment(display_text, style)])
+
+    def render_line(self, y):
+        width = self.size.width
+        index = self.scroll_offset + y
+        if self.file_tree is None or index >= len(self.file_tree.rows):
+            return Strip.blank(width, self.rich_style)
+
+        node = self.file_tree.rows[index]
+        key = self._row_key(node, index)
+        cached = self._row_cache.get(node)
+        if cached is None or cached[0] != key:
+            cached = (key, self._render_row(node, key))
+            self._row_cache[node] = cached
+        return cached[1].crop_extend(0, width, self.rich_style)
+
+    def request_render(self):
+        refresh_scheduler(self).schedule(self.render_files)
 
     def render_files(self):
-        display_items = []
-        
-        for file_path in sorted(self.files):
-            display_items.append((file_path, 0))
-            
-            if os.path.isdir(file_path) and file_path in self.expanded_folders:
-                display_items.extend(self.get_nested_files(file_path, 1))
-        
-        self.display_items = display_items
+        if self.file_tree is None:
+            return
+
+        display_items = self.file_tree.rows
         
-        visible_height = self.size.height - 2 
+        visible_height = self.size.height
         if visible_height < 1:
             visible_height = 26
         
@@ -133,46 +325,42 @@ class Directory(Static):
 
         max_scroll = max(0, len(display_items) - visible_height)
         self.scroll_offset = max(0, min(self.scroll_offset, max_scroll))
-        
-        visible_items = display_items[self.scroll_offset:self.scroll_offset + visible_height]
-        
-        file_list_items = []
-        for i, (file_path, indent_level) in enumerate(visible_items):
-            actual_index = i + self.scroll_offset
-            prefix = "    " * indent_level
-            file_name = os.path.basename(file_path)
-            
-            if (not os.path.isdir(file_path) and 
-                hasattr(self.app, 'file_editor') and 
-                self.app.file_editor.has_unsaved_changes(file_path)):
-                file_name = f"{file_name} *"
-            
-            if os.path.isdir(file_path):
-                if file_path in self.expanded_folders:
-                    icon = "▼ "
-                else:
-                    icon = "▶ "
-            else:
-                icon = "  "
-                
-            display_text = f"{prefix}{icon}{file_name}"
-            
-            if actual_index == self.selected_index:
-                file_list_items.append(f"[green]{display_text}[/green]")
-            else:
-                file_list_items.append(display_text)
-        
+
         title = "Directory"
         if self.scroll_offset > 0:
             title = "↑ " + title
         if self.scroll_offset + visible_height < len(display_items):
             title = title + " ↓"
-            
-        file_list = "\n".join(file_list_items)
-        
-        border_style = "#007FFF" if self.browsing and self.app.current_mode == "directory" else "#555555"
-        
-        self.update(Panel(Text.from_markup(file_list), title=title, border_style=border_style))
+        if self.border_title != title:
+            self.border_title = title
+
+        border_color = "#007FFF" if self.browsing and self.app.current_mode == "directory" else "#555555"
+        if self._painted_view is None or self._painted_view[2] != border_color:
+            self.styles.border = ("round", border_color)
+
+        visible_items = display_items[self.scroll_offset:self.scroll_offset + visible_height]
+        keys = [self._row_key(node, self.scroll_offset + i) for i, node in enumerate(visible_items)]
+        rows = list(zip(visible_items, keys))
+        view = (self.file_tree.version, self.scroll_offset, border_color, self.size)
+
+        if self._painted_view is None or view[:2] != self._painted_view[:2] or view[3] != self._painted_view[3]:
+            if len(self._row_cache) > 4 * len(display_items) + 256:
+                self._row_cache.clear()
+            refresh_scheduler(self).mark_dirty(self)
+        else:
+            width = self.size.width
+            regions = [
+                Region(0, y, width, 1)
+                for y, row in enumerate(rows)
+                if y >= len(self._painted_rows) or self._painted_rows[y] != row
+            ]
+            if len(rows) < len(self._painted_rows):
+                regions.append(Region(0, len(rows), width, len(self._painted_rows) - len(rows)))
+            if regions:
+                refresh_scheduler(self).mark_dirty(self, *regions)
+
+        self._painted_rows = rows
+        self._painted_view = view
 
 
     def on_key(self, event):
@@ -190,12 +378,12 @@ class Directory(Static):
             self.render_files()
         elif event.key == "enter":
             if self.selected_index < len(self.display_items):
-                selected_path, _ = self.display_items[self.selected_index]
+                node = self.display_items[self.selected_index]
                 
-                if os.path.isdir(selected_path):
-                    directory_path = selected_path
+                if node.is_dir:
+                    directory_path = node.path
                 else:
-                    directory_path = os.path.dirname(selected_path)
+                    directory_path = os.path.dirname(node.path)
                     if not directory_path:
                         directory_path = "."
                 
@@ -208,40 +396,56 @@ class Directory(Static):
                 self.app.mount(dialog)
         elif event.key == "backspace" or event.key == "delete":
             if self.selected_index < len(self.display_items):
-                selected_path, _ = self.display_items[self.selected_index]
+                node = self.display_items[self.selected_index]
                 self.browsing = False
-                dialog = DeleteConfirmDialog(selected_path)
+                dialog = DeleteConfirmDialog(node.path)
                 self.app.mount(dialog)
                 
         elif event.key == "space":
             if self.selected_index < len(self.display_items):
-                selected_path, _ = self.display_items[self.selected_index]
+                node = self.display_items[self.selected_index]
+                selected_path = node.path
                 
-                if os.path.isdir(selected_path):
-                    if selected_path in self.expanded_folders:
-                        self.expanded_folders.remove(selected_path)
-                    else:
-                        self.expanded_folders.add(selected_path)
+                if node.is_dir:
+                    self.file_tree.toggle(self.selected_index)
+                    if node.expanded and self.watcher:
+                        self.watcher.watch(node.path)
                     self.render_files()
                 elif os.path.isfile(selected_path):
-                    try:
-                        if (hasattr(self.app, 'file_editor') and 
-                            selected_path in self.app.file_editor.file_states and
-                            self.app.file_editor.has_unsaved_changes(selected_path)):
-                            
-                            file_state = self.app.file_editor.file_states[selected_path]
-                            if file_state['undo_stack']:
-                                content = file_state['undo_stack'][-1].text
-                                self.app.file_editor.set_content(content, selected_path)
-                                self.app.notify(f"Loaded file with unsaved changes: {os.path.basename(selected_path)}")
-                            else:
-                                with open(selected_path, "r", encoding="utf-8", errors="ignore") as f:
-                                    file_content = f.read()
-                                self.app.file_editor.set_content(file_content, selected_path)
-                        else:
-                            with open(selected_path, "r", encoding="utf-8", errors="ignore") as f:
-                                file_content = f.read()
-                            self.app.file_editor.set_content(file_content, selected_path)
-                    except Exception as e:
-                        self.app.notify(f"Error opening file: {str(e)}", severity="error")
+                    self.open_path(selected_path)
+
+    def open_path(self, selected_path):
+        try:
+            if (hasattr(self.app, 'file_editor') and
+                os.path.getsize(selected_path) >= self.app.file_editor.LARGE_FILE_THRESHOLD):
+                self.app.file_editor.open_large_file(selected_path)
+            elif (hasattr(self.app, 'file_editor') and 
+                selected_path in self.app.file_editor.file_states and
+                self.app.file_editor.has_unsaved_changes(selected_path)):
+                
+                file_state = self.app.file_editor.file_states[selected_path]
+                content = file_state['snapshot']
+                if content is None and selected_path == self.app.file_editor.current_file:
+                    content = self.app.file_editor.document.snapshot()
+                if content is not None:
+                    self.app.file_editor.set_content(content, selected_path)
+                    self.app.notify(f"Loaded file with unsaved changes: {os.path.basename(selected_path)}")
+                else:
+                    self.app.file_editor.open_file(selected_path)
+            else:
+                self.app.file_editor.open_file(selected_path)
+        except Exception as e:
+            self.app.notify(f"Error opening file: {str(e)}", severity="error")
+
+    def reveal_path(self, path):
+        index = self.file_tree.reveal(path)
+        if index < 0:
+            return
+        if self.watcher:
+            parent = os.path.dirname(path)
+            while parent:
+                self.watcher.watch(parent)
+                parent = os.path.dirname(parent)
+        self.selected_index = index
+        self.render_files()
 
@@ -0,0 +1,162 @@
+import os
+from typing import Dict, List, Optional
+
+
+class TreeNode:
+    __slots__ = ("path", "name", "is_dir", "depth", "parent", "children", "expanded")
+
+    def __init__(self, path, name, is_dir, depth, parent=None):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.depth = depth
+        self.parent = parent
+        self.children: Optional[List["TreeNode"]] = None
+        self.expanded = False
+
+
+class DirectoryTree:
+    def __init__(self, root="."):
+        self.root = TreeNode(root, os.path.basename(os.path.abspath(root)), True, -1)
+        self.root.expanded = True
+        self.nodes: Dict[str, TreeNode] = {}
+        self.rows: List[TreeNode] = []
+        self.version = 0
+        self.refresh()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _child_path(self, node, name):
+        if node is self.root and node.path == ".":
+            return name
+        return os.path.join(node.path, name)
+
+    def _scan(self, node) -> List[TreeNode]:
+        previous = {child.name: child for child in node.children or []}
+        children = []
+        try:
+            with os.scandir(node.path) as entries:
+                for entry in entries:
+                    child = previous.pop(entry.name, None)
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if child is None or child.is_dir != is_dir:
+                        if child is not None:
+                            self._forget(child)
+                        child = TreeNode(self._child_path(node, entry.name), entry.name, is_dir, node.depth + 1, node)
+                        self.nodes[child.path] = child
+                    children.append(child)
+        except (PermissionError, OSError):
+            pass
+
+        for removed in previous.values():
+            self._forget(removed)
+
+        children.sort(key=lambda child: child.name)
+        return children
+
+    def _forget(self, node):
+        self.nodes.pop(node.path, None)
+        for child in node.children or []:
+            self._forget(child)
+
+    def _load(self, node, rescan=False):
+        if node.children is None or rescan:
+            node.children = self._scan(node)
+            if rescan:
+                for child in node.children:
+                    if child.expanded:
+                        self._load(child, rescan=True)
+
+    def _flatten(self, node) -> List[TreeNode]:
+        rows = []
+        stack = list(reversed(node.children or []))
+        while stack:
+            current = stack.pop()
+            rows.append(current)
+            if current.is_dir and current.expanded:
+                self._load(current)
+                stack.extend(reversed(current.children))
+        return rows
+
+    def _subtree_end(self, index) -> int:
+        depth = self.rows[index].depth
+        end = index + 1
+        while end < len(self.rows) and self.rows[end].depth > depth:
+            end += 1
+        return end
+
+    def index_of(self, path) -> int:
+        node = self.nodes.get(path)
+        if node is None:
+            return -1
+        try:
+            return self.rows.index(node)
+        except ValueError:
+            return -1
+
+    def reveal(self, path) -> int:
+        parent = os.path.dirname(path)
+        ancestors = []
+        while parent and parent != self.root.path:
+            ancestors.append(parent)
+            if os.path.dirname(parent) == parent:
+                return -1
+            parent = os.path.dirname(parent)
+
+        for ancestor in reversed(ancestors):
+            node = self.nodes.get(ancestor)
+            if node is None or not node.is_dir:
+                return -1
+            if not node.expanded:
+                index = self.index_of(ancestor)
+                if index < 0:
+                    return -1
+                self.toggle(index)
+        return self.index_of(path)
+
+    def is_visible(self, node) -> bool:
+        parent = node.parent
+        while parent is not None and parent is not self.root:
+            if not parent.expanded:
+                return False
+            parent = parent.parent
+        return parent is self.root
+
+    def toggle(self, index):
+        node = self.rows[index]
+        if not node.is_dir:
+            return
+        if node.expanded:
+            node.expanded = False
+            del self.rows[index + 1:self._subtree_end(index)]
+        else:
+            node.expanded = True
+            self._load(node)
+            self.rows[index + 1:index + 1] = self._flatten(node)
+        self.version += 1
+
+    def refresh(self):
+        self._load(self.root, rescan=True)
+        self.rows = self._flatten(self.root)
+        self.version += 1
+
+    def refresh_node(self, path):
+        node = self.root if path in (".", "", self.root.path) else self.nodes.get(path)
+        if node is None or not node.is_dir or node.children is None:
+            return
+
+        node.children = self._scan(node)
+        if node is self.root:
+            self.rows = self._flatten(self.root)
+            self.version += 1
+            return
+        if not (node.expanded and self.is_visible(node)):
+            return
+
+        index = self.rows.index(node)
+        self.rows[index + 1:self._subtree_end(index)] = self._flatten(node)
+        self.version += 1
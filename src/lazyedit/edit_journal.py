@@ -0,0 +1,254 @@
+from queue import Empty, SimpleQueue
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .file_io import read_text
+from .rope_document import RopeDocument
+
+SYNC_INTERVAL = 0.2
+JOURNAL_SUFFIX = ".journal"
+
+BEGIN = "begin"
+EDIT = "edit"
+DISCARD = "discard"
+STOP = "stop"
+
+
+def journal_directory():
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(base, "lazyedit", "journal")
+
+
+def text_digest(text) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+STILL_ACTIVE = 259
+
+
+def _windows_is_running(pid) -> bool:
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def is_running(pid) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        return _windows_is_running(pid)
+    if os.name != "posix":
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class Recovery:
+    def __init__(self, path, journal_path, saved_text, text):
+        self.path = path
+        self.journal_path = journal_path
+        self.saved_text = saved_text
+        self.text = text
+
+
+class EditJournal:
+    def __init__(self, directory=None, sync_interval=SYNC_INTERVAL):
+        self.directory = directory or journal_directory()
+        self.sync_interval = sync_interval
+        self.pid = os.getpid()
+        self.errors = []
+        self._open = set()
+        self._queue = SimpleQueue()
+        self._thread = None
+        self._files = {}
+
+    def journal_path(self, path) -> str:
+        digest = hashlib.sha1(os.path.abspath(path).encode("utf-8", errors="surrogatepass")).hexdigest()
+        return os.path.join(self.directory, f"{digest[:16]}.{self.pid}{JOURNAL_SUFFIX}")
+
+    def is_open(self, path) -> bool:
+        return path in self._open
+
+    def begin(self, path, snapshot, saved=True):
+        self._open.add(path)
+        self._put((BEGIN, path, snapshot, saved))
+
+    def record(self, path, start, end, text):
+        self._queue.put((EDIT, path, (start, end, text)))
+
+    def discard(self, path):
+        if path in self._open:
+            self._open.discard(path)
+            self._put((DISCARD, path))
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._queue.put((STOP,))
+        self._thread.join()
+        self._thread = None
+
+    def _put(self, item):
+        self._queue.put(item)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="lazyedit-journal", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        unsynced = set()
+        last_sync = time.monotonic()
+        while True:
+            timeout = max(0.0, last_sync + self.sync_interval - time.monotonic()) if unsynced else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                item = None
+            while item is not None:
+                if item[0] == STOP:
+                    self._sync(unsynced)
+                    for f in self._files.values():
+                        f.close()
+                    self._files.clear()
+                    return
+                self._apply(item, unsynced)
+                try:
+                    item = self._queue.get_nowait()
+                except Empty:
+                    item = None
+            if unsynced and time.monotonic() - last_sync >= self.sync_interval:
+                self._sync(unsynced)
+                last_sync = time.monotonic()
+
+    def _apply(self, item, unsynced):
+        kind, path = item[0], item[1]
+        try:
+            if kind == BEGIN:
+                _, _, snapshot, saved = item
+                self._close_file(path)
+                os.makedirs(self.directory, exist_ok=True)
+                header = {"path": os.path.abspath(path)}
+                text = snapshot.text
+                if saved:
+                    header["base"] = text_digest(text)
+                else:
+                    header["text"] = text
+                f = open(self.journal_path(path), "wb")
+                self._files[path] = f
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                unsynced.add(path)
+            elif kind == EDIT:
+                f = self._files.get(path)
+                if f is not None:
+                    (start, end, text) = item[2]
+                    f.write(json.dumps([start[0], start[1], end[0], end[1], text]).encode("utf-8") + b"\n")
+                    unsynced.add(path)
+            elif kind == DISCARD:
+                self._close_file(path)
+                unsynced.discard(path)
+                os.remove(self.journal_path(path))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.errors.append(f"Journal error for {path}: {e}")
+            self._close_file(path)
+
+    def _close_file(self, path):
+        f = self._files.pop(path, None)
+        if f is not None:
+            f.close()
+
+    def _sync(self, unsynced):
+        for path in unsynced:
+            f = self._files.get(path)
+            if f is None:
+                continue
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+            except (OSError, ValueError) as e:
+                self.errors.append(f"Journal error for {path}: {e}")
+        unsynced.clear()
+
+
+def replay(journal_path):
+    with open(journal_path, "rb") as f:
+        header = json.loads(f.readline())
+        path = header["path"]
+        saved_text = read_text(path) if os.path.exists(path) else ""
+        if "text" in header:
+            base = header["text"]
+        elif header["base"] == text_digest(saved_text):
+            base = saved_text
+        else:
+            return None
+
+        document = RopeDocument(base)
+        for line in f:
+            try:
+                start_row, start_column, end_row, end_column, text = json.loads(line)
+            except ValueError:
+                break
+            document.replace_range((start_row, start_column), (end_row, end_column), text)
+    return Recovery(path, journal_path, saved_text, document.text)
+
+
+def find_recoveries(directory=None):
+    directory = directory or journal_directory()
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+
+    recoveries = []
+    for name in names:
+        if not name.endswith(JOURNAL_SUFFIX):
+            continue
+        try:
+            pid = int(name[:-len(JOURNAL_SUFFIX)].rsplit(".", 1)[1])
+        except (IndexError, ValueError):
+            continue
+        if is_running(pid):
+            continue
+        journal_path = os.path.join(directory, name)
+        try:
+            recovery = replay(journal_path)
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            recovery = None
+        if recovery is None or recovery.text == recovery.saved_text:
+            discard_recovery(journal_path)
+            continue
+        recoveries.append(recovery)
+    return recoveries
+
+
+def discard_recovery(journal_path):
+    try:
+        os.remove(journal_path)
+    except OSError:
+        pass
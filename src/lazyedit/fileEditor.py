@@ -2,17 +2,27 @@ from textual.widgets import TextArea
 from textual.reactive import reactive
 from textual.binding import Binding 
 from rich.style import Style
-from textual.widgets.text_area import TextAreaTheme
+from rich.segment import Segment
+from textual.strip import Strip
+from textual.widgets.text_area import TextAreaTheme, Edit, Selection
+from textual.worker import get_current_worker
+from functools import partial
 import os
 import pyperclip
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
 
-@dataclass
-class EditOperation:
-    text: str
-    cursor_location: Union[Tuple[int, int], int]
-    selection: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None
+from .undo_history import UndoHistory, EditDelta, DEFAULT_UNDO_BYTES
+from .session_store import SessionStore, DEFAULT_SESSION_BYTES
+from .large_file import MappedDocument, LARGE_FILE_THRESHOLD
+from .rope_document import (
+    RopeDocument, RopeSnapshot, SyntaxAwareRopeDocument, SyntaxAwareDocumentError, TREE_SITTER,
+    highlight_map, utf8_len,
+)
+from .file_io import read_text, write_lines_atomic, disk_stamp, OperationCancelled
+from .git_status import line_changes, ADDED_LINE, MODIFIED_LINE, DELETED_LINE
+from .refresh_scheduler import refresh_scheduler
+from .edit_journal import EditJournal
+from .languages import Languages, MODELINE_LINES
+from .settings import Settings
 
 my_theme = TextAreaTheme(
     name="EditorTheme",
@@ -324,13 +334,10 @@ class FileEditor(TextArea):
     current_file: str = ""
     editing: bool = reactive(False)
 
-    #undo_stack: List[EditOperation] = []
-    #redo_stack: List[EditOperation] = []
     file_states: dict = {}
 
     is_undoing: bool = False
     is_redoing: bool = False
-    last_saved_state: Optional[str] = None
     unsaved_files: dict = {}
 
     BINDINGS = [
@@ -366,52 +373,48 @@ class FileEditor(TextArea):
         Binding("ctrl+shift+k", "delete_line", "Delete line", show=False),
         Binding("ctrl+z", "undo", "Undo", show=False),
         Binding("ctrl+y", "redo", "Redo", show=False),
+        Binding("escape", "cancel_io", "Cancel open/save", show=False),
     ]
     
-    EXTENSION_TO_LANGUAGE = {
-        ".py": "python",
-        ".js": "javascript",
-        ".ts": "typescript",
-        ".html": "html",
-        ".css": "css",
-        ".json": "json",
-        ".md": "markdown",
-        ".c": "c",
-        ".cpp": "cpp",
-        ".h": "c",
-        ".hpp": "cpp",
-        ".java": "java",
-        ".go": "go",
-        ".rs": "rust",
-        ".rb": "ruby",
-        ".php": "php",
-        ".sh": "bash",
-        ".yaml": "yaml",
-        ".yml": "yaml",
-        ".toml": "toml",
-        ".xml": "xml",
-        ".sql": "sql",
-        ".lua": "lua",
-        ".dart": "dart",
-        ".swift": "swift",
-        ".kt": "kotlin",
-        ".scala": "scala",
-        ".r": "r",
-        ".jsx": "javascript",
-        ".tsx": "typescript",
+    GIT_MARKERS = {
+        ADDED_LINE: ("▎", Style(color="#98c379")),
+        MODIFIED_LINE: ("▎", Style(color="#61afef")),
+        DELETED_LINE: ("▁", Style(color="#e06c75")),
     }
-    
-    def __init__(self, *args, **kwargs):
+    GIT_MARKER_DELAY = 0.3
+    HIGHLIGHT_DELAY = 0.05
+    _document_language = None
+
+    def __init__(self, *args, settings=None, **kwargs):
         super().__init__(*args, **kwargs)
+        settings = settings or Settings()
         self.show_line_numbers = True
         self.tab_behavior = "indent"
         self.register_theme(my_theme)
         self.theme = "EditorTheme"
         self.change_timer = None
         self.idle_timer = None
-        self.MAX_UNDO_STACK = 100
-        self.file_states = {} 
+        self.MAX_UNDO_BYTES = DEFAULT_UNDO_BYTES
+        self.MAX_SESSION_BYTES = DEFAULT_SESSION_BYTES
+        self.LARGE_FILE_THRESHOLD = LARGE_FILE_THRESHOLD
+        self.MAX_HIGHLIGHT_BYTES = settings["highlight_max_bytes"]
+        self.MAX_HIGHLIGHT_LINE_LENGTH = settings["highlight_max_line_length"]
+        self.file_states = SessionStore(self.MAX_SESSION_BYTES, is_dirty=self.has_unsaved_changes)
         self.unsaved_files = {}
+        self.changed_on_disk = set()
+        self._disk_stamps = {}
+        self.pending_location = None
+        self.git_markers = {}
+        self.git_markers_path = None
+        self._git_base = {}
+        self.git_timer = None
+        self.highlight_timer = None
+        self._highlight_rows = None
+        self.languages = Languages.load()
+        self._grammar_loads = set()
+        self._unsaved_check_pending = False
+        self.journal = EditJournal()
+        self._set_document("", None)
     
         
         print(f"Available languages: {self.available_languages}")
@@ -421,85 +424,257 @@ class FileEditor(TextArea):
         if self.current_file and self.current_file != filename:
             self._save_file_state()
         
+        self._close_large_document()
         self.current_file = filename
 
-        first_time_opening = filename not in self.file_states
-
         if filename not in self.file_states:
-            self.file_states[filename] = {
-                'undo_stack': [],
-                'redo_stack': [],
-                'last_saved_state': new_content
-            }
-        else:
-            self._load_file_state()
-        
-        self.load_text(new_content)
+            self.file_states[filename] = self._new_file_state()
+        clean = not self.has_unsaved_changes(filename)
+
+        self.file_states[filename]['snapshot'] = None
+        self.file_states.touch(filename)
+
+        language = self.detect_language(filename, new_content)
+        language_changed = language != self.language
+        self._set_document(new_content, language)
+        self.language = language
+        self.move_cursor((0, 0))
+        self._refresh_size()
         self.read_only = False
         self.editing = True
         self.disabled = False
-
-        if first_time_opening:
-            self.last_saved_state = new_content
-
-        if not self.undo_stack:
-            self.save_current_state()
         
         if filename not in self.unsaved_files:
             self.unsaved_files[filename] = False
-        
-        self.set_language_from_filename(filename)
 
+        if (language and self.languages.grammar(language) is not None
+                and (language_changed or self._highlight_query is None)):
+            self.announce_language()
+        if clean:
+            if self.last_saved_state is not None and not self.document.matches(self.last_saved_state):
+                self.history.clear()
+            self.last_saved_state = self.document.snapshot()
+            self.journal.discard(filename)
+        self._apply_pending_location()
+        self.update_git_markers()
 
-    def _save_file_state(self):
-        if not self.current_file:
+    def recover(self, filename, saved_text, text):
+        self.set_content(saved_text, filename)
+        end = (self.document.line_count - 1, len(self.document[-1]))
+        self.replace(text, (0, 0), end)
+        self.history.close_group()
+
+    def goto_location(self, filename, line, column=0):
+        self.pending_location = (filename, line, column)
+
+    def _apply_pending_location(self):
+        if self.pending_location is None:
             return
-            
-        self.file_states[self.current_file] = {
-            'undo_stack': self.undo_stack,
-            'redo_stack': self.redo_stack,
-            'last_saved_state': self.last_saved_state
+        filename, line, column = self.pending_location
+        if filename != self.current_file:
+            return
+        if line >= self.document.line_count:
+            if not self.is_large_file or self.document.complete:
+                self.pending_location = None
+            return
+        self.pending_location = None
+        self.move_cursor((line, column), center=True)
+
+    def open_large_file(self, filename):
+        if self.current_file and self.current_file != filename:
+            self._save_file_state()
+
+        self._close_large_document()
+        self.current_file = filename
+        self.language = None
+
+        document = MappedDocument(filename)
+        self.load_document(document)
+        self.read_only = True
+        self.editing = True
+        self.disabled = False
+        self.unsaved_files[filename] = False
+
+        size_mb = document.size_bytes / (1024 * 1024)
+        self.app.notify(f"Opened large file read-only ({size_mb:.0f} MB): {os.path.basename(filename)}")
+        self._apply_pending_location()
+        self.update_git_markers()
+        self.run_worker(lambda: self._index_large_file(document), thread=True, group="large-file")
+
+    def _index_large_file(self, document):
+        try:
+            while not document.index_chunk():
+                self.app.call_from_thread(self._large_file_indexed)
+        except (ValueError, OSError, RuntimeError):
+            return
+        self.app.call_from_thread(self._large_file_indexed)
+
+    def _large_file_indexed(self):
+        self._refresh_size()
+        self._apply_pending_location()
+
+    def _close_large_document(self):
+        if isinstance(self.document, MappedDocument):
+            self.workers.cancel_group(self, "large-file")
+            self.document.close()
+
+    @property
+    def is_large_file(self) -> bool:
+        return isinstance(self.document, MappedDocument)
+
+    @property
+    def available_languages(self):
+        return super().available_languages | set(self.languages.grammars)
+
+    def _watch_language(self, language):
+        if language == self._document_language:
+            return
+        document = self.document
+        self._set_document(document if isinstance(document, RopeDocument) else document.text, language)
+
+    def _set_document(self, text, language):
+        self._highlight_query = None
+        self._highlights.clear()
+        self._highlight_rows = None
+        self._document_language = language
+        document = None
+        if TREE_SITTER and language and not self.exceeds_highlight_limits(text):
+            grammar = self.languages.grammar(language)
+            if grammar is None:
+                if not self.languages.is_loaded(language):
+                    self.load_grammar(language)
+            else:
+                try:
+                    document = SyntaxAwareRopeDocument(text, grammar.language)
+                except SyntaxAwareDocumentError:
+                    document = None
+                else:
+                    self._highlight_query = grammar.query
+        self.document = document or RopeDocument(text)
+        self._build_highlight_map()
+
+    def exceeds_highlight_limits(self, text) -> bool:
+        if isinstance(text, RopeDocument):
+            size, lines = text.byte_count, text.lines
+        elif isinstance(text, RopeSnapshot):
+            size, lines = text.byte_count, text
+        else:
+            size, lines = utf8_len(text), text.splitlines()
+        if size > self.MAX_HIGHLIGHT_BYTES:
+            return True
+        return max(map(len, lines), default=0) > self.MAX_HIGHLIGHT_LINE_LENGTH
+
+    def detect_language(self, filename, text):
+        if isinstance(text, RopeSnapshot):
+            text = text.sample(MODELINE_LINES)
+        language = self.languages.detect(filename, text)
+        if language and not self.languages.is_available(language):
+            self.app.notify(f"Language '{language}' not available for highlighting")
+            return None
+        return language
+
+    def load_grammar(self, language):
+        if language in self._grammar_loads:
+            return
+        self._grammar_loads.add(language)
+        self.run_worker(partial(self._grammar_worker, language), thread=True, group="grammar")
+
+    def _grammar_worker(self, language):
+        error = None
+        try:
+            self.languages.load_grammar(language)
+        except Exception as e:
+            error = e
+        self.app.call_from_thread(self._finish_grammar, language, error)
+
+    def _finish_grammar(self, language, error):
+        self._grammar_loads.discard(language)
+        if error is not None:
+            self.app.notify(f"Could not load {language} grammar: {error}", severity="error")
+            return
+        if self.language != language or self.is_large_file or isinstance(self.document, SyntaxAwareRopeDocument):
+            return
+        self._set_document(self.document, language)
+        self.announce_language()
+
+    def announce_language(self):
+        if self._highlight_query is None:
+            self.app.notify("File too large for syntax highlighting, showing plain text", severity="warning")
+            return
+        self.app.notify(f"Syntax highlighting enabled: {self.language}")
+        self.set_timer(0.5, self.debug_highlights)
+
+    def _build_highlight_map(self):
+        document = self.document
+        if not self._highlight_query or not isinstance(document, SyntaxAwareRopeDocument):
+            self._highlights.clear()
+            self._highlight_rows = None
+            return
+        if document.syntax_tree is not None:
+            self.highlight_viewport()
+        if self.highlight_timer:
+            self.highlight_timer.stop()
+        self.highlight_timer = self.set_timer(self.HIGHLIGHT_DELAY, self._start_parse)
+
+    def _start_parse(self):
+        document = self.document
+        if not isinstance(document, SyntaxAwareRopeDocument) or document.parsing:
+            return
+        snapshot, tree = document.begin_parse()
+        self.run_worker(partial(self._parse_worker, document, snapshot, tree), thread=True, group="highlight")
+
+    def _parse_worker(self, document, snapshot, tree):
+        try:
+            tree = document.parse(snapshot, tree, cancelled=lambda: document is not self.document)
+        except Exception:
+            tree = None
+        self.app.call_from_thread(self._finish_parse, document, snapshot.version, tree)
+
+    def _finish_parse(self, document, version, tree):
+        document.finish_parse(tree)
+        if document is not self.document:
+            return
+        self.highlight_viewport()
+        if tree is not None and document.version != version:
+            self._build_highlight_map()
+
+    def highlight_viewport(self):
+        document = self.document
+        if not self._highlight_query or not isinstance(document, SyntaxAwareRopeDocument):
+            return
+        if document.syntax_tree is None:
+            return
+        height = max(1, self.size.height)
+        top = max(0, self.scroll_offset.y - height)
+        bottom = min(document.line_count, self.scroll_offset.y + 2 * height)
+        captures = document.query_rows(self._highlight_query, top, bottom)
+        self._highlights = highlight_map(captures, top, bottom)
+        self._highlight_rows = (top, bottom)
+        refresh_scheduler(self).mark_dirty(self)
+
+    def _new_file_state(self, last_saved_state=None):
+        return {
+            'history': UndoHistory(self.MAX_UNDO_BYTES),
+            'last_saved_state': last_saved_state,
+            'snapshot': None
         }
 
-    def _load_file_state(self):
+    def _save_file_state(self):
         if not self.current_file or self.current_file not in self.file_states:
-            self.undo_stack = []
-            self.redo_stack = []
-            self.last_saved_state = None
             return
             
         state = self.file_states[self.current_file]
-        self.undo_stack = state['undo_stack']
-        self.redo_stack = state['redo_stack']
-        self.last_saved_state = state['last_saved_state']
+        state['history'].close_group()
+        if self.has_unsaved_changes(self.current_file):
+            state['snapshot'] = self.document.snapshot()
 
     @property
-    def undo_stack(self):
-        if not self.current_file or self.current_file not in self.file_states:
-            return []
-        return self.file_states[self.current_file]['undo_stack']
-        
-    @undo_stack.setter
-    def undo_stack(self, value):
+    def history(self) -> UndoHistory:
         if not self.current_file:
-            return
+            return UndoHistory(self.MAX_UNDO_BYTES)
         if self.current_file not in self.file_states:
-            self.file_states[self.current_file] = {'undo_stack': [], 'redo_stack': [], 'last_saved_state': None}
-        self.file_states[self.current_file]['undo_stack'] = value
-        
-    @property
-    def redo_stack(self):
-        if not self.current_file or self.current_file not in self.file_states:
-            return []
-        return self.file_states[self.current_file]['redo_stack']
-        
-    @redo_stack.setter
-    def redo_stack(self, value):
-        if not self.current_file:
-            return
-        if self.current_file not in self.file_states:
-            self.file_states[self.current_file] = {'undo_stack': [], 'redo_stack': [], 'last_saved_state': None}
-        self.file_states[self.current_file]['redo_stack'] = value
+            self.file_states[self.current_file] = self._new_file_state()
+        return self.file_states[self.current_file]['history']
         
     @property
     def last_saved_state(self):
@@ -512,35 +687,9 @@ class FileEditor(TextArea):
         if not self.current_file:
             return
         if self.current_file not in self.file_states:
-            self.file_states[self.current_file] = {'undo_stack': [], 'redo_stack': [], 'last_saved_state': None}
+            self.file_states[self.current_file] = self._new_file_state()
         self.file_states[self.current_file]['last_saved_state'] = value
 
-
-
-    def set_language_from_filename(self, filename):
-        if not filename:
-            return
-            
-        _, ext = os.path.splitext(filename.lower())
-        
-        print(f"File extension: {ext}")
-        
-        if ext in self.EXTENSION_TO_LANGUAGE:
-            language = self.EXTENSION_TO_LANGUAGE[ext]
-
-            print(f"Selected language: {language}")
-            print(f"Available languages: {self.available_languages}")
-            
-            if language in self.available_languages:
-                self.language = language
-                self.app.notify(f"Syntax highlighting enabled: {language}")
-                self.set_timer(0.5, self.debug_highlights)
-            else:
-                self.language = None
-                self.app.notify(f"Language '{language}' not available for highlighting")
-        else:
-            self.language = None
-
     def debug_highlights(self):
         if hasattr(self, "_highlights") and self._highlights:
             self.app.notify(f"Found {len(self._highlights)} highlight groups")
@@ -552,19 +701,116 @@ class FileEditor(TextArea):
         else:
             self.app.notify("No highlights found")
 
+    def open_file(self, filename):
+        self._show_progress("Opening", filename, 0.0)
+        self.run_worker(partial(self._open_worker, filename), thread=True, group="open", exclusive=True)
+
+    def _open_worker(self, filename):
+        worker = get_current_worker()
+        progress = lambda fraction: self.app.call_from_thread(self._show_progress, "Opening", filename, fraction)
+        try:
+            stamp = disk_stamp(filename)
+            content = read_text(filename, progress=progress, is_cancelled=lambda: worker.is_cancelled)
+        except OperationCancelled:
+            self.app.call_from_thread(self._clear_progress)
+            return
+        except Exception as e:
+            self.app.call_from_thread(self._clear_progress)
+            self.app.call_from_thread(self.app.notify, f"Error opening file: {str(e)}", severity="error")
+            return
+        self.app.call_from_thread(self._finish_open, filename, content, stamp)
+
+    def _finish_open(self, filename, content, stamp=None):
+        self._clear_progress()
+        self._disk_stamps[filename] = stamp
+        self.changed_on_disk.discard(filename)
+        if hasattr(self.app, 'directory') and self.app.directory.watcher:
+            self.app.directory.watcher.watch_file(filename)
+        self.set_content(content, filename)
+
+    def mark_changed_on_disk(self, path):
+        if path not in self._disk_stamps:
+            return
+        if disk_stamp(path) == self._disk_stamps[path]:
+            return
+        if path in self.changed_on_disk:
+            return
+
+        self.changed_on_disk.add(path)
+        if path == self.current_file:
+            self.app.notify(f"File changed on disk: {os.path.basename(path)}", severity="warning")
+
     def save_file(self):
-        if self.current_file:
-            with open(self.current_file, "w", encoding="utf-8") as f:
-                f.write(self.text)
-            self.last_saved_state = self.text
-            self.unsaved_files[self.current_file] = False
-            self.app.notify(f"Saved: {self.current_file}")
+        if self.is_large_file:
+            self.app.notify("Large files are opened read-only", severity="warning")
+            return
+        if not self.current_file:
+            return
 
-            if hasattr(self.app, 'directory'):
-                self.app.directory.render_files()
+        path = self.current_file
+        if not self.has_unsaved_changes() and path not in self.changed_on_disk and os.path.exists(path):
+            self.app.notify("No changes to save")
+            return
+
+        snapshot = self.document.snapshot()
+        self._show_progress("Saving", path, 0.0)
+        self.run_worker(partial(self._save_worker, path, snapshot), thread=True, group="save")
+
+    def _save_worker(self, path, snapshot):
+        worker = get_current_worker()
+        progress = lambda fraction: self.app.call_from_thread(self._show_progress, "Saving", path, fraction)
+        try:
+            write_lines_atomic(path, snapshot, snapshot.newline, progress=progress, is_cancelled=lambda: worker.is_cancelled)
+        except OperationCancelled:
+            self.app.call_from_thread(self._clear_progress)
+            self.app.call_from_thread(self.app.notify, f"Save cancelled: {path}", severity="warning")
+            return
+        except Exception as e:
+            self.app.call_from_thread(self._clear_progress)
+            self.app.call_from_thread(self.app.notify, f"Error saving file: {str(e)}", severity="error")
+            return
+        self.app.call_from_thread(self._finish_save, path, snapshot, disk_stamp(path))
+
+    def _finish_save(self, path, snapshot, stamp=None):
+        self._clear_progress()
+        self._disk_stamps[path] = stamp
+        self.changed_on_disk.discard(path)
+        self.languages.forget(path)
+        state = self.file_states.get(path)
+        if state is not None:
+            state['last_saved_state'] = snapshot
+
+        if path == self.current_file:
+            self._unsaved_check_pending = False
+            self.unsaved_files[path] = not self.document.matches(snapshot)
+            unsaved_snapshot = self.document.snapshot()
+        else:
+            unsaved_snapshot = state['snapshot'] if state is not None else None
+            self.unsaved_files[path] = unsaved_snapshot is not None and not unsaved_snapshot.matches(snapshot)
+
+        if self.unsaved_files[path]:
+            self.journal.begin(path, unsaved_snapshot, saved=False)
+        else:
+            self.journal.discard(path)
+        self.app.notify(f"Saved: {path}")
+
+        if hasattr(self.app, 'directory'):
+            self.app.directory.request_render()
+
+    def _show_progress(self, action, path, fraction):
+        self.border_subtitle = f"{action} {os.path.basename(path)} {fraction:.0%} (Esc to cancel)"
+
+    def _clear_progress(self):
+        self.border_subtitle = None
+
+    def action_cancel_io(self) -> None:
+        cancelled = self.workers.cancel_group(self, "open") + self.workers.cancel_group(self, "save")
+        if cancelled:
+            self._clear_progress()
+            self.app.notify("Cancelled file operation")
 
     def exit_editing(self):
-        if self.unsaved_files[self.current_file]:
+        if self.has_unsaved_changes():
             self.app.notify("Warning: You have unsaved changes!")
         self.read_only = True
         self.disabled = True
@@ -600,135 +846,189 @@ class FileEditor(TextArea):
         else:
             self.app.notify("No text selected")
 
-    def get_current_state(self) -> EditOperation:
-        selection = None
-        if self.selection:
-            selection = (self.selection.start, self.selection.end)
-        return EditOperation(
-            text=self.text,
-            cursor_location=self.cursor_location,
-            selection=selection
-        )
+    def edit(self, edit: Edit):
+        if self.is_large_file:
+            self.app.notify("Large files are opened read-only", severity="warning")
+            return None
+
+        if not self.current_file:
+            return super().edit(edit)
 
-    def save_current_state(self) -> None:
+        self.journal_edit(edit)
         if self.is_undoing or self.is_redoing:
-            return
-            
-        current_state = self.get_current_state()
-        
-        if self.undo_stack and self.undo_stack[-1].text == current_state.text:
-            return
-            
-        self.undo_stack.append(current_state)
-        if len(self.undo_stack) > self.MAX_UNDO_STACK:
-            self.undo_stack.pop(0)
-        self.redo_stack.clear()
+            return super().edit(edit)
 
-    def apply_state(self, state: EditOperation) -> None:
-        self.load_text(state.text)
-        
-        try:
-            if isinstance(state.cursor_location, tuple):
-                row, col = state.cursor_location
-                row, col = int(row), int(col)
-                
-                self.cursor_location = (row, col)
-            else:
-                document = self.document
-                row = 0
-                col = 0
-                remaining = int(state.cursor_location)
-                
-                for line in document:
-                    line_len = len(line) + 1 
-                    if remaining < line_len:
-                        col = remaining
-                        break
-                    remaining -= line_len
-                    row += 1
-                    
-                self.cursor_location = (row, col)
-            
-            if state.selection:
-                start, end = state.selection
-                if isinstance(start, tuple) and isinstance(end, tuple):
-                    from textual.widgets._text_area import Selection
-                    self.selection = Selection(start, end)
-        except Exception as e:
-            print(f"Error in apply_state: {e}")
-            import traceback
-            traceback.print_exc()
-            self.cursor_location = (0, 0)
+        start, old_end = sorted((edit.from_location, edit.to_location))
+        cursor_before = self.cursor_location
+        result = super().edit(edit)
+
+        self.history.record(EditDelta(
+            start=start,
+            old_end=old_end,
+            new_end=result.end_location,
+            old_text=result.replaced_text,
+            new_text=edit.text,
+            cursor_before=cursor_before,
+            cursor_after=self.cursor_location
+        ))
+        return result
 
+    def journal_edit(self, edit):
+        path = self.current_file
+        if not self.journal.is_open(path):
+            self.journal.begin(path, self.document.snapshot(), saved=self.document.matches(self.last_saved_state))
+        self.journal.record(path, edit.from_location, edit.to_location, edit.text)
+        if self.journal.errors:
+            self.app.notify(self.journal.errors.pop(0), severity="error")
 
+    def apply_group(self, group, undo: bool) -> None:
+        if undo:
+            for delta in reversed(group.deltas):
+                self.edit(Edit(delta.old_text, delta.start, delta.new_end, False))
+            self.selection = Selection.cursor(group.cursor_before)
+        else:
+            for delta in group.deltas:
+                self.edit(Edit(delta.new_text, delta.start, delta.old_end, False))
+            self.selection = Selection.cursor(group.cursor_after)
 
     def action_undo(self) -> None:
-        if len(self.undo_stack) <= 1:
+        group = self.history.pop_undo()
+        if group is None:
             self.app.notify("Nothing to undo")
             return
             
         self.is_undoing = True
         try:
-            current_state = self.get_current_state()
-            self.redo_stack.append(current_state)
-            
-            self.undo_stack.pop()
-            previous_state = self.undo_stack[-1]
-            
-            self.apply_state(previous_state)
+            self.apply_group(group, undo=True)
             self.app.notify("Undo successful")
+        except Exception as e:
+            self.history.clear()
+            self.app.notify(f"Undo failed: {str(e)}", severity="error")
         finally:
             self.is_undoing = False
 
     def action_redo(self) -> None:
-        if not self.redo_stack:
+        group = self.history.pop_redo()
+        if group is None:
             self.app.notify("Nothing to redo")
             return
             
         self.is_redoing = True
         try:
-            next_state = self.redo_stack.pop()
-            current_state = self.get_current_state()
-            self.undo_stack.append(current_state)
-            
-            self.apply_state(next_state)
+            self.apply_group(group, undo=False)
             self.app.notify("Redo successful")
+        except Exception as e:
+            self.history.clear()
+            self.app.notify(f"Redo failed: {str(e)}", severity="error")
         finally:
             self.is_redoing = False
 
     def on_text_area_changed(self, event) -> None:
-        if self.is_undoing or self.is_redoing:
-            return
-            
         if self.idle_timer:
             self.idle_timer.stop()
             
-        self.idle_timer = self.set_timer(0.5, self.save_current_state)
+        self.idle_timer = self.set_timer(0.5, self.history.close_group)
 
-        if self.text == self.last_saved_state:
-            self.unsaved_files[self.current_file] = False
-        else:
-            self.unsaved_files[self.current_file] = True
+        if self.git_timer:
+            self.git_timer.stop()
+        self.git_timer = self.set_timer(self.GIT_MARKER_DELAY, self.update_git_markers)
 
-        if hasattr(self.app, 'directory'):
-                self.app.directory.render_files()
+        self._unsaved_check_pending = True
+        refresh_scheduler(self).schedule(self.update_unsaved_state)
+
+    def update_unsaved_state(self):
+        if not self._unsaved_check_pending:
+            return
+        self._unsaved_check_pending = False
+        unsaved = not self.is_large_file and not self.document.matches(self.last_saved_state)
+        if self.unsaved_files.get(self.current_file) != unsaved:
+            self.unsaved_files[self.current_file] = unsaved
+            if not unsaved:
+                self.journal.discard(self.current_file)
+            if hasattr(self.app, 'directory'):
+                self.app.directory.request_render()
+
+    def _git_status(self):
+        if hasattr(self.app, 'directory') and self.app.directory.git_status.available:
+            return self.app.directory.git_status
+        return None
+
+    def refresh_git_base(self):
+        self._git_base.clear()
+        self.update_git_markers()
+
+    def update_git_markers(self):
+        git_status = self._git_status()
+        if git_status is None or not self.current_file or self.is_large_file:
+            if self.git_markers:
+                self.git_markers = {}
+                refresh_scheduler(self).mark_dirty(self)
+            return
+
+        path = self.current_file
+        base = self._git_base.get(path, False)
+        self.run_worker(
+            partial(self._git_markers_worker, git_status, path, self.document.snapshot(), base),
+            thread=True, group="git-markers", exclusive=True,
+        )
+
+    def _git_markers_worker(self, git_status, path, snapshot, base):
+        worker = get_current_worker()
+        if base is False:
+            base = git_status.index_text(path)
+        markers = line_changes(base, snapshot.text) if base is not None else {}
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._apply_git_markers, path, base, markers)
+
+    def _apply_git_markers(self, path, base, markers):
+        self._git_base = {path: base}
+        if path != self.current_file or (path == self.git_markers_path and markers == self.git_markers):
+            return
+        self.git_markers = markers
+        self.git_markers_path = path
+        refresh_scheduler(self).mark_dirty(self)
+
+    def render_line(self, widget_y):
+        row = widget_y + self.scroll_offset.y
+        rows = self._highlight_rows
+        if rows is not None and not rows[0] <= row < rows[1] and row < self.document.line_count:
+            refresh_scheduler(self).schedule(self.highlight_viewport)
+        strip = super().render_line(widget_y)
+        if not self.git_markers or not self.show_line_numbers or self.git_markers_path != self.current_file:
+            return strip
+        marker = self.git_markers.get(widget_y + self.scroll_offset[1])
+        if marker is None:
+            return strip
+
+        character, style = self.GIT_MARKERS[marker]
+        x = self.gutter_width - 2
+        before, cell, after = strip.divide([x, x + 1, strip.cell_length])
+        cell_style = next(iter(cell), Segment("")).style
+        return Strip.join([before, Strip([Segment(character, cell_style + style if cell_style else style)]), after])
+
+    def on_unmount(self) -> None:
+        self._close_large_document()
+        self.file_states.close()
+        self.journal.close()
 
     def on_key(self, event) -> None:
         key_combo = event.key
         
         logical_edit_keys = [
-            "enter", "tab", "ctrl+v", "ctrl+x", "delete", "backspace", 
-            "ctrl+k", "ctrl+u", "ctrl+w", "ctrl+d", "ctrl+f"
+            "enter", "tab", "ctrl+v", "ctrl+x",
+            "ctrl+k", "ctrl+u", "ctrl+w", "ctrl+f"
         ]
         
         if key_combo == "space" or key_combo in ".,;:!?()[]{}<>\"'+-*/=":
-            self.save_current_state()
+            self.history.close_group()
         
         elif key_combo in logical_edit_keys:
-            self.save_current_state()
+            self.history.close_group()
 
     def has_unsaved_changes(self, file_path=None) -> bool:
         if file_path is None:
             file_path = self.current_file
+        if file_path == self.current_file:
+            self.update_unsaved_state()
         return self.unsaved_files.get(file_path, False)
     
\ No newline at end of file
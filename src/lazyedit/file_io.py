@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+def disk_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _check_cancelled(is_cancelled):
+    if is_cancelled is not None and is_cancelled():
+        raise OperationCancelled()
+
+
+def read_text(path, progress=None, is_cancelled=None, chunk_size=CHUNK_SIZE) -> str:
+    total = max(1, os.path.getsize(path))
+    chunks = []
+    read_so_far = 0
+
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            _check_cancelled(is_cancelled)
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            read_so_far += len(chunk)
+            if progress is not None:
+                progress(min(1.0, read_so_far / total))
+
+    return "".join(chunks)
+
+
+def _fsync_directory(directory):
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _keep_owner(path, temp_path) -> bool:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return True
+    shutil.copymode(path, temp_path)
+    if not hasattr(os, "chown"):
+        return True
+    temp_stat = os.stat(temp_path)
+    if (temp_stat.st_uid, temp_stat.st_gid) == (stat.st_uid, stat.st_gid):
+        return True
+    try:
+        os.chown(temp_path, stat.st_uid, stat.st_gid)
+    except OSError:
+        return False
+    return True
+
+
+def _copy_in_place(temp_path, path):
+    with open(temp_path, "rb") as source, open(path, "r+b") as target:
+        shutil.copyfileobj(source, target, CHUNK_SIZE)
+        target.truncate()
+        target.flush()
+        os.fsync(target.fileno())
+    os.remove(temp_path)
+
+
+def write_lines_atomic(path, lines, newline="\n", progress=None, is_cancelled=None, chunk_size=CHUNK_SIZE):
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    total = max(1, len(lines))
+
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            batch = []
+            batch_size = 0
+            for index, line in enumerate(lines):
+                if index:
+                    batch.append(newline)
+                batch.append(line)
+                batch_size += len(line) + 1
+                if batch_size >= chunk_size:
+                    f.write("".join(batch))
+                    batch = []
+                    batch_size = 0
+                    _check_cancelled(is_cancelled)
+                    if progress is not None:
+                        progress((index + 1) / total)
+            if batch:
+                f.write("".join(batch))
+            f.flush()
+            os.fsync(f.fileno())
+
+        if _keep_owner(path, temp_path):
+            os.replace(temp_path, path)
+        else:
+            _copy_in_place(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    _fsync_directory(directory)
+    if progress is not None:
+        progress(1.0)
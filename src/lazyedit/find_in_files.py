@@ -0,0 +1,169 @@
+from textual.widgets import Static, Input, Label
+from textual.containers import Container
+from rich.text import Text
+from functools import partial
+import re
+
+from .project_search import ProjectSearch
+from .refresh_scheduler import refresh_scheduler
+
+SEARCH_DELAY = 0.25
+
+
+class FindInFilesDialog(Container):
+    DEFAULT_CSS = """
+    FindInFilesDialog {
+        dock: top;
+        height: auto;
+        max-height: 70%;
+        background: #0C0C0C;
+        border: round #007FFF;
+        padding: 0 1;
+    }
+    FindInFilesDialog #find_results {
+        height: auto;
+    }
+    """
+
+    def __init__(self, path_index, search_pool, limit=20):
+        super().__init__()
+        self.path_index = path_index
+        self.search_pool = search_pool
+        self.limit = limit
+        self.regex = False
+        self.results = []
+        self.selected = 0
+        self.search = None
+        self.status = ""
+        self.search_timer = None
+
+    def compose(self):
+        yield Label(self.title_text(), id="find_title")
+        yield Input(id="find_input")
+        yield Static(id="find_results")
+
+    def title_text(self):
+        mode = "regex" if self.regex else "literal"
+        return f"Find in files ({mode}, Ctrl+r to toggle):"
+
+    def on_mount(self):
+        self.query_one(Input).focus()
+        self.render_results()
+
+    def on_input_changed(self, event):
+        if self.search_timer is not None:
+            self.search_timer.stop()
+        self.search_timer = self.set_timer(SEARCH_DELAY, partial(self.start_search, event.value))
+
+    def cancel_search(self):
+        if self.search is not None:
+            self.search.cancel()
+        self.workers.cancel_group(self, "project-search")
+
+    def start_search(self, query):
+        self.cancel_search()
+        self.search = None
+        self.results = []
+        self.selected = 0
+        self.status = ""
+
+        if query.strip():
+            try:
+                self.search = ProjectSearch(self.path_index, query, regex=self.regex)
+            except re.error as e:
+                self.status = f"Invalid pattern: {e}"
+            else:
+                self.status = "Searching..."
+                search = self.search
+                self.run_worker(partial(self._search_worker, search), thread=True, group="project-search")
+        self.render_results()
+
+    def _search_worker(self, search):
+        def deliver(matches):
+            try:
+                self.app.call_from_thread(self.add_matches, search, matches)
+            except RuntimeError:
+                search.cancel()
+
+        try:
+            search.run(self.search_pool, deliver)
+        except Exception as e:
+            search.cancel()
+            self.app.call_from_thread(self.finish_search, search, f"Search failed: {e}")
+            return
+        self.app.call_from_thread(self.finish_search, search, None)
+
+    def add_matches(self, search, matches):
+        if search is not self.search:
+            return
+        self.results.extend(matches)
+        self.status = f"Searching... {search.files_searched}/{search.total_files} files"
+        self.schedule_render()
+
+    def finish_search(self, search, error):
+        if search is not self.search:
+            return
+        if error:
+            self.status = error
+        elif search.truncated:
+            self.status = f"{len(self.results)} matches (stopped at limit)"
+        elif search.complete:
+            self.status = f"{len(self.results)} matches in {search.total_files} files"
+        else:
+            self.status = f"{len(self.results)} matches (cancelled)"
+        self.schedule_render()
+
+    def schedule_render(self):
+        refresh_scheduler(self).schedule(self.render_results)
+
+    def render_results(self):
+        results = self.query_one("#find_results", Static)
+
+        first = max(0, min(self.selected - self.limit // 2, len(self.results) - self.limit))
+        text = Text()
+        for i in range(first, min(first + self.limit, len(self.results))):
+            match = self.results[i]
+            style = "green" if i == self.selected else ""
+            text.append(f"{match.path}:{match.line + 1}: ", style=style or "#61afef")
+            text.append(match.text.strip(), style=style)
+            text.append("\n")
+        text.append(self.status, style="#555555")
+        results.update(text)
+
+    def open_selected(self):
+        if not self.results:
+            return
+        match = self.results[self.selected]
+        self.close()
+        self.app.file_editor.goto_location(match.path, match.line, match.column)
+        self.app.directory.reveal_path(match.path)
+        self.app.directory.open_path(match.path)
+
+    def close(self):
+        self.cancel_search()
+        self.search = None
+        self.app.directory.browsing = True
+        self.remove()
+
+    def on_input_submitted(self, event):
+        self.open_selected()
+
+    def on_key(self, event):
+        if event.key == "escape":
+            event.stop()
+            self.close()
+        elif event.key == "ctrl+r":
+            event.stop()
+            self.regex = not self.regex
+            self.query_one("#find_title", Label).update(self.title_text())
+            self.start_search(self.query_one(Input).value)
+        elif event.key == "down":
+            event.stop()
+            if self.selected < len(self.results) - 1:
+                self.selected += 1
+                self.render_results()
+        elif event.key == "up":
+            event.stop()
+            if self.selected > 0:
+                self.selected -= 1
+                self.render_results()
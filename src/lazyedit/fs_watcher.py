@@ -0,0 +1,243 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from .file_io import disk_stamp
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+DIRECTORY_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+FILE_EVENTS = IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB
+WATCH_MASK = DIRECTORY_EVENTS | FILE_EVENTS
+
+EVENT_HEADER = struct.Struct("iIII")
+
+DEBOUNCE_SECONDS = 0.2
+MAX_BATCH_DELAY = 1.0
+IDLE_TIMEOUT = 1.0
+POLL_INTERVAL = 1.0
+
+
+def join_path(directory, name):
+    if directory == ".":
+        return name
+    return os.path.join(directory, name)
+
+
+class InotifyBackend:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}
+        self._descriptors = {}
+        self._lock = threading.Lock()
+
+    def watch(self, directory):
+        with self._lock:
+            if directory in self._descriptors:
+                return
+            wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                return
+            self._descriptors[directory] = wd
+            self._paths[wd] = directory
+
+    def unwatch(self, directory):
+        with self._lock:
+            wd = self._descriptors.pop(directory, None)
+            if wd is None:
+                return
+            self._paths.pop(wd, None)
+            self._rm_watch(self.fd, wd)
+
+    def wait(self, timeout, dirs, files):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        rescan = False
+        offset = 0
+        with self._lock:
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                directory = self._paths.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    self._descriptors.pop(directory, None)
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    dirs.add(os.path.dirname(directory) or ".")
+                    continue
+                if mask & DIRECTORY_EVENTS:
+                    dirs.add(directory)
+                if name and mask & (FILE_EVENTS | IN_CREATE | IN_MOVED_TO):
+                    files.add(join_path(directory, name))
+        return rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._directories = {}
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def watch(self, directory):
+        with self._lock:
+            if directory not in self._directories:
+                self._directories[directory] = disk_stamp(directory)
+
+    def unwatch(self, directory):
+        with self._lock:
+            self._directories.pop(directory, None)
+
+    def watch_file(self, path):
+        with self._lock:
+            if path not in self._files:
+                self._files[path] = disk_stamp(path)
+
+    def unwatch_file(self, path):
+        with self._lock:
+            self._files.pop(path, None)
+
+    def wait(self, timeout, dirs, files):
+        time.sleep(min(timeout, self.interval))
+        with self._lock:
+            for directory, stamp in list(self._directories.items()):
+                current = disk_stamp(directory)
+                if current != stamp:
+                    if current is None:
+                        del self._directories[directory]
+                        dirs.add(os.path.dirname(directory) or ".")
+                    else:
+                        self._directories[directory] = current
+                        dirs.add(directory)
+            for path, stamp in list(self._files.items()):
+                current = disk_stamp(path)
+                if current != stamp:
+                    self._files[path] = current
+                    files.add(path)
+        return False
+
+    def close(self):
+        pass
+
+
+class FileSystemWatcher:
+    def __init__(self, on_changes, debounce=DEBOUNCE_SECONDS, use_polling=False):
+        self.on_changes = on_changes
+        self.debounce = debounce
+        self.backend = None
+        if not use_polling and sys.platform.startswith("linux"):
+            try:
+                self.backend = InotifyBackend()
+            except (OSError, AttributeError):
+                self.backend = None
+        if self.backend is None:
+            self.backend = PollingBackend()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_polling(self) -> bool:
+        return isinstance(self.backend, PollingBackend)
+
+    def watch(self, directory):
+        self.backend.watch(directory)
+
+    def unwatch(self, directory):
+        self.backend.unwatch(directory)
+
+    def watch_file(self, path):
+        if self.is_polling:
+            self.backend.watch_file(path)
+        else:
+            self.backend.watch(os.path.dirname(path) or ".")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.backend.close()
+
+    def _run(self):
+        dirs = set()
+        files = set()
+        rescan = False
+        first_event = None
+        last_event = None
+
+        while not self._stop.is_set():
+            before = len(dirs) + len(files)
+            timeout = self.debounce if first_event is not None else IDLE_TIMEOUT
+            try:
+                overflow = self.backend.wait(timeout, dirs, files)
+            except (OSError, ValueError):
+                if self._stop.is_set():
+                    return
+                continue
+
+            now = time.monotonic()
+            if overflow or len(dirs) + len(files) != before:
+                rescan = rescan or overflow
+                last_event = now
+                if first_event is None:
+                    first_event = now
+
+            if first_event is None:
+                continue
+            if now - last_event < self.debounce and now - first_event < MAX_BATCH_DELAY:
+                continue
+
+            self.on_changes(dirs, files, rescan)
+            dirs = set()
+            files = set()
+            rescan = False
+            first_event = None
+            last_event = None
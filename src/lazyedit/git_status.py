@@ -0,0 +1,229 @@
+from difflib import SequenceMatcher
+from typing import NamedTuple, Optional
+import os
+import subprocess
+
+CONFLICT = "conflict"
+MODIFIED = "modified"
+STAGED = "staged"
+UNTRACKED = "untracked"
+IGNORED = "ignored"
+
+PRIORITY = {IGNORED: 0, UNTRACKED: 1, STAGED: 2, MODIFIED: 3, CONFLICT: 4}
+
+ADDED_LINE = "added"
+MODIFIED_LINE = "modified"
+DELETED_LINE = "deleted"
+
+MAX_DIFF_LINES = 50000
+PATHSPEC_BATCH = 256
+
+
+class StatusEntry(NamedTuple):
+    path: str
+    status: str
+    is_dir: bool = False
+
+
+def entry_status(xy) -> str:
+    index, worktree = xy[0], xy[1]
+    if worktree != ".":
+        return MODIFIED
+    if index != ".":
+        return STAGED
+    return MODIFIED
+
+
+def parse_status(data: bytes):
+    entries = []
+    records = data.split(b"\0")
+    i = 0
+    while i < len(records):
+        record = os.fsdecode(records[i])
+        i += 1
+        if not record:
+            continue
+        kind = record[0]
+        if kind == "1":
+            fields = record.split(" ", 8)
+            entries.append(StatusEntry(fields[8], entry_status(fields[1])))
+        elif kind == "2":
+            fields = record.split(" ", 9)
+            entries.append(StatusEntry(fields[9], entry_status(fields[1])))
+            i += 1
+        elif kind == "u":
+            fields = record.split(" ", 10)
+            entries.append(StatusEntry(fields[10], CONFLICT))
+        elif kind in "?!":
+            path = record[2:]
+            status = UNTRACKED if kind == "?" else IGNORED
+            if path.endswith("/"):
+                entries.append(StatusEntry(path.rstrip("/"), status, True))
+            else:
+                entries.append(StatusEntry(path, status))
+    return entries
+
+
+def line_changes(base_text, text):
+    base = base_text.splitlines()
+    lines = text.splitlines()
+    if len(base) > MAX_DIFF_LINES or len(lines) > MAX_DIFF_LINES:
+        return {}
+
+    changes = {}
+    matcher = SequenceMatcher(None, base, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "insert":
+            for line in range(j1, j2):
+                changes[line] = ADDED_LINE
+        elif tag == "replace":
+            for line in range(j1, j2):
+                changes[line] = MODIFIED_LINE
+        elif tag == "delete":
+            line = max(0, j1 - 1)
+            changes.setdefault(line, DELETED_LINE)
+    return changes
+
+
+class GitStatus:
+    def __init__(self, root="."):
+        self.root = root
+        self.toplevel = None
+        self.git_dir = None
+        self.prefix = ""
+        self.files = {}
+        self.dirs = {}
+        self.collapsed = {}
+        self.version = 0
+
+    @property
+    def available(self) -> bool:
+        return self.toplevel is not None
+
+    def _git(self, *args) -> Optional[bytes]:
+        try:
+            result = subprocess.run(
+                ["git", "--no-optional-locks", *args],
+                cwd=self.root,
+                capture_output=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout
+
+    def discover(self) -> bool:
+        output = self._git("rev-parse", "--show-toplevel", "--absolute-git-dir", "--show-prefix")
+        if output is None:
+            return False
+        lines = os.fsdecode(output).split("\n")
+        if len(lines) < 3:
+            return False
+        self.toplevel, self.git_dir, self.prefix = lines[0], lines[1], lines[2]
+        return True
+
+    def _to_repo_path(self, path) -> str:
+        path = os.path.normpath(path).replace(os.sep, "/")
+        if path == ".":
+            return self.prefix.rstrip("/") or "."
+        return self.prefix + path
+
+    def _from_repo_path(self, path) -> Optional[str]:
+        if not path.startswith(self.prefix):
+            return None
+        path = path[len(self.prefix):]
+        return path.replace("/", os.sep) if path else "."
+
+    def read(self, paths=None):
+        args = ["status", "--porcelain=v2", "-z", "--ignored", "--untracked-files=normal"]
+        if paths is None:
+            output = self._git(*args)
+        else:
+            pathspecs = [":(literal,top)" + self._to_repo_path(path) for path in paths]
+            chunks = []
+            for start in range(0, len(pathspecs), PATHSPEC_BATCH):
+                chunk = self._git(*args, "--", *pathspecs[start:start + PATHSPEC_BATCH])
+                if chunk is None:
+                    return None
+                chunks.append(chunk)
+            output = b"".join(chunks)
+        if output is None:
+            return None
+
+        entries = []
+        for entry in parse_status(output):
+            path = self._from_repo_path(entry.path)
+            if path is not None:
+                entries.append(entry._replace(path=path))
+        return entries
+
+    def apply(self, entries, paths=None):
+        if paths is None:
+            files = {}
+            collapsed = {}
+        else:
+            files = dict(self.files)
+            collapsed = dict(self.collapsed)
+            for path in paths:
+                path = os.path.normpath(path)
+                if path == ".":
+                    files.clear()
+                    collapsed.clear()
+                    break
+                inside = path + os.sep
+                for known in [known for known in files if known == path or known.startswith(inside)]:
+                    del files[known]
+                for known in [known for known in collapsed if known == path or known.startswith(inside)]:
+                    del collapsed[known]
+
+        for entry in entries:
+            if entry.is_dir:
+                collapsed[entry.path] = entry.status
+            else:
+                files[entry.path] = entry.status
+
+        dirs = {}
+        for path, status in list(files.items()) + list(collapsed.items()):
+            if status == IGNORED:
+                continue
+            parent = os.path.dirname(path)
+            while parent:
+                existing = dirs.get(parent)
+                if existing is not None and PRIORITY[existing] >= PRIORITY[status]:
+                    break
+                dirs[parent] = status
+                parent = os.path.dirname(parent)
+
+        changed = files != self.files or collapsed != self.collapsed
+        self.files = files
+        self.collapsed = collapsed
+        self.dirs = dirs
+        if changed:
+            self.version += 1
+        return changed
+
+    def status_of(self, path, is_dir=False) -> Optional[str]:
+        status = self.dirs.get(path) if is_dir else self.files.get(path)
+        if status is None:
+            status = self.collapsed.get(path)
+        if status is not None:
+            return status
+        parent = os.path.dirname(path)
+        while parent:
+            status = self.collapsed.get(parent)
+            if status is not None:
+                return status
+            parent = os.path.dirname(parent)
+        return None
+
+    def is_git_path(self, path) -> bool:
+        if self.git_dir is None:
+            return False
+        path = os.path.abspath(path)
+        return path == self.git_dir or path.startswith(self.git_dir + os.sep)
+
+    def index_text(self, path) -> Optional[str]:
+        output = self._git("show", ":" + self._to_repo_path(path))
+        if output is None:
+            return None
+        return output.decode("utf-8", errors="replace")
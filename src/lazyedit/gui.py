@@ -1,4 +1,3 @@
-import keyboard
 import signal
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, HorizontalScroll, Vertical
@@ -6,6 +5,7 @@ from textual.widgets import Static
 from textual.events import Key
 from textual.reactive import reactive
 from textual.binding import Binding
+from functools import partial
 import sys
 import os
 
@@ -15,10 +15,19 @@ from .lazygit_screen import LazyGitScreen
 from .fileEditor import FileEditor
 from .directory import Directory
 from .terminal import Terminal
+from .quick_open import QuickOpenDialog
+from .find_in_files import FindInFilesDialog
+from .recovery_dialog import RecoveryDialog
+from .edit_journal import find_recoveries
+from .process_supervisor import ProcessSupervisor
+from .tool_pool import ToolPool
+from .keymap import Keymap
+from .settings import Settings
+from .refresh_scheduler import RefreshScheduler
 
 class CommandFooter(Static):
     def on_mount(self):
-        self.update("Commands: (Ctrl+q) Quit   (Enter) Create File   (Backspace) Delete File   (Ctrl+s) Save File   (Ctrl+2) Dir Mode    (Ctrl+3) Edit Mode    (Ctrl+5) Terminal   (Ctrl+g) Git mode")
+        self.update("Commands: (Ctrl+q) Quit   (Enter) Create File   (Backspace) Delete File   (Ctrl+s) Save File   (Ctrl+2) Dir Mode    (F3) Edit Mode    (Ctrl+5) Terminal   (Ctrl+g) Git mode   (Ctrl+p) Find File   (Ctrl+b f) Find in Files")
 
 class MyApp(App):
     CSS = """
@@ -40,6 +49,9 @@ class MyApp(App):
     Terminal {
         height: 30%;
     }
+    EmbeddedTerminal {
+        height: 1fr;
+    }
     CommandFooter {
         dock: bottom;
         height: auto;
@@ -58,11 +70,28 @@ class MyApp(App):
         self.active_widget = None
         self.cursor_row = 0
         self.cursor_column = 0
+        self.process_supervisor = ProcessSupervisor()
+        self.tool_pool = ToolPool(self.process_supervisor, notify=self.notify)
+        self.refresh_scheduler = RefreshScheduler(self.set_timer, self.call_later)
+        self.keymap = Keymap.load()
+        self.settings = Settings.load()
+        self.key_handlers = {
+            "quit": self.action_quit,
+            "directory_mode": self.switch_to_directory_mode,
+            "editor_mode": self.switch_to_editor_mode,
+            "terminal_mode": self.switch_to_terminal_mode,
+            "keymap_stats": self.show_keymap_stats,
+            "save": self.save_file,
+            "lazygit": partial(self.open_tool_screen, "lazygit"),
+            "lazydocker": partial(self.open_tool_screen, "lazydocker"),
+            "quick_open": self.open_quick_open,
+            "find_in_files": self.open_find_in_files,
+        }
 
     def compose(self) -> ComposeResult:
         self.directory = Directory()
-        self.file_editor = FileEditor()
-        self.terminal = Terminal()
+        self.file_editor = FileEditor(settings=self.settings)
+        self.terminal = Terminal(supervisor=self.process_supervisor, settings=self.settings)
         self.footer = CommandFooter()
 
         with Horizontal():
@@ -86,6 +115,19 @@ class MyApp(App):
         self.file_editor.editing = False
         self.terminal.is_active = False
 
+        self.install_screen(LazyGitScreen(self.tool_pool), name="lazygit")
+        self.install_screen(LazyDockerScreen(self.tool_pool), name="lazydocker")
+        self.set_timer(1.0, self.warm_tools)
+
+        for error in self.keymap.errors:
+            self.notify(error, title="Keymap", severity="error")
+        for error in self.settings.errors:
+            self.notify(error, title="Settings", severity="error")
+        for error in self.file_editor.languages.errors:
+            self.notify(error, title="Languages", severity="error")
+
+        self.run_worker(self.find_recoveries, thread=True, group="recovery")
+
     def action_handle_copy(self) -> None:
         focused = self.focused
         if focused and hasattr(focused, "action_copy"):
@@ -93,52 +135,77 @@ class MyApp(App):
         else:
             self.notify("Use Ctrl+Q to quit")
     
+    def on_unmount(self) -> None:
+        self.process_supervisor.shutdown()
+
     def action_quit(self) -> None:
         self.exit()
         os.system("cls" if os.name == "nt" else "clear")
 
     def on_key(self, event):
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("q"):
-            self.action_quit()
-            return
-        
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("2"):
-            self.switch_to_directory_mode()
-            return
-            
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("3"):
-            self.switch_to_editor_mode()
+        if self.keymap.dispatch(self.current_mode, event, self.key_handlers) is not None:
             return
-            
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("5"):
-            self.switch_to_terminal_mode()
-            return
-        
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("g"):
-            self.push_screen(LazyGitScreen())
-            return
-        
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("d"):
-            self.push_screen(LazyDockerScreen())
-            return
-        
+
         if self.current_mode == "directory":
-            if keyboard.is_pressed("ctrl") and keyboard.is_pressed("s"):
-                return
             if hasattr(self.directory, "on_key"):
                 self.directory.on_key(event)
-                
+
         elif self.current_mode == "editor":
-            if keyboard.is_pressed("ctrl") and keyboard.is_pressed("s"):
-                self.file_editor.save_file()
-                return
             if hasattr(self.file_editor, "on_key"):
                 self.file_editor.on_key(event)
-                
+
         elif self.current_mode == "terminal":
             if hasattr(self.terminal, "on_key"):
                 self.terminal.on_key(event)
+
+    def save_file(self):
+        if self.current_mode == "editor":
+            self.file_editor.save_file()
+
+    def show_keymap_stats(self):
+        lines = self.keymap.summary() + self.refresh_scheduler.summary(self.keymap.dispatches)
+        self.notify("\n".join(lines), title="Key dispatch", timeout=10)
+    
+    def warm_tools(self):
+        self.tool_pool.rows = max(1, self.size.height - 2)
+        self.tool_pool.columns = max(1, self.size.width - 2)
+        self.get_screen("lazygit").warm()
+
+    def open_tool_screen(self, name):
+        screen = self.get_screen(name)
+        if self.screen is screen:
+            return
+        if not screen.available():
+            self.notify(f"{screen.TOOL_NAME} not found! Please install it.", severity="error")
+            return
+        self.push_screen(screen)
+
+    def open_quick_open(self):
+        if self.query(QuickOpenDialog):
+            return
+        self.switch_to_directory_mode()
+        self.directory.browsing = False
+        self.mount(QuickOpenDialog(self.directory.path_index))
     
+    def open_find_in_files(self):
+        if self.query(FindInFilesDialog):
+            return
+        self.switch_to_directory_mode()
+        self.directory.browsing = False
+        self.mount(FindInFilesDialog(self.directory.path_index, self.directory.search_pool))
+    
+    def find_recoveries(self):
+        recoveries = find_recoveries(self.file_editor.journal.directory)
+        if recoveries:
+            self.call_from_thread(self.open_recovery, recoveries)
+
+    def open_recovery(self, recoveries):
+        if self.query(RecoveryDialog):
+            return
+        self.switch_to_directory_mode()
+        self.directory.browsing = False
+        self.mount(RecoveryDialog(recoveries))
+
     def switch_to_directory_mode(self):
         self.current_mode = "directory"
         self.directory.browsing = True
@@ -169,14 +236,9 @@ class MyApp(App):
         self.refresh_ui()
     
     def refresh_ui(self):
-        self.directory.render_files()
-        
-        if hasattr(self.terminal, "output_buffer"):
-            self.terminal.renderable = self.terminal.render()
-            self.terminal.refresh(layout=True)
-            
-        if hasattr(self.file_editor, "refresh"):
-            self.file_editor.refresh()
+        self.directory.request_render()
+        self.refresh_scheduler.mark_dirty(self.terminal)
+        self.refresh_scheduler.mark_dirty(self.file_editor)
 
 def run():
     try:
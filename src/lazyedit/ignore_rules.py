@@ -0,0 +1,128 @@
+import os
+import re
+
+ALWAYS_IGNORED = {".git"}
+
+
+def _translate(pattern):
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRule:
+    __slots__ = ("regex", "negate", "dir_only")
+
+    def __init__(self, pattern):
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        self.regex = re.compile(f"^{prefix}{_translate(pattern)}$")
+
+    def matches(self, relative_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(relative_path) is not None
+
+
+def parse_ignore_file(path):
+    rules = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.rstrip("\n").rstrip("\r")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                if not line.endswith("\\ "):
+                    line = line.rstrip()
+                rules.append(IgnoreRule(line))
+    except OSError:
+        pass
+    return rules
+
+
+class IgnoreRules:
+    def __init__(self, root="."):
+        self.root = root
+        self._rules = {}
+
+    def _normalize(self, path):
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        path = path.replace(os.sep, "/")
+        if path.startswith("./"):
+            path = path[2:]
+        return "" if path == "." else path
+
+    def rules_for(self, directory):
+        rules = self._rules.get(directory)
+        if rules is None:
+            base = os.path.join(self.root, directory) if directory else self.root
+            rules = parse_ignore_file(os.path.join(base, ".gitignore"))
+            self._rules[directory] = rules
+        return rules
+
+    def invalidate(self, directory=None):
+        if directory is None:
+            self._rules.clear()
+        else:
+            self._rules.pop(self._normalize(directory), None)
+
+    def is_ignored(self, path, is_dir=False):
+        relative = self._normalize(path)
+        if not relative:
+            return False
+        if os.path.basename(relative) in ALWAYS_IGNORED:
+            return True
+
+        ignored = False
+        parts = relative.split("/")
+        for depth in range(len(parts)):
+            directory = "/".join(parts[:depth])
+            rules = self.rules_for(directory)
+            if not rules:
+                continue
+            local = "/".join(parts[depth:])
+            for rule in rules:
+                if rule.matches(local, is_dir):
+                    ignored = not rule.negate
+        return ignored
@@ -0,0 +1,257 @@
+import json
+import os
+import sys
+import time
+
+PENDING = "pending"
+
+APP_MODES = ("directory", "editor", "terminal")
+MODES = APP_MODES + ("tool",)
+
+MODIFIERS = ("ctrl", "alt", "meta", "shift")
+MODIFIER_ALIASES = {"control": "ctrl", "option": "alt", "cmd": "meta"}
+
+clock = time.perf_counter if sys.platform == "win32" else time.monotonic
+
+GLOBAL_BINDINGS = {
+    "quit": ["ctrl+q"],
+    "directory_mode": ["ctrl+2", "ctrl+@"],
+    "editor_mode": ["f3"],
+    "terminal_mode": ["ctrl+5", "ctrl+right_square_bracket"],
+    "keymap_stats": ["f12"],
+}
+
+WORKSPACE_BINDINGS = {
+    "save": ["ctrl+s"],
+    "lazygit": ["ctrl+g"],
+    "lazydocker": ["ctrl+d"],
+    "quick_open": ["ctrl+p"],
+    "find_in_files": ["ctrl+b f"],
+}
+
+DEFAULT_BINDINGS = {
+    "global": GLOBAL_BINDINGS,
+    "directory": WORKSPACE_BINDINGS,
+    "editor": WORKSPACE_BINDINGS,
+    "terminal": {
+        "new_session": ["ctrl+b c"],
+        "close_session": ["ctrl+b x"],
+        "search": ["ctrl+b /"],
+        "export_scrollback": ["ctrl+b s"],
+        "next_session": ["ctrl+pagedown"],
+        "previous_session": ["ctrl+pageup"],
+    },
+    "tool": {
+        "lazygit": ["ctrl+g"],
+        "lazydocker": ["ctrl+d"],
+    },
+}
+
+
+def config_directory():
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "lazyedit")
+
+
+def keymap_path():
+    return os.path.join(config_directory(), "keymap.json")
+
+
+def normalize_key(key) -> str:
+    parts = key.strip().split("+")
+    if len(parts) > 1 and parts[-1] == "":
+        parts = parts[:-2] + ["plus"]
+    name = parts[-1]
+    modifiers = set()
+    for part in parts[:-1]:
+        part = part.lower()
+        part = MODIFIER_ALIASES.get(part, part)
+        if part not in MODIFIERS:
+            raise ValueError(f"unknown modifier {part!r} in {key!r}")
+        modifiers.add(part)
+    if not name:
+        raise ValueError(f"missing key in {key!r}")
+    if len(name) > 1 or modifiers:
+        name = name.lower()
+    return "+".join([modifier for modifier in MODIFIERS if modifier in modifiers] + [name])
+
+
+def parse_chord(chord):
+    keys = tuple(normalize_key(key) for key in chord.split())
+    if not keys:
+        raise ValueError("empty key binding")
+    return keys
+
+
+def overlaps(chord, chords) -> bool:
+    return any(chord[:len(other)] == other[:len(chord)] for other in chords)
+
+
+class ActionTiming:
+    def __init__(self):
+        self.count = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.duration = 0.0
+        self.max_duration = 0.0
+
+    def add(self, latency, duration):
+        self.count += 1
+        self.latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.duration += duration
+        self.max_duration = max(self.max_duration, duration)
+
+
+class Keymap:
+    def __init__(self, overrides=None):
+        self.tables = {}
+        self.prefixes = {}
+        self.errors = []
+        self.timings = {}
+        self.dispatches = 0
+        self.pending = ()
+        self.pending_mode = None
+        self._last_event = None
+        self._last_action = None
+        self.compile(DEFAULT_BINDINGS, overrides or {})
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or keymap_path()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            keymap = cls()
+            keymap.errors.append(f"Could not read {path}: {e}")
+            return keymap
+        if not isinstance(overrides, dict):
+            keymap = cls()
+            keymap.errors.append(f"{path} must contain an object of modes")
+            return keymap
+        return cls(overrides)
+
+    def compile(self, defaults, overrides):
+        sections = {}
+        for section, bindings in overrides.items():
+            if section != "global" and section not in MODES:
+                self.errors.append(f"Unknown keymap mode {section!r}")
+                continue
+            sections[section] = self._parse_section(section, bindings)
+
+        defaults = {section: self._parse_section(section, bindings) for section, bindings in defaults.items()}
+        self.tables = {}
+        self.prefixes = {}
+        for mode in MODES:
+            actions = self._mode_actions(mode, defaults)
+            user = self._mode_actions(mode, sections)
+            taken = {chord for chords in user.values() for chord in chords}
+            for action, chords in actions.items():
+                actions[action] = [chord for chord in chords if not overlaps(chord, taken)]
+            actions.update(user)
+            self._compile_mode(mode, actions)
+
+    def _parse_section(self, section, bindings):
+        if not isinstance(bindings, dict):
+            self.errors.append(f"Keymap mode {section!r} must map actions to keys")
+            return {}
+        known = set(GLOBAL_BINDINGS) if section in ("global",) + APP_MODES else set()
+        known |= set(DEFAULT_BINDINGS.get(section, {}))
+        parsed = {}
+        for action, chords in bindings.items():
+            if action not in known:
+                self.errors.append(f"Unknown action {action!r} in keymap mode {section!r}")
+                continue
+            if chords is None:
+                chords = []
+            elif isinstance(chords, str):
+                chords = [chords]
+            parsed[action] = []
+            for chord in chords:
+                try:
+                    parsed[action].append(parse_chord(chord))
+                except (ValueError, AttributeError) as e:
+                    self.errors.append(f"Invalid binding for {action!r}: {e}")
+        return parsed
+
+    def _mode_actions(self, mode, sections):
+        actions = {}
+        if mode in APP_MODES:
+            actions.update(sections.get("global", {}))
+        actions.update(sections.get(mode, {}))
+        return {action: list(chords) for action, chords in actions.items()}
+
+    def _compile_mode(self, mode, actions):
+        table = {}
+        prefixes = set()
+        for action, chords in actions.items():
+            for chord in chords:
+                existing = table.get(chord)
+                if existing == action:
+                    continue
+                if existing is not None:
+                    self.errors.append(f"{mode}: {' '.join(chord)} is bound to both {existing} and {action}")
+                    continue
+                if chord in prefixes or any(chord[:i] in table for i in range(1, len(chord))):
+                    self.errors.append(f"{mode}: {' '.join(chord)} overlaps another binding")
+                    continue
+                table[chord] = action
+                prefixes.update(chord[:i] for i in range(1, len(chord)))
+        self.tables[mode] = table
+        self.prefixes[mode] = prefixes
+
+    def resolve(self, mode, key):
+        if self.pending and self.pending_mode != mode:
+            self.pending = ()
+        table = self.tables.get(mode, {})
+        chord = self.pending + (key,)
+        action = table.get(chord)
+        if action is not None:
+            self.pending = ()
+            return action
+        if chord in self.prefixes.get(mode, ()):
+            self.pending = chord
+            self.pending_mode = mode
+            return PENDING
+        if self.pending:
+            self.pending = ()
+            return self.resolve(mode, key)
+        return None
+
+    def dispatch(self, mode, event, handlers):
+        if event is self._last_event:
+            action, handled = self._last_action
+            if handled or action not in handlers:
+                return action
+        else:
+            self.dispatches += 1
+            action = self.resolve(mode, event.key)
+            self._last_event = event
+            self._last_action = (action, action == PENDING)
+
+        handler = handlers.get(action)
+        if handler is None:
+            return action
+        self._last_action = (action, True)
+
+        started = clock()
+        created = getattr(event, "time", started)
+        handler()
+        timing = self.timings.get(action)
+        if timing is None:
+            timing = self.timings[action] = ActionTiming()
+        timing.add(max(0.0, started - created), clock() - started)
+        return action
+
+    def summary(self):
+        lines = [f"{self.dispatches} keys dispatched"]
+        for action, timing in sorted(self.timings.items(), key=lambda item: -item[1].max_latency):
+            lines.append(
+                f"{action}: {timing.count}x, "
+                f"latency avg {timing.latency / timing.count * 1000:.1f}ms max {timing.max_latency * 1000:.1f}ms, "
+                f"handler avg {timing.duration / timing.count * 1000:.1f}ms max {timing.max_duration * 1000:.1f}ms"
+            )
+        return lines
@@ -0,0 +1,283 @@
+import json
+import os
+import re
+import threading
+
+from textual.document._languages import BUILTIN_LANGUAGES
+from textual.widgets import TextArea
+
+from .keymap import config_directory
+from .rope_document import TREE_SITTER
+
+if TREE_SITTER:
+    from tree_sitter import Language
+    from tree_sitter_languages import get_language
+
+QUERIES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries")
+MODELINE_LINES = 5
+MODELINE_SCAN = 4096
+
+EXTENSIONS = {
+    ".py": "python",
+    ".pyi": "python",
+    ".pyw": "python",
+    ".js": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".html": "html",
+    ".htm": "html",
+    ".css": "css",
+    ".json": "json",
+    ".jsonl": "json",
+    ".ndjson": "json",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".c": "c",
+    ".cpp": "cpp",
+    ".h": "c",
+    ".hpp": "cpp",
+    ".java": "java",
+    ".go": "go",
+    ".rs": "rust",
+    ".rb": "ruby",
+    ".php": "php",
+    ".sh": "bash",
+    ".bash": "bash",
+    ".zsh": "bash",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".toml": "toml",
+    ".xml": "xml",
+    ".sql": "sql",
+    ".lua": "lua",
+    ".dart": "dart",
+    ".swift": "swift",
+    ".kt": "kotlin",
+    ".scala": "scala",
+    ".r": "r",
+    ".jsx": "javascript",
+    ".tsx": "typescript",
+    ".mk": "make",
+    ".dockerfile": "dockerfile",
+}
+
+FILENAMES = {
+    "dockerfile": "dockerfile",
+    "containerfile": "dockerfile",
+    "makefile": "make",
+    "gnumakefile": "make",
+    ".bashrc": "bash",
+    ".bash_profile": "bash",
+    ".bash_aliases": "bash",
+    ".profile": "bash",
+    ".zshrc": "bash",
+    ".zprofile": "bash",
+    "pipfile": "toml",
+    "cargo.lock": "toml",
+    "poetry.lock": "toml",
+    "gemfile": "ruby",
+    "rakefile": "ruby",
+    "vagrantfile": "ruby",
+}
+
+INTERPRETERS = {
+    "python": "python",
+    "pypy": "python",
+    "sh": "bash",
+    "bash": "bash",
+    "dash": "bash",
+    "ksh": "bash",
+    "zsh": "bash",
+    "node": "javascript",
+    "nodejs": "javascript",
+    "deno": "typescript",
+    "ts-node": "typescript",
+    "ruby": "ruby",
+    "php": "php",
+    "lua": "lua",
+    "luajit": "lua",
+    "rscript": "r",
+    "make": "make",
+}
+
+ALIASES = {
+    "shell-script": "bash",
+    "c++": "cpp",
+}
+
+VIM_MODELINE = re.compile(r"\s(?:vi|vim|ex):(?:.*?[\s:])?(?:ft|filetype|syntax|syn)=([\w+-]+)")
+EMACS_MODELINE = re.compile(r"-\*-\s*(?:.*?\bmode:\s*([\w+-]+)|([\w+-]+))\s*(?:;.*?)?-\*-", re.IGNORECASE)
+
+
+def shebang_interpreter(line):
+    if not line.startswith("#!"):
+        return None
+    words = line[2:].split()
+    if words and os.path.basename(words[0]) == "env":
+        words = [word for word in words[1:] if not word.startswith("-") and "=" not in word]
+    if not words:
+        return None
+    return re.sub(r"[\d.]+$", "", os.path.basename(words[0]).lower())
+
+
+def modeline_language(lines):
+    for line in lines:
+        match = VIM_MODELINE.search(" " + line)
+        if match:
+            return match.group(1).lower()
+        match = EMACS_MODELINE.search(line)
+        if match:
+            return (match.group(1) or match.group(2)).lower()
+    return None
+
+
+class Grammar:
+    def __init__(self, name, language, query):
+        self.name = name
+        self.language = language
+        self.query = query
+
+
+class Languages:
+    def __init__(self, overrides=None):
+        self.extensions = dict(EXTENSIONS)
+        self.filenames = dict(FILENAMES)
+        self.interpreters = dict(INTERPRETERS)
+        self.grammars = {}
+        self.errors = []
+        self._detected = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self.configure(overrides or {})
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(config_directory(), "languages.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            languages = cls()
+            languages.errors.append(f"Could not read {path}: {e}")
+            return languages
+        if not isinstance(overrides, dict):
+            languages = cls()
+            languages.errors.append(f"{path} must contain an object")
+            return languages
+        return cls(overrides)
+
+    def configure(self, overrides):
+        tables = {"extensions": self.extensions, "filenames": self.filenames, "interpreters": self.interpreters}
+        for section, entries in overrides.items():
+            if section == "grammars":
+                self._configure_grammars(entries)
+                continue
+            table = tables.get(section)
+            if table is None:
+                self.errors.append(f"Unknown languages section {section!r}")
+                continue
+            if not isinstance(entries, dict):
+                self.errors.append(f"Languages section {section!r} must map names to languages")
+                continue
+            for key, language in entries.items():
+                key = key.lower()
+                if section == "extensions" and not key.startswith("."):
+                    key = "." + key
+                if language is None:
+                    table.pop(key, None)
+                elif isinstance(language, str):
+                    table[key] = language
+                else:
+                    self.errors.append(f"Language for {key!r} in {section!r} must be a string or null")
+
+    def _configure_grammars(self, entries):
+        if not isinstance(entries, dict):
+            self.errors.append("Languages section 'grammars' must map names to grammars")
+            return
+        for name, grammar in entries.items():
+            if not isinstance(grammar, dict) or not isinstance(grammar.get("highlights"), str):
+                self.errors.append(f"Grammar {name!r} needs a \"highlights\" query file")
+                continue
+            library = grammar.get("library")
+            if library is not None and not isinstance(library, str):
+                self.errors.append(f"Grammar {name!r} has an invalid \"library\"")
+                continue
+            self.grammars[name] = {
+                "highlights": os.path.expanduser(grammar["highlights"]),
+                "library": os.path.expanduser(library) if library else None,
+            }
+
+    def detect(self, path, text) -> str:
+        if path in self._detected:
+            return self._detected[path]
+        language = self._detect(path, text)
+        self._detected[path] = language
+        return language
+
+    def forget(self, path):
+        self._detected.pop(path, None)
+
+    def _detect(self, path, text):
+        head = text[:MODELINE_SCAN].splitlines()
+        tail = text[-MODELINE_SCAN:].splitlines() if len(text) > MODELINE_SCAN else head
+        language = modeline_language(head[:MODELINE_LINES] + tail[-MODELINE_LINES:])
+        if language:
+            return ALIASES.get(language) or self.extensions.get("." + language) or self.filenames.get(language) or language
+
+        name = os.path.basename(path).lower()
+        stem, ext = os.path.splitext(name)
+        if name in self.filenames:
+            return self.filenames[name]
+        if ext in self.extensions:
+            return self.extensions[ext]
+        if stem in self.filenames:
+            return self.filenames[stem]
+
+        interpreter = shebang_interpreter(head[0]) if head else None
+        return self.interpreters.get(interpreter)
+
+    def is_available(self, name) -> bool:
+        if not TREE_SITTER or not name:
+            return False
+        return (
+            name in self.grammars
+            or os.path.exists(os.path.join(QUERIES_DIRECTORY, f"{name}.scm"))
+            or name in BUILTIN_LANGUAGES
+        )
+
+    def is_loaded(self, name) -> bool:
+        return name in self._loaded
+
+    def grammar(self, name):
+        return self._loaded.get(name)
+
+    def load_grammar(self, name):
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            try:
+                grammar = self._load_grammar(name)
+            except Exception:
+                self._loaded[name] = None
+                raise
+            self._loaded[name] = grammar
+            return grammar
+
+    def _load_grammar(self, name):
+        library = self.grammars.get(name, {}).get("library")
+        language = Language(library, name) if library else get_language(name)
+        return Grammar(name, language, language.query(self.highlight_query(name)))
+
+    def highlight_query(self, name) -> str:
+        configured = self.grammars.get(name)
+        if configured is not None:
+            path = configured["highlights"]
+        else:
+            path = os.path.join(QUERIES_DIRECTORY, f"{name}.scm")
+            if not os.path.exists(path):
+                return TextArea._get_builtin_highlight_query(name)
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
@@ -0,0 +1,140 @@
+from array import array
+from collections import OrderedDict
+import mmap
+import os
+
+from textual.document._document import DocumentBase, EditResult
+from textual.geometry import Size
+
+LARGE_FILE_THRESHOLD = 128 * 1024 * 1024
+INDEX_CHUNK_BYTES = 4 * 1024 * 1024
+FIRST_SCREEN_BYTES = 256 * 1024
+LINE_CACHE_SIZE = 2048
+
+
+class MappedDocument(DocumentBase):
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else b""
+        self._offsets = array("Q", [0])
+        self._indexed_to = 0
+        self._max_line_length = 0
+        self._line_cache = OrderedDict()
+        self._newline = "\n"
+        self.complete = self._size == 0
+        self.closed = False
+
+        self.index_chunk(FIRST_SCREEN_BYTES)
+        if self._size and self._map.find(b"\r\n", 0, min(self._size, FIRST_SCREEN_BYTES)) != -1:
+            self._newline = "\r\n"
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    @property
+    def indexed_fraction(self) -> float:
+        return 1.0 if not self._size else self._indexed_to / self._size
+
+    def index_chunk(self, max_bytes=None) -> bool:
+        if self.complete or self.closed:
+            return True
+        max_bytes = max_bytes or INDEX_CHUNK_BYTES
+
+        data = self._map
+        position = self._indexed_to
+        stop = min(self._size, position + max_bytes)
+        line_start = self._offsets[-1]
+        new_offsets = array("Q")
+        longest = self._max_line_length
+
+        while position < stop:
+            newline = data.find(b"\n", position, stop)
+            if newline == -1:
+                position = stop
+                break
+            position = newline + 1
+            longest = max(longest, position - line_start - 1)
+            new_offsets.append(position)
+            line_start = position
+
+        self._offsets.extend(new_offsets)
+        self._indexed_to = position
+        self._max_line_length = max(longest, self._indexed_to - self._offsets[-1])
+        if self._indexed_to >= self._size:
+            self.complete = True
+        return self.complete
+
+    def build_index(self) -> None:
+        while not self.index_chunk():
+            pass
+
+    def close(self) -> None:
+        self.closed = True
+        self._line_cache.clear()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def replace_range(self, start, end, text) -> EditResult:
+        raise PermissionError(f"{os.path.basename(self.path)} is opened read-only")
+
+    @property
+    def text(self) -> str:
+        raise ValueError(f"{os.path.basename(self.path)} is too large to load as one string, read it by line")
+
+    @property
+    def newline(self):
+        return self._newline
+
+    @property
+    def lines(self):
+        return self[:]
+
+    @property
+    def line_count(self) -> int:
+        if self.complete:
+            return len(self._offsets)
+        return max(1, len(self._offsets) - 1)
+
+    def get_line(self, index: int) -> str:
+        cached = self._line_cache.get(index)
+        if cached is not None:
+            self._line_cache.move_to_end(index)
+            return cached
+
+        if index < 0 or index >= self.line_count or self.closed:
+            return ""
+
+        start = self._offsets[index]
+        end = self._offsets[index + 1] if index + 1 < len(self._offsets) else self._indexed_to
+        raw = self._map[start:end].rstrip(b"\n").rstrip(b"\r")
+        line = raw.decode(self.encoding, errors="replace")
+
+        self._line_cache[index] = line
+        if len(self._line_cache) > LINE_CACHE_SIZE:
+            self._line_cache.popitem(last=False)
+        return line
+
+    def __getitem__(self, line_index):
+        if isinstance(line_index, slice):
+            return [self.get_line(index) for index in range(*line_index.indices(self.line_count))]
+        if line_index < 0:
+            line_index += self.line_count
+        return self.get_line(line_index)
+
+    def get_text_range(self, start, end) -> str:
+        (start_row, start_column), (end_row, end_column) = sorted((start, end))
+        if start_row == end_row:
+            return self.get_line(start_row)[start_column:end_column]
+
+        lines = [self.get_line(start_row)[start_column:]]
+        lines.extend(self.get_line(row) for row in range(start_row + 1, end_row))
+        lines.append(self.get_line(end_row)[:end_column])
+        return self._newline.join(lines)
+
+    def get_size(self, indent_width: int) -> Size:
+        return Size(self._max_line_length, self.line_count)
@@ -0,0 +1,320 @@
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from .ignore_rules import IgnoreRules
+
+INDEX_FORMAT = 1
+SCAN_WORKERS = 8
+CHUNK_PATHS = 4096
+FRAME_BUDGET = 0.012
+
+
+def cache_directory():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "lazyedit")
+
+
+def fuzzy_score(query, path):
+    lower = path.lower()
+    name_start = max(lower.rfind("/"), lower.rfind("\\")) + 1
+    score = 0
+    index = -1
+    for char in query:
+        previous = index
+        index = lower.find(char, index + 1)
+        if index == previous + 1:
+            score += 5
+        if index == 0 or lower[index - 1] in "/\\_-. ":
+            score += 3
+        if index >= name_start:
+            score += 2
+        if index == name_start:
+            score += 5
+    return score
+
+
+class FuzzySearch:
+    TIER_WEIGHT = 1000000
+
+    def __init__(self, chunks, query, limit=50):
+        self.query = query.lower()
+        self.limit = limit
+        self.chunks = chunks
+        self.matched = []
+        self.complete = False
+        self._heap = []
+        self._seen = set()
+
+        literal = re.escape(self.query)
+        fuzzy = "^" + "".join(f"[^\n{re.escape(char)}]*{re.escape(char)}" for char in self.query)
+        self.passes = [
+            (2, re.compile(f"{literal}[^/\\\\\n]*$", re.M)),
+            (1, re.compile(literal)),
+            (0, re.compile(fuzzy, re.M)),
+        ]
+        self.pass_index = 0
+        self.position = 0
+        self.done = not chunks or not self.query
+
+    def _settled(self):
+        if len(self._heap) < self.limit or self.pass_index >= len(self.passes):
+            return False
+        next_tier = self.passes[self.pass_index][0]
+        return self._heap[0][0] >= (next_tier + 1) * self.TIER_WEIGHT - self.TIER_WEIGHT // 2
+
+    def step(self, budget=FRAME_BUDGET) -> bool:
+        deadline = time.perf_counter() + budget
+        heap = self._heap
+        seen = self._seen
+        limit = self.limit
+        query = self.query
+
+        while not self.done:
+            tier, pattern = self.passes[self.pass_index]
+            paths, blob, starts = self.chunks[self.position]
+            last_line = -1
+            for match in pattern.finditer(blob):
+                start = match.start()
+                line = bisect_right(starts, start) - 1
+                if line == last_line:
+                    continue
+                last_line = line
+                path = paths[line]
+                if tier == 0:
+                    self.matched.append(path)
+                if path in seen:
+                    continue
+                seen.add(path)
+                score = tier * self.TIER_WEIGHT - len(path)
+                if tier == 2 and (start == starts[line] or blob[start - 1] in "/\\"):
+                    score += self.TIER_WEIGHT
+                elif tier == 0:
+                    score += fuzzy_score(query, path) * 1000
+                entry = (score, path)
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+            self.position += 1
+            if self.position >= len(self.chunks):
+                self.position = 0
+                self.pass_index += 1
+                if self.pass_index >= len(self.passes):
+                    self.complete = True
+                    self.done = True
+                elif self._settled():
+                    self.done = True
+            if time.perf_counter() >= deadline:
+                break
+
+        return self.done
+
+    def results(self):
+        return [path for _, path in sorted(self._heap, reverse=True)]
+
+
+def build_chunks(paths, chunk_size=CHUNK_PATHS):
+    chunks = []
+    for start in range(0, len(paths), chunk_size):
+        chunk = paths[start:start + chunk_size]
+        starts = []
+        offset = 0
+        for path in chunk:
+            starts.append(offset)
+            offset += len(path) + 1
+        chunks.append((chunk, "\n".join(chunk).lower(), starts))
+    return chunks
+
+
+class PathIndex:
+    def __init__(self, root=".", cache_dir=None, ignore_rules=None):
+        self.root = root
+        self.ignore_rules = ignore_rules or IgnoreRules(root)
+        self.cache_dir = cache_dir or cache_directory()
+        self.version = 0
+        self.ready = False
+        self._dirs = {}
+        self._lock = threading.RLock()
+        self._published = (0, [], [])
+        self._last_search = None
+
+    @property
+    def cache_path(self):
+        digest = hashlib.sha1(os.path.abspath(self.root).encode("utf-8", errors="surrogatepass")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"paths-{digest}.json.gz")
+
+    def _relative(self, directory, name):
+        return os.path.join(directory, name) if directory else name
+
+    def _absolute(self, directory):
+        return os.path.join(self.root, directory) if directory else self.root
+
+    def scan_directory(self, directory):
+        files = []
+        subdirs = []
+        path = self._absolute(directory)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    relative = self._relative(directory, entry.name)
+                    if self.ignore_rules.is_ignored(relative, is_dir):
+                        continue
+                    if is_dir:
+                        subdirs.append(relative)
+                    else:
+                        files.append(entry.name)
+        except OSError:
+            return directory, None, [], []
+        return directory, mtime, files, subdirs
+
+    def _scan_tree(self, directories, workers=SCAN_WORKERS):
+        scanned = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(self.scan_directory, directory) for directory in directories}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory, mtime, files, subdirs = future.result()
+                    if mtime is None:
+                        continue
+                    scanned[directory] = (mtime, files, subdirs)
+                    pending.update(executor.submit(self.scan_directory, subdir) for subdir in subdirs)
+        return scanned
+
+    def build(self):
+        scanned = self._scan_tree([""])
+        with self._lock:
+            self._dirs = scanned
+            self.version += 1
+        self.publish()
+        self.ready = True
+        self.save()
+
+    def _drop(self, directory):
+        entry = self._dirs.pop(directory, None)
+        if entry is not None:
+            for subdir in entry[2]:
+                self._drop(subdir)
+
+    def update_dirs(self, directories):
+        changed = False
+        for directory in directories:
+            directory = "" if directory in (".", "") else os.path.normpath(directory)
+            if directory not in self._dirs:
+                continue
+            self.ignore_rules.invalidate(directory)
+            directory, mtime, files, subdirs = self.scan_directory(directory)
+            with self._lock:
+                previous = self._dirs.get(directory)
+                if mtime is None:
+                    self._drop(directory)
+                    changed = True
+                    continue
+                old_subdirs = set(previous[2]) if previous else set()
+                for removed in old_subdirs - set(subdirs):
+                    self._drop(removed)
+                self._dirs[directory] = (mtime, files, subdirs)
+            added = [subdir for subdir in subdirs if subdir not in old_subdirs]
+            if added:
+                scanned = self._scan_tree(added)
+                with self._lock:
+                    self._dirs.update(scanned)
+            changed = True
+
+        if changed:
+            with self._lock:
+                self.version += 1
+            self.publish()
+        return changed
+
+    def refresh_stale(self):
+        stale = []
+        for directory, (mtime, _, _) in list(self._dirs.items()):
+            try:
+                current = os.stat(self._absolute(directory)).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                stale.append(directory)
+        if stale and self.update_dirs(stale):
+            self.save()
+        return len(stale)
+
+    def load(self):
+        try:
+            with gzip.open(self.cache_path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("format") != INDEX_FORMAT or data.get("root") != os.path.abspath(self.root):
+            return False
+
+        with self._lock:
+            self._dirs = {directory: tuple(entry) for directory, entry in data["dirs"].items()}
+            self.version += 1
+        self.publish()
+        self.ready = True
+        return True
+
+    def save(self):
+        with self._lock:
+            data = {"format": INDEX_FORMAT, "root": os.path.abspath(self.root), "dirs": dict(self._dirs)}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def load_or_build(self):
+        if self.load():
+            self.refresh_stale()
+        else:
+            self.build()
+
+    @property
+    def paths(self):
+        return self._published[1]
+
+    def publish(self):
+        with self._lock:
+            version = self.version
+            entries = list(self._dirs.items())
+        paths = []
+        for directory, (_, files, _) in entries:
+            if directory:
+                paths.extend(os.path.join(directory, name) for name in files)
+            else:
+                paths.extend(files)
+        paths.sort()
+        chunks = build_chunks(paths)
+        with self._lock:
+            if version > self._published[0]:
+                self._published = (version, paths, chunks)
+
+    def search(self, query, limit=50) -> FuzzySearch:
+        version, _, chunks = self._published
+        previous = self._last_search
+        if (previous is not None and previous[0] == version and previous[1].complete
+                and previous[1].query and query.lower().startswith(previous[1].query)):
+            chunks = build_chunks(previous[1].matched)
+        search = FuzzySearch(chunks, query, limit)
+        self._last_search = (version, search)
+        return search
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+
+SHUTDOWN_TIMEOUT = 1.0
+KILL_TIMEOUT = 0.2
+
+
+def _page_size():
+    try:
+        return os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return 4096
+
+
+def _read_rss(pid):
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * _page_size()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _children_map():
+    children = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1:
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def process_tree_rss(pid, children=None):
+    if _read_rss(pid) is None:
+        return None
+    if children is None:
+        children = _children_map()
+    total = 0
+    stack = [pid]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total += _read_rss(current) or 0
+        stack.extend(children.get(current, ()))
+    return total
+
+
+class ProcessRecord:
+    def __init__(self, name, process):
+        self.name = name
+        self.process = process
+        self.pid = process.pid
+        self.started = time.monotonic()
+        self.ended = None
+        self.returncode = None
+
+    @property
+    def alive(self) -> bool:
+        return self.ended is None
+
+    @property
+    def runtime(self) -> float:
+        return (self.ended or time.monotonic()) - self.started
+
+
+class ProcessSupervisor:
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def register(self, name, process) -> ProcessRecord:
+        record = ProcessRecord(name, process)
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def mark_exited(self, record, returncode):
+        if record.ended is None:
+            record.ended = time.monotonic()
+            record.returncode = returncode
+
+    def live(self):
+        with self._lock:
+            return [record for record in self.records if record.alive]
+
+    def reap(self):
+        for record in self.live():
+            returncode = record.process.poll()
+            if returncode is not None:
+                self.mark_exited(record, returncode)
+
+    def forget(self, record):
+        with self._lock:
+            if record in self.records:
+                self.records.remove(record)
+
+    def memory_usage(self, records=None):
+        records = self.live() if records is None else [record for record in records if record.alive]
+        if not records or not os.path.isdir("/proc"):
+            return {}
+        children = _children_map()
+        return {record: process_tree_rss(record.pid, children) for record in records}
+
+    def terminate(self, record):
+        if record.alive:
+            try:
+                record.process.terminate()
+            except OSError:
+                pass
+
+    def shutdown(self, records=None, timeout=SHUTDOWN_TIMEOUT):
+        records = self.live() if records is None else [record for record in records if record.alive]
+        for record in records:
+            self.terminate(record)
+
+        deadline = time.monotonic() + timeout
+        pending = list(records)
+        while pending:
+            self.reap()
+            pending = [record for record in pending if record.alive]
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                for record in pending:
+                    try:
+                        record.process.kill()
+                    except OSError:
+                        pass
+                kill_deadline = time.monotonic() + KILL_TIMEOUT
+                while pending and time.monotonic() < kill_deadline:
+                    self.reap()
+                    pending = [record for record in pending if record.alive]
+                    time.sleep(0.01)
+                break
+            time.sleep(0.01)
+
+        for record in records:
+            record.process.close()
@@ -0,0 +1,203 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+import threading
+from typing import NamedTuple
+
+BINARY_SNIFF_BYTES = 8192
+MMAP_THRESHOLD = 1024 * 1024
+BATCH_FILES = 64
+MAX_MATCHES_PER_FILE = 200
+MAX_RESULTS = 10000
+MAX_LINE_PREVIEW = 200
+
+
+class SearchMatch(NamedTuple):
+    path: str
+    line: int
+    column: int
+    text: str
+
+
+def compile_query(query, regex=False, case_sensitive=None):
+    if case_sensitive is None:
+        case_sensitive = any(char.isupper() for char in query)
+    pattern = query.encode("utf-8")
+    if not regex:
+        pattern = re.escape(pattern)
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+def is_binary(data):
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
+
+def search_data(path, data, pattern, max_matches=MAX_MATCHES_PER_FILE):
+    matches = []
+    line = 0
+    counted_to = 0
+    position = 0
+    size = len(data)
+
+    while position <= size and len(matches) < max_matches:
+        match = pattern.search(data, position)
+        if match is None:
+            break
+        start = match.start()
+        line += data.count(b"\n", counted_to, start)
+        counted_to = start
+
+        line_start = data.rfind(b"\n", 0, start) + 1
+        line_end = data.find(b"\n", start)
+        if line_end == -1:
+            line_end = size
+        column = len(data[line_start:start].decode("utf-8", errors="replace"))
+        preview = data[line_start:min(line_end, line_start + MAX_LINE_PREVIEW * 4)]
+        text = preview.decode("utf-8", errors="replace").rstrip("\r")[:MAX_LINE_PREVIEW]
+        matches.append(SearchMatch(path, line, column, text))
+        position = line_end + 1
+    return matches
+
+
+def search_file(root, path, pattern, max_matches=MAX_MATCHES_PER_FILE):
+    full_path = os.path.join(root, path)
+    try:
+        with open(full_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return []
+            if size < MMAP_THRESHOLD:
+                data = f.read()
+                if is_binary(data):
+                    return []
+                return search_data(path, data, pattern, max_matches)
+
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if is_binary(data[:BINARY_SNIFF_BYTES]):
+                    return []
+                return search_data(path, data, pattern, max_matches)
+            finally:
+                data.close()
+    except (OSError, ValueError):
+        return []
+
+
+def search_files(root, paths, pattern, flags, max_matches=MAX_MATCHES_PER_FILE):
+    compiled = re.compile(pattern, flags)
+    matches = []
+    for path in paths:
+        matches.extend(search_file(root, path, compiled, max_matches))
+    return matches
+
+
+class SearchPool:
+    def __init__(self, workers=None):
+        self.workers = workers or max(1, min(8, (os.cpu_count() or 2) - 1))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                try:
+                    self._start_resource_tracker()
+                    context = multiprocessing.get_context("spawn")
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                except (OSError, ValueError, NotImplementedError, ImportError):
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _start_resource_tracker(self):
+        if os.name == "nt":
+            return
+        from multiprocessing import resource_tracker
+
+        # Textual replaces sys.stderr with a capture object whose fileno() is -1,
+        # which the tracker refuses to pass to its child process.
+        stderr = sys.stderr
+        if sys.__stderr__ is not None:
+            sys.stderr = sys.__stderr__
+        try:
+            resource_tracker.ensure_running()
+        finally:
+            sys.stderr = stderr
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+class ProjectSearch:
+    def __init__(self, path_index, query, regex=False, case_sensitive=None, max_results=MAX_RESULTS):
+        self.path_index = path_index
+        self.query = query
+        self.pattern = compile_query(query, regex, case_sensitive)
+        self.max_results = max_results
+        self.result_count = 0
+        self.files_searched = 0
+        self.total_files = 0
+        self.truncated = False
+        self.cancelled = False
+        self.complete = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self, pool, on_matches):
+        if not self.path_index.ready:
+            self.path_index.load_or_build()
+        paths = list(self.path_index.paths)
+        root = self.path_index.root
+        self.total_files = len(paths)
+
+        executor = pool.executor
+        starts = iter(range(0, len(paths), BATCH_FILES))
+        pending = {}
+
+        def submit_next():
+            for start in starts:
+                batch = paths[start:start + BATCH_FILES]
+                future = executor.submit(search_files, root, batch, self.pattern.pattern, self.pattern.flags)
+                pending[future] = len(batch)
+                return
+
+        for _ in range(pool.workers * 2):
+            submit_next()
+
+        try:
+            while pending and not self.cancelled:
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.files_searched += pending.pop(future)
+                    try:
+                        matches = future.result()
+                    except BrokenProcessPool:
+                        pool.shutdown()
+                        raise
+                    if matches and not self.cancelled:
+                        remaining = self.max_results - self.result_count
+                        if len(matches) >= remaining:
+                            matches = matches[:remaining]
+                            self.truncated = True
+                            self.cancelled = True
+                        self.result_count += len(matches)
+                        on_matches(matches)
+                    if not self.cancelled:
+                        submit_next()
+        finally:
+            for future in pending:
+                future.cancel()
+
+        self.complete = not self.cancelled or self.truncated
+        return self.complete
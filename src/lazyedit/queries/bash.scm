@@ -0,0 +1,31 @@
+(comment) @comment
+
+[
+  (string)
+  (raw_string)
+  (ansii_c_string)
+  (heredoc_body)
+  (heredoc_start)
+] @string
+
+(command_name) @function
+(function_definition name: (word) @function)
+
+(variable_name) @variable
+(special_variable_name) @variable.builtin
+(test_operator) @operator
+(file_descriptor) @number
+
+[
+  "if" "then" "else" "elif" "fi"
+  "case" "in" "esac"
+  "for" "while" "do" "done"
+  "function" "export" "local" "declare" "readonly" "unset"
+] @keyword
+
+[
+  "|" "&&" "||" ">" ">>" ">&" "<<" ";" ";;" "=" "=="
+] @operator
+
+["$" "${" "$("] @punctuation.special
+["(" ")" "[" "]" "[[" "]]" "{" "}"] @punctuation.bracket
@@ -0,0 +1,21 @@
+(comment) @comment
+
+[
+  "FROM" "AS" "RUN" "CMD" "LABEL" "EXPOSE" "ENV" "ADD" "COPY"
+  "ENTRYPOINT" "VOLUME" "USER" "WORKDIR" "ARG" "ONBUILD"
+  "STOPSIGNAL" "HEALTHCHECK" "SHELL" "MAINTAINER"
+] @keyword
+
+(double_quoted_string) @string
+
+(image_spec name: (image_name) @type)
+(image_spec tag: (image_tag) @constant)
+(image_alias) @type
+(env_pair name: (unquoted_string) @variable)
+(label_pair key: (unquoted_string) @variable)
+(arg_instruction name: (unquoted_string) @variable)
+(param) @parameter
+(expose_port) @number
+
+["[" "]"] @punctuation.bracket
+["=" ":"] @operator
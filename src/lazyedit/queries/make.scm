@@ -0,0 +1,18 @@
+(comment) @comment
+
+(targets (word) @function)
+(variable_assignment name: (word) @variable)
+(define_directive name: (word) @variable)
+(variable_reference (word) @variable)
+(automatic_variable) @variable.builtin
+(escape) @string.escape
+
+[
+  "ifeq" "ifdef" "else" "endif"
+  "include" "-include" "export" "define" "endef"
+] @keyword
+
+["=" ":=" "?=" "+=" ":" "|"] @operator
+
+"$" @punctuation.special
+["(" ")" "{" "}"] @punctuation.bracket
@@ -0,0 +1,109 @@
+from textual.widgets import Static, Input, Label
+from textual.containers import Container
+from rich.text import Text
+from functools import partial
+
+FRAME_INTERVAL = 1 / 60
+
+
+class QuickOpenDialog(Container):
+    DEFAULT_CSS = """
+    QuickOpenDialog {
+        dock: top;
+        height: auto;
+        max-height: 60%;
+        background: #0C0C0C;
+        border: round #007FFF;
+        padding: 0 1;
+    }
+    QuickOpenDialog #quick_open_results {
+        height: auto;
+    }
+    """
+
+    def __init__(self, path_index, limit=20):
+        super().__init__()
+        self.path_index = path_index
+        self.limit = limit
+        self.results = []
+        self.selected = 0
+        self.search = None
+
+    def compose(self):
+        yield Label("Find file:")
+        yield Input(id="quick_open_input")
+        yield Static(id="quick_open_results")
+
+    def on_mount(self):
+        self.query_one(Input).focus()
+        self.render_results()
+
+    def on_input_changed(self, event):
+        self.start_search(event.value.strip())
+
+    def start_search(self, query):
+        self.selected = 0
+        if not query or self.path_index is None or not self.path_index.ready:
+            self.search = None
+            self.results = []
+            self.render_results()
+            return
+
+        self.search = self.path_index.search(query, limit=self.limit)
+        self.continue_search(self.search)
+
+    def continue_search(self, search):
+        if search is not self.search:
+            return
+        search.step()
+        self.results = search.results()
+        self.selected = min(self.selected, max(0, len(self.results) - 1))
+        self.render_results()
+        if not search.done:
+            self.set_timer(FRAME_INTERVAL, partial(self.continue_search, search))
+
+    def render_results(self):
+        results = self.query_one("#quick_open_results", Static)
+        if self.path_index is None or not self.path_index.ready:
+            results.update("Indexing files...")
+            return
+
+        text = Text()
+        for i, path in enumerate(self.results):
+            if i:
+                text.append("\n")
+            text.append(path, style="green" if i == self.selected else "")
+        if self.search is not None and not self.search.done:
+            text.append("\n…", style="#555555")
+        results.update(text)
+
+    def open_selected(self):
+        if not self.results:
+            return
+        path = self.results[self.selected]
+        self.close()
+        self.app.directory.reveal_path(path)
+        self.app.directory.open_path(path)
+
+    def close(self):
+        self.search = None
+        self.app.directory.browsing = True
+        self.remove()
+
+    def on_input_submitted(self, event):
+        self.open_selected()
+
+    def on_key(self, event):
+        if event.key == "escape":
+            event.stop()
+            self.close()
+        elif event.key == "down":
+            event.stop()
+            if self.selected < len(self.results) - 1:
+                self.selected += 1
+                self.render_results()
+        elif event.key == "up":
+            event.stop()
+            if self.selected > 0:
+                self.selected -= 1
+                self.render_results()
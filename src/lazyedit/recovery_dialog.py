@@ -0,0 +1,99 @@
+from textual.widgets import Static, Label
+from textual.containers import Container
+from rich.text import Text
+import os
+
+from .edit_journal import discard_recovery
+
+
+def tree_path(path):
+    try:
+        relative = os.path.relpath(path)
+    except ValueError:
+        return path
+    return path if relative.startswith(os.pardir) else os.path.join(os.curdir, relative)
+
+
+class RecoveryDialog(Container):
+    can_focus = True
+
+    DEFAULT_CSS = """
+    RecoveryDialog {
+        dock: top;
+        height: auto;
+        max-height: 60%;
+        background: #0C0C0C;
+        border: round #e5c07b;
+        padding: 0 1;
+    }
+    RecoveryDialog #recovery_list {
+        height: auto;
+    }
+    """
+
+    def __init__(self, recoveries):
+        super().__init__()
+        self.recoveries = list(recoveries)
+        self.selected = 0
+
+    def compose(self):
+        yield Label("Unsaved changes from a previous session: (Enter) Recover   (d) Discard   (Esc) Decide later")
+        yield Static(id="recovery_list")
+
+    def on_mount(self):
+        self.focus()
+        self.render_list()
+
+    def render_list(self):
+        text = Text()
+        for i, recovery in enumerate(self.recoveries):
+            if i:
+                text.append("\n")
+            text.append(tree_path(recovery.path), style="green" if i == self.selected else "")
+        self.query_one("#recovery_list", Static).update(text)
+
+    def recover_selected(self):
+        recovery = self._pop_selected()
+        path = tree_path(recovery.path)
+        self.app.file_editor.recover(path, recovery.saved_text, recovery.text)
+        self.app.directory.reveal_path(path)
+        self.app.notify(f"Recovered unsaved changes: {os.path.basename(path)} (Ctrl+s to keep)")
+
+    def discard_selected(self):
+        recovery = self._pop_selected()
+        self.app.notify(f"Discarded recovered changes: {os.path.basename(recovery.path)}")
+
+    def _pop_selected(self):
+        recovery = self.recoveries.pop(self.selected)
+        discard_recovery(recovery.journal_path)
+        self.selected = min(self.selected, max(0, len(self.recoveries) - 1))
+        if self.recoveries:
+            self.render_list()
+        else:
+            self.close()
+        return recovery
+
+    def close(self):
+        self.app.directory.browsing = True
+        self.remove()
+
+    def on_key(self, event):
+        if event.key == "escape":
+            event.stop()
+            self.close()
+        elif event.key == "enter":
+            event.stop()
+            self.recover_selected()
+        elif event.key in ("d", "delete"):
+            event.stop()
+            self.discard_selected()
+        elif event.key == "down":
+            event.stop()
+            if self.selected < len(self.recoveries) - 1:
+                self.selected += 1
+                self.render_list()
+        elif event.key == "up":
+            event.stop()
+            if self.selected > 0:
+                self.selected -= 1
+                self.render_list()
@@ -0,0 +1,96 @@
+from collections import Counter
+import time
+
+FRAME_INTERVAL = 1 / 60
+
+
+class RefreshScheduler:
+    def __init__(self, set_timer, call_later, frame_interval=FRAME_INTERVAL, clock=time.monotonic):
+        self._set_timer = set_timer
+        self._call_later = call_later
+        self.frame_interval = frame_interval
+        self.clock = clock
+        self._callbacks = {}
+        self._dirty = {}
+        self._scheduled = False
+        self._last_frame = float("-inf")
+        self.counters = Counter()
+        self.repaints = Counter()
+
+    def schedule(self, callback):
+        self.counters["requests"] += 1
+        if callback in self._callbacks:
+            self.counters["coalesced"] += 1
+        else:
+            self._callbacks[callback] = None
+        self._request_frame()
+
+    def mark_dirty(self, widget, *regions):
+        self.counters["requests"] += 1
+        if widget in self._dirty:
+            self.counters["coalesced"] += 1
+            dirty = self._dirty[widget]
+            if dirty is not None and regions:
+                dirty.update(regions)
+            else:
+                self._dirty[widget] = None
+        else:
+            self._dirty[widget] = set(regions) if regions else None
+        self._request_frame()
+
+    def _request_frame(self):
+        if self._scheduled:
+            return
+        self._scheduled = True
+        delay = self._last_frame + self.frame_interval - self.clock()
+        if delay > 0:
+            self._set_timer(delay, self.flush)
+        else:
+            self._call_later(self.flush)
+
+    def flush(self):
+        self._last_frame = self.clock()
+        self.counters["frames"] += 1
+
+        callbacks = list(self._callbacks)
+        self._callbacks.clear()
+        for callback in callbacks:
+            if not getattr(getattr(callback, "__self__", None), "is_attached", True):
+                continue
+            self.counters["callbacks"] += 1
+            callback()
+
+        dirty = self._dirty
+        self._dirty = {}
+        for widget, regions in dirty.items():
+            if not getattr(widget, "is_attached", True):
+                continue
+            if regions is None:
+                widget.refresh()
+            else:
+                widget.refresh(*regions)
+            self.counters["repaints"] += 1
+            self.repaints[type(widget).__name__] += 1
+
+        self._scheduled = False
+        if self._callbacks or self._dirty:
+            self._request_frame()
+
+    def summary(self, keys=0):
+        counters = self.counters
+        lines = [
+            f"{counters['frames']} frames, {counters['repaints']} repaints, "
+            f"{counters['coalesced']} of {counters['requests']} requests coalesced"
+        ]
+        if keys:
+            lines.append(f"{counters['repaints'] / keys:.2f} repaints per key")
+        if self.repaints:
+            lines.append(", ".join(f"{name} {count}" for name, count in self.repaints.most_common()))
+        return lines
+
+
+def refresh_scheduler(widget):
+    app = widget.app
+    if not hasattr(app, "refresh_scheduler"):
+        app.refresh_scheduler = RefreshScheduler(app.set_timer, app.call_later)
+    return app.refresh_scheduler
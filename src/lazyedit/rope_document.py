@@ -0,0 +1,533 @@
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate, chain, count, islice
+import time
+
+from rich.cells import cell_len
+from textual.document._document import DocumentBase, EditResult, VALID_NEWLINES, _detect_newline_style
+from textual.document._languages import BUILTIN_LANGUAGES
+from textual.document._syntax_aware_document import SyntaxAwareDocumentError
+from textual.geometry import Size
+
+try:
+    from tree_sitter import Parser
+    from tree_sitter_languages import get_language, get_parser
+    TREE_SITTER = True
+except ImportError:
+    TREE_SITTER = False
+
+BLOCK_LINES = 256
+MAX_BLOCK_LINES = 2 * BLOCK_LINES
+MIN_BLOCK_LINES = BLOCK_LINES // 4
+
+DEFAULT_HIGHLIGHT_BYTES = 8 * 1024 * 1024
+DEFAULT_HIGHLIGHT_LINE_LENGTH = 10_000
+QUERY_FANOUT = 256
+PARSE_SLICE_MICROS = 20_000
+PARSE_PAUSE = 0.005
+
+versions = count(1)
+
+
+def utf8_len(text) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def split_lines(text):
+    lines = text.splitlines()
+    if text.endswith(tuple(VALID_NEWLINES)) or not text:
+        lines.append("")
+    return lines
+
+
+def same_lines(blocks, other) -> bool:
+    i = j = 0
+    offset = other_offset = 0
+    while i < len(blocks) and j < len(other):
+        block, other_block = blocks[i], other[j]
+        if block is other_block and not offset and not other_offset:
+            i += 1
+            j += 1
+            continue
+        count = min(len(block) - offset, len(other_block) - other_offset)
+        if block[offset:offset + count] != other_block[other_offset:other_offset + count]:
+            return False
+        offset += count
+        other_offset += count
+        if offset == len(block):
+            i += 1
+            offset = 0
+        if other_offset == len(other_block):
+            j += 1
+            other_offset = 0
+    return i == len(blocks) and j == len(other)
+
+
+class PrefixSums:
+    def __init__(self, values):
+        size = len(values)
+        tree = [0] * (size + 1)
+        for i, value in enumerate(values, 1):
+            tree[i] += value
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._size = size
+        self._step = 1 << (size.bit_length() - 1) if size else 0
+
+    def add(self, index, delta):
+        tree = self._tree
+        i = index + 1
+        while i <= self._size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index) -> int:
+        tree = self._tree
+        total = 0
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, target):
+        tree = self._tree
+        position = 0
+        step = self._step
+        while step:
+            following = position + step
+            if following <= self._size and tree[following] <= target:
+                position = following
+                target -= tree[following]
+            step >>= 1
+        return position, target
+
+
+class RopeSnapshot:
+    def __init__(self, blocks, newline, line_count, byte_count, version):
+        self.blocks = blocks
+        self.newline = newline
+        self.line_count = line_count
+        self.byte_count = byte_count
+        self.version = version
+
+    def __len__(self):
+        return self.line_count
+
+    def __iter__(self):
+        return chain.from_iterable(self.blocks)
+
+    @property
+    def text(self) -> str:
+        return self.newline.join(self)
+
+    def sample(self, lines) -> str:
+        head = list(islice(self, lines))
+        wanted = min(lines, self.line_count - len(head))
+        tail = []
+        for block in reversed(self.blocks):
+            if len(tail) >= wanted:
+                break
+            tail = list(block[len(tail) - wanted:]) + tail
+        return self.newline.join(head + tail)
+
+    def matches(self, other) -> bool:
+        if other is None or other.newline != self.newline:
+            return False
+        if other.version == self.version:
+            return True
+        if other.line_count != self.line_count or other.byte_count != self.byte_count:
+            return False
+        return same_lines(self.blocks, other.blocks)
+
+
+class RopeDocument(DocumentBase):
+    def __init__(self, text):
+        if isinstance(text, RopeSnapshot):
+            self._tab_width = None
+            self._newline = text.newline
+            self.version = text.version
+            self._blocks = list(text.blocks)
+            self._bytes = [sum(map(utf8_len, block)) for block in self._blocks]
+            self._widths = [None] * len(self._blocks)
+            self._reindex()
+            return
+        if isinstance(text, RopeDocument):
+            self._tab_width = text._tab_width
+            self._newline = text._newline
+            self.version = text.version
+            self._blocks = list(text._blocks)
+            self._bytes = list(text._bytes)
+            self._widths = list(text._widths)
+            self._reindex()
+            return
+        self._tab_width = None
+        self._newline = _detect_newline_style(text)
+        self.version = next(versions)
+        lines = split_lines(text)
+        blocks = [tuple(lines[i:i + BLOCK_LINES]) for i in range(0, len(lines), BLOCK_LINES)]
+        self._blocks = blocks
+        self._bytes = [sum(map(utf8_len, block)) for block in blocks]
+        self._widths = [None] * len(blocks)
+        self._reindex()
+
+    def _reindex(self):
+        self._line_index = PrefixSums([len(block) for block in self._blocks])
+        self._byte_index = PrefixSums(self._bytes)
+        self._line_count = sum(len(block) for block in self._blocks)
+        self._cursor = (0, ())
+
+    @property
+    def newline(self):
+        return self._newline
+
+    @property
+    def line_count(self) -> int:
+        return self._line_count
+
+    @property
+    def text(self) -> str:
+        return self._newline.join(chain.from_iterable(self._blocks))
+
+    @property
+    def lines(self):
+        return list(chain.from_iterable(self._blocks))
+
+    @property
+    def byte_count(self) -> int:
+        return self._byte_index.prefix(len(self._blocks))
+
+    def snapshot(self) -> RopeSnapshot:
+        return RopeSnapshot(tuple(self._blocks), self._newline, self._line_count, self.byte_count, self.version)
+
+    def matches(self, snapshot) -> bool:
+        if snapshot is None or snapshot.newline != self._newline:
+            return False
+        if snapshot.version == self.version:
+            return True
+        if snapshot.line_count != self._line_count or snapshot.byte_count != self.byte_count:
+            return False
+        return same_lines(self._blocks, snapshot.blocks)
+
+    def _locate(self, index):
+        if index >= self._line_count:
+            last = len(self._blocks) - 1
+            return last, len(self._blocks[last])
+        return self._line_index.find(index)
+
+    def _line(self, index) -> str:
+        start, block = self._cursor
+        offset = index - start
+        if 0 <= offset < len(block):
+            return block[offset]
+        number, offset = self._line_index.find(index)
+        block = self._blocks[number]
+        self._cursor = (index - offset, block)
+        return block[offset]
+
+    def get_line(self, index: int) -> str:
+        return self[index]
+
+    def __getitem__(self, line_index):
+        if isinstance(line_index, slice):
+            start, stop, step = line_index.indices(self._line_count)
+            if step != 1:
+                return [self._line(index) for index in range(start, stop, step)]
+            lines = []
+            while start < stop:
+                number, offset = self._line_index.find(start)
+                block = self._blocks[number]
+                taken = block[offset:offset + stop - start]
+                lines.extend(taken)
+                start += len(taken)
+            return lines
+        if line_index < 0:
+            line_index += self._line_count
+        if not 0 <= line_index < self._line_count:
+            raise IndexError("line index out of range")
+        return self._line(line_index)
+
+    def get_text_range(self, start, end) -> str:
+        if start == end:
+            return ""
+        (top_row, top_column), (bottom_row, bottom_column) = sorted((start, end))
+        if top_row >= self._line_count:
+            return ""
+        if top_row == bottom_row:
+            return self._line(top_row)[top_column:bottom_column]
+
+        lines = self[top_row:bottom_row + 1]
+        lines[0] = lines[0][top_column:]
+        if bottom_row < self._line_count:
+            lines[-1] = lines[-1][:bottom_column]
+        else:
+            lines.append("")
+        return self._newline.join(lines)
+
+    def get_size(self, indent_width: int) -> Size:
+        if indent_width != self._tab_width:
+            self._tab_width = indent_width
+            self._widths = [None] * len(self._blocks)
+        widths = self._widths
+        for number, width in enumerate(widths):
+            if width is None:
+                widths[number] = self._block_width(self._blocks[number])
+        return Size(max(widths, default=0), self._line_count)
+
+    def _line_width(self, line) -> int:
+        if "\t" in line:
+            line = line.expandtabs(self._tab_width or 4)
+        return len(line) if line.isascii() else cell_len(line)
+
+    def _block_width(self, lines) -> int:
+        joined = "".join(lines)
+        if joined.isascii() and "\t" not in joined:
+            return max(map(len, lines), default=0)
+        return max(map(self._line_width, lines), default=0)
+
+    def replace_range(self, start, end, text) -> EditResult:
+        top, bottom = sorted((start, end))
+        top_row, top_column = top
+        bottom_row, bottom_column = bottom
+
+        insert_lines = split_lines(text) if text else []
+        replaced_text = self.get_text_range(top, bottom)
+        before = self._line(top_row)[:top_column] if top_row < self._line_count else ""
+        after = self._line(bottom_row)[bottom_column:] if bottom_row < self._line_count else ""
+
+        if insert_lines:
+            insert_lines[0] = before + insert_lines[0]
+            destination_column = len(insert_lines[-1])
+            insert_lines[-1] = insert_lines[-1] + after
+        else:
+            destination_column = len(before)
+            insert_lines = [before + after]
+
+        top_row = min(top_row, self._line_count)
+        self.version = next(versions)
+        self._replace_lines(top_row, min(bottom_row + 1, self._line_count), insert_lines)
+        return EditResult((top_row + len(insert_lines) - 1, destination_column), replaced_text)
+
+    def _replace_lines(self, start, stop, lines):
+        first, offset = self._locate(start)
+        last, end_offset = self._locate(stop - 1) if stop > start else (first, offset - 1)
+        end_offset += 1
+
+        blocks = self._blocks
+        if first == last:
+            block = blocks[first]
+            merged = block[:offset] + tuple(lines) + block[end_offset:]
+            if MIN_BLOCK_LINES <= len(merged) <= MAX_BLOCK_LINES or len(blocks) == 1 and len(merged) <= MAX_BLOCK_LINES:
+                removed = block[offset:end_offset]
+                byte_delta = sum(map(utf8_len, lines)) - sum(map(utf8_len, removed))
+                width = self._widths[first]
+                if width is not None:
+                    if any(self._line_width(line) >= width for line in removed):
+                        width = None
+                    else:
+                        width = max(width, self._block_width(lines))
+                blocks[first] = merged
+                self._bytes[first] += byte_delta
+                self._widths[first] = width
+                self._line_index.add(first, len(merged) - len(block))
+                self._byte_index.add(first, byte_delta)
+                self._line_count += len(merged) - len(block)
+                self._cursor = (0, ())
+                return
+
+        merged = blocks[first][:offset] + tuple(lines) + blocks[last][end_offset:]
+        if len(merged) < MIN_BLOCK_LINES and last + 1 < len(blocks):
+            last += 1
+            merged += blocks[last]
+        pieces = [merged[i:i + BLOCK_LINES] for i in range(0, len(merged), BLOCK_LINES)] or [("",)]
+        blocks[first:last + 1] = pieces
+        self._bytes[first:last + 1] = [sum(map(utf8_len, piece)) for piece in pieces]
+        self._widths[first:last + 1] = [None] * len(pieces)
+        self._reindex()
+
+    def _location_to_byte_offset(self, location) -> int:
+        row, column = location
+        if row >= self._line_count:
+            return self._byte_index.prefix(len(self._blocks)) + self._line_count * len(self._newline)
+        number, offset = self._line_index.find(row)
+        block = self._blocks[number]
+        return (
+            self._byte_index.prefix(number)
+            + sum(map(utf8_len, block[:offset]))
+            + row * len(self._newline)
+            + utf8_len(block[offset][:column])
+        )
+
+    def _location_to_point(self, location):
+        row, column = location
+        if row >= self._line_count:
+            return row, 0
+        return row, utf8_len(self._line(row)[:column])
+
+
+class SnapshotReader:
+    def __init__(self, snapshot):
+        self.blocks = snapshot.blocks
+        self.starts = list(accumulate((len(block) for block in snapshot.blocks), initial=0))
+        self.line_count = snapshot.line_count
+        self.newline = snapshot.newline
+
+    def line(self, row) -> str:
+        number = bisect_right(self.starts, row) - 1
+        return self.blocks[number][row - self.starts[number]]
+
+    def read(self, byte_offset, point):
+        row, column = point
+        if row >= self.line_count:
+            return b""
+        encoded = self.line(row).encode("utf-8")
+        newline = self.newline
+        if column < len(encoded):
+            return encoded[column:] + newline.encode("utf-8")
+        if column == len(encoded):
+            return newline[0].encode("utf-8")
+        if column == len(encoded) + 1 and newline == "\r\n":
+            return b"\n"
+        return b""
+
+
+def highlight_map(captures, start_row, end_row):
+    highlights = defaultdict(list)
+    for node, name in captures:
+        node_start_row, node_start_column = node.start_point
+        node_end_row, node_end_column = node.end_point
+        if node_start_row == node_end_row:
+            highlights[node_start_row].append((node_start_column, node_end_column, name))
+            continue
+        if node_start_row >= start_row:
+            highlights[node_start_row].append((node_start_column, None, name))
+        for row in range(max(node_start_row + 1, start_row), min(node_end_row, end_row)):
+            highlights[row].append((0, None, name))
+        if node_end_row < end_row:
+            highlights[node_end_row].append((0, node_end_column, name))
+    return highlights
+
+
+class SyntaxAwareRopeDocument(RopeDocument):
+    def __init__(self, text, language):
+        if not TREE_SITTER:
+            raise RuntimeError("SyntaxAwareDocument unavailable.")
+        super().__init__(text)
+        if isinstance(language, str):
+            if language not in BUILTIN_LANGUAGES:
+                raise SyntaxAwareDocumentError(f"Invalid language {language!r}")
+            self.language = get_language(language)
+            self._parser = get_parser(language)
+        else:
+            self.language = language
+            self._parser = Parser()
+            self._parser.set_language(language)
+        self._syntax_tree = None
+        self._pending_edits = None
+
+    @property
+    def language_name(self):
+        return self.language.name if self.language else None
+
+    @property
+    def syntax_tree(self):
+        return self._syntax_tree
+
+    @property
+    def parsing(self) -> bool:
+        return self._pending_edits is not None
+
+    def prepare_query(self, query):
+        return self.language.query(query)
+
+    def query_syntax_tree(self, query, start_point=None, end_point=None):
+        if self._syntax_tree is None:
+            return []
+        captures_kwargs = {}
+        if start_point is not None:
+            captures_kwargs["start_point"] = start_point
+        if end_point is not None:
+            captures_kwargs["end_point"] = end_point
+        return query.captures(self._syntax_tree.root_node, **captures_kwargs)
+
+    def query_rows(self, query, start_row, end_row):
+        if self._syntax_tree is None:
+            return []
+        start, end = (start_row, 0), (end_row, 0)
+        node = self._syntax_tree.root_node.descendant_for_point_range(start, end)
+        if node.child_count <= QUERY_FANOUT:
+            inner = [child for child in node.children if child.end_point > start and child.start_point < end]
+            if len(inner) == 1 and inner[0].child_count > QUERY_FANOUT:
+                node = inner[0]
+            else:
+                while node.parent is not None and node.parent.child_count <= QUERY_FANOUT:
+                    node = node.parent
+                return query.captures(node, start_point=start, end_point=end)
+
+        captures = []
+        cursor = node.walk()
+        cursor.goto_first_child_for_point(*start)
+        if cursor.node == node:
+            return captures
+        while cursor.node.start_point < end:
+            captures.extend(query.captures(cursor.node, start_point=start, end_point=end))
+            if not cursor.goto_next_sibling():
+                break
+        return captures
+
+    def begin_parse(self):
+        tree = self._syntax_tree
+        self._syntax_tree = None
+        self._pending_edits = []
+        return self.snapshot(), tree
+
+    def parse(self, snapshot, old_tree=None, cancelled=None):
+        read = SnapshotReader(snapshot).read
+        args = (read, old_tree) if old_tree is not None else (read,)
+        self._parser.set_timeout_micros(PARSE_SLICE_MICROS)
+        try:
+            while True:
+                try:
+                    return self._parser.parse(*args)
+                except ValueError:
+                    # Timed out: the parser resumes where it stopped on the next call.
+                    if cancelled is not None and cancelled():
+                        self._parser.reset()
+                        return None
+                    time.sleep(PARSE_PAUSE)
+        finally:
+            self._parser.set_timeout_micros(0)
+
+    def finish_parse(self, tree):
+        if tree is not None:
+            for edit in self._pending_edits:
+                tree.edit(**edit)
+        self._syntax_tree = tree
+        self._pending_edits = None
+
+    def replace_range(self, start, end, text) -> EditResult:
+        if self._syntax_tree is None and self._pending_edits is None:
+            return super().replace_range(start, end, text)
+
+        top, bottom = sorted((start, end))
+        start_byte = self._location_to_byte_offset(top)
+        start_point = self._location_to_point(top)
+        old_end_byte = self._location_to_byte_offset(bottom)
+        old_end_point = self._location_to_point(bottom)
+
+        result = super().replace_range(start, end, text)
+
+        edit = dict(
+            start_byte=start_byte,
+            old_end_byte=old_end_byte,
+            new_end_byte=self._location_to_byte_offset(result.end_location),
+            start_point=start_point,
+            old_end_point=old_end_point,
+            new_end_point=self._location_to_point(result.end_location),
+        )
+        if self._pending_edits is not None:
+            self._pending_edits.append(edit)
+        else:
+            self._syntax_tree.edit(**edit)
+        return result
@@ -0,0 +1,82 @@
+DEFAULT_SCROLLBACK_LINES = 50000
+DEFAULT_SCROLLBACK_BYTES = 16 * 1024 * 1024
+LINE_OVERHEAD = 64
+
+
+def line_cost(line) -> int:
+    text = line.text
+    size = len(text) if text.isascii() else len(text.encode("utf-8"))
+    return size + LINE_OVERHEAD + 16 * len(line.runs)
+
+
+class ScrollbackBuffer:
+    def __init__(self, max_lines=DEFAULT_SCROLLBACK_LINES, max_bytes=DEFAULT_SCROLLBACK_BYTES):
+        self.max_lines = max(1, max_lines)
+        self.max_bytes = max_bytes
+        self._slots = [None] * self.max_lines
+        self._costs = [0] * self.max_lines
+        self._head = 0
+        self._count = 0
+        self.total_bytes = 0
+        self.first_index = 0
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def _slot(self, index):
+        return (self._head + index) % self.max_lines
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.slice(*index.indices(self._count)[:2])
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("scrollback index out of range")
+        return self._slots[self._slot(index)]
+
+    def __iter__(self):
+        return iter(self.slice(0, self._count))
+
+    def slice(self, start, stop):
+        start = max(0, start)
+        stop = min(self._count, stop)
+        if start >= stop:
+            return []
+        first = self._slot(start)
+        last = first + (stop - start)
+        if last <= self.max_lines:
+            return self._slots[first:last]
+        return self._slots[first:] + self._slots[:last - self.max_lines]
+
+    def append(self, line):
+        cost = line_cost(line)
+        if self._count == self.max_lines:
+            self._evict()
+        slot = self._slot(self._count)
+        self._slots[slot] = line
+        self._costs[slot] = cost
+        self._count += 1
+        self.total_bytes += cost
+        while self.total_bytes > self.max_bytes and self._count > 1:
+            self._evict()
+
+    def _evict(self):
+        slot = self._head
+        self.total_bytes -= self._costs[slot]
+        self._slots[slot] = None
+        self._costs[slot] = 0
+        self._head = (self._head + 1) % self.max_lines
+        self._count -= 1
+        self.first_index += 1
+
+    def clear(self):
+        self.first_index += self._count
+        self._slots = [None] * self.max_lines
+        self._costs = [0] * self.max_lines
+        self._head = 0
+        self._count = 0
+        self.total_bytes = 0
@@ -0,0 +1,81 @@
+from bisect import bisect_right
+from typing import NamedTuple
+import re
+
+CHUNK_LINES = 4096
+EXPORT_CHUNK_LINES = 8192
+MAX_MATCHES = 100000
+
+
+class ScrollbackMatch(NamedTuple):
+    line: int
+    start: int
+    end: int
+
+
+def compile_pattern(query, regex=False, case_sensitive=None):
+    if case_sensitive is None:
+        case_sensitive = query != query.lower()
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(query if regex else re.escape(query), flags)
+
+
+def search_lines(lines, first_line, pattern):
+    text = "\n".join(line.text for line in lines)
+    starts = [0]
+    for line in lines[:-1]:
+        starts.append(starts[-1] + len(line.text) + 1)
+
+    matches = []
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        row = bisect_right(starts, start) - 1
+        line_end = starts[row] + len(lines[row].text)
+        if end > line_end:
+            continue
+        matches.append(ScrollbackMatch(first_line + row, start - starts[row], end - starts[row]))
+    return matches
+
+
+class ScrollbackSearch:
+    def __init__(self, lines, first_line, query, regex=False, case_sensitive=None, max_matches=MAX_MATCHES):
+        self.lines = lines
+        self.first_line = first_line
+        self.pattern = compile_pattern(query, regex, case_sensitive)
+        self.max_matches = max_matches
+        self.lines_searched = 0
+        self.match_count = 0
+        self.cancelled = False
+        self.truncated = False
+        self.complete = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self, on_matches):
+        for start in range(0, len(self.lines), CHUNK_LINES):
+            if self.cancelled:
+                return
+            matches = search_lines(self.lines[start:start + CHUNK_LINES], self.first_line + start, self.pattern)
+            self.lines_searched = min(start + CHUNK_LINES, len(self.lines))
+            if self.match_count + len(matches) > self.max_matches:
+                matches = matches[:self.max_matches - self.match_count]
+                self.truncated = True
+            if matches:
+                self.match_count += len(matches)
+                on_matches(matches)
+            if self.truncated:
+                return
+        self.complete = True
+
+
+def export_lines(lines, path):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for start in range(0, len(lines), EXPORT_CHUNK_LINES):
+            f.write("".join(
+                line.text if line.wrapped else line.text + "\n"
+                for line in lines[start:start + EXPORT_CHUNK_LINES]
+            ))
+    return len(lines)
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
+
+DEFAULT_SESSION_BYTES = 256 * 1024 * 1024
+
+
+def state_size(state) -> int:
+    size = 0
+    history = state.get('history')
+    if history is not None:
+        size += history.total_bytes
+    for key in ('last_saved_state', 'snapshot'):
+        value = state.get(key)
+        if value:
+            size += getattr(value, 'byte_count', None) or len(value)
+    return size
+
+
+class SessionStore(MutableMapping):
+    def __init__(self, max_bytes=DEFAULT_SESSION_BYTES, is_dirty=None):
+        self.max_bytes = max_bytes
+        self.is_dirty = is_dirty or (lambda path: False)
+        self._states = OrderedDict()
+        self._spilled = {}
+        self._spill_dir = None
+
+    def __contains__(self, path):
+        return path in self._states or path in self._spilled
+
+    def __getitem__(self, path):
+        if path not in self._states and path in self._spilled:
+            self._reload(path)
+        return self._states[path]
+
+    def __setitem__(self, path, state):
+        self._discard_spill(path)
+        self._states[path] = state
+        self._states.move_to_end(path)
+
+    def __delitem__(self, path):
+        if path not in self:
+            raise KeyError(path)
+        self._states.pop(path, None)
+        self._discard_spill(path)
+
+    def __iter__(self):
+        yield from list(self._states)
+        yield from list(self._spilled)
+
+    def __len__(self):
+        return len(self._states) + len(self._spilled)
+
+    def is_spilled(self, path) -> bool:
+        return path in self._spilled
+
+    def memory_usage(self) -> int:
+        return sum(state_size(state) for state in self._states.values())
+
+    def touch(self, path):
+        if path in self._spilled:
+            self._reload(path)
+        if path not in self._states:
+            return
+        self._states.move_to_end(path)
+        self.enforce_limit()
+
+    def enforce_limit(self):
+        total = self.memory_usage()
+        for path in list(self._states)[:-1]:
+            if total <= self.max_bytes:
+                break
+            state = self._states[path]
+            total -= state_size(state)
+            if self.is_dirty(path):
+                self._spill(path, state)
+            del self._states[path]
+
+    def close(self):
+        self._states.clear()
+        self._spilled.clear()
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def _journal_path(self, path):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="lazyedit-session-")
+        digest = hashlib.sha1(os.path.abspath(path).encode("utf-8", errors="surrogatepass")).hexdigest()
+        return os.path.join(self._spill_dir, f"{digest}.journal")
+
+    def _spill(self, path, state):
+        journal_path = self._journal_path(path)
+        with open(journal_path, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)))
+        self._spilled[path] = journal_path
+
+    def _reload(self, path):
+        journal_path = self._spilled.pop(path)
+        with open(journal_path, "rb") as f:
+            state = pickle.loads(zlib.decompress(f.read()))
+        os.remove(journal_path)
+        self._states[path] = state
+
+    def _discard_spill(self, path):
+        journal_path = self._spilled.pop(path, None)
+        if journal_path and os.path.exists(journal_path):
+            os.remove(journal_path)
@@ -0,0 +1,50 @@
+import json
+import os
+
+from .keymap import config_directory
+from .scrollback import DEFAULT_SCROLLBACK_LINES, DEFAULT_SCROLLBACK_BYTES
+from .rope_document import DEFAULT_HIGHLIGHT_BYTES, DEFAULT_HIGHLIGHT_LINE_LENGTH
+
+DEFAULT_SETTINGS = {
+    "scrollback_lines": DEFAULT_SCROLLBACK_LINES,
+    "scrollback_bytes": DEFAULT_SCROLLBACK_BYTES,
+    "highlight_max_bytes": DEFAULT_HIGHLIGHT_BYTES,
+    "highlight_max_line_length": DEFAULT_HIGHLIGHT_LINE_LENGTH,
+}
+
+
+class Settings:
+    def __init__(self, overrides=None):
+        self.values = dict(DEFAULT_SETTINGS)
+        self.errors = []
+        self.configure(overrides or {})
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(config_directory(), "settings.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            settings = cls()
+            settings.errors.append(f"Could not read {path}: {e}")
+            return settings
+        if not isinstance(overrides, dict):
+            settings = cls()
+            settings.errors.append(f"{path} must contain an object")
+            return settings
+        return cls(overrides)
+
+    def configure(self, overrides):
+        for name, value in overrides.items():
+            if name not in DEFAULT_SETTINGS:
+                self.errors.append(f"Unknown setting {name!r}")
+            elif isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+                self.errors.append(f"Setting {name!r} must be a positive integer, keeping {self.values[name]}")
+            else:
+                self.values[name] = value
+
+    def __getitem__(self, name):
+        return self.values[name]
@@ -1,282 +1,836 @@
-from textual.widgets import Static
+from textual.widget import Widget
 from textual.reactive import reactive
-from rich.console import Console, RenderableType
-from rich.text import Text
-from rich import box
-from rich.panel import Panel
+from textual.geometry import Region
+from textual.strip import Strip
+from rich.markup import escape
+from rich.cells import cell_len
+from rich.segment import Segment
+from rich.style import Style
 from textual import events
-import sys
-import subprocess
-import threading
-import queue
+from functools import partial
+import asyncio
+import codecs
+import re
+import signal
+import time
 import os
-import keyboard
 
-class Terminal(Static):
+from .terminal_backend import shell_command, spawn_shell, encode_key
+from .terminal_screen import Screen
+from .settings import Settings
+from .process_supervisor import ProcessSupervisor
+from .scrollback_search import ScrollbackSearch, export_lines
+from .terminal_search import TerminalSearchBar
+from .keymap import PENDING
+from .refresh_scheduler import refresh_scheduler
+
+
+class TerminalSession:
+    def __init__(self, number, shell, screen):
+        self.number = number
+        self.shell = shell
+        self.name = os.path.splitext(os.path.basename(shell[0]))[0]
+        self.screen = screen
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.process = None
+        self.record = None
+        self.owner = None
+        self.input_buffer = ""
+        self.cursor_position = 0
+        self.history_offset = 0
+        self.lines_scrolled = 0
+        self.pending_output = []
+        self.pending_size = 0
+        self.memory = None
+        self.search = None
+        self.matches = []
+        self.match_spans = {}
+        self.current_match = None
+
+    @property
+    def local_echo(self) -> bool:
+        return self.process is not None and not self.process.echoes_input
+
+    @property
+    def exited(self) -> bool:
+        return self.record is not None and not self.record.alive
+
+    def label(self):
+        label = f"{self.number}:{self.name}"
+        if self.exited:
+            return f"{label} (exit {self.record.returncode})"
+        if self.memory:
+            return f"{label} {self.memory / (1024 * 1024):.0f}M"
+        return label
+
+
+class Terminal(Widget):
     DEFAULT_CSS = """
     Terminal {
         color: #FFFFFF;
         height: 1fr;
+        border: round #555555;
+        border-title-align: center;
+        border-title-color: #FFFFFF;
         padding: 0 1;
     }
     """
-    
+
     BINDINGS = [
         ("ctrl+c", "send_ctrl_c", "Send Ctrl+C"),
     ]
-    
-    def __init__(self, *args, **kwargs):
+
+    KEYMAP_MODE = "terminal"
+
+    is_active: bool = reactive(False, repaint=False)
+
+    CURSOR_STYLE = Style(reverse=True)
+    MATCH_STYLE = Style(color="#0C0C0C", bgcolor="#E5C07B")
+    CURRENT_MATCH_STYLE = Style(color="#0C0C0C", bgcolor="#FF8C00")
+    WHEEL_LINES = 3
+    MAX_PENDING_OUTPUT = 1024 * 1024
+    CLOSE_TIMEOUT = 1.0
+    MEMORY_INTERVAL = 5.0
+
+    def __init__(self, *args, shell=None, supervisor=None, settings=None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.input_buffer = ""
-        self.output_buffer = []
-        self.output_queue = queue.Queue()
-        self.cursor_position = 0
-        self.process = None
+        self.shell = shell or shell_command()
+        self.supervisor = supervisor or ProcessSupervisor()
+        settings = settings or Settings()
+        self.SCROLLBACK_LINES = settings["scrollback_lines"]
+        self.SCROLLBACK_BYTES = settings["scrollback_bytes"]
+        self.sessions = []
+        self.session = None
+        self._next_number = 1
         self.can_focus = True
-        self.terminal_size = (24, 80) 
-        self.visible_lines = 20
         self.prompt = "PS > "
-        self.is_active = False
-        self._updating = False
-    
-    def on_mount(self):
-        self.terminal_size = (self.size.height, self.size.width)
-        self.visible_lines = self.terminal_size[0] - 2
-        self.start_shell()
-        self.set_interval(0.05, self.update_output)
-    
+        self._styles = {}
+        self._strips = {}
+        self._scrollback_strips = {}
+        self._painted_cursor = None
+        self._memory_sampled = None
+        self.search_bar = None
+        self.key_handlers = {
+            "new_session": self.new_session,
+            "close_session": self.close_session,
+            "search": self.open_search,
+            "export_scrollback": self.export_scrollback,
+            "next_session": partial(self.cycle_session, 1),
+            "previous_session": partial(self.cycle_session, -1),
+        }
+
+    @property
+    def screen_model(self):
+        return self.session.screen if self.session else None
+
+    @property
+    def process(self):
+        return self.session.process if self.session else None
+
+    @property
+    def local_echo(self) -> bool:
+        return self.session is not None and self.session.local_echo
+
     def on_resize(self, event):
-        if hasattr(self, "size"):
-            self.terminal_size = (self.size.height, self.size.width)
-            self.visible_lines = self.terminal_size[0] - 2
-    
-    def start_shell(self):
-        self.process = subprocess.Popen(
-            ["powershell.exe", "-NoLogo"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW
+        if not self.sessions:
+            self.new_session()
+            return
+        rows, columns = self.pty_size()
+        for session in self.sessions:
+            session.screen.resize(rows, columns)
+            if session.process:
+                session.process.set_size(rows, columns)
+        self._strips.clear()
+        refresh_scheduler(self).mark_dirty(self)
+
+    def pty_size(self):
+        if not self.size.area:
+            if self.session:
+                return self.session.screen.rows, self.session.screen.columns
+            return 24, 80
+        return self.size.height, self.size.width
+
+    def watch_is_active(self, is_active: bool) -> None:
+        self.styles.border = ("round", "#007FFF" if is_active else "#555555")
+        if self.session:
+            self._refresh_dirty()
+
+    def new_session(self, shell=None):
+        rows, columns = self.pty_size()
+        screen = Screen(rows, columns, self.SCROLLBACK_LINES, self.SCROLLBACK_BYTES)
+        session = TerminalSession(self._next_number, shell or self.shell, screen)
+        self._next_number += 1
+        self.sessions.append(session)
+        self.start_shell(session)
+        self.switch_session(session)
+        return session
+
+    def start_shell(self, session):
+        rows, columns = session.screen.rows, session.screen.columns
+        try:
+            session.process = spawn_shell(session.shell, rows, columns)
+        except OSError as e:
+            session.process = None
+            session.screen.feed(f"[Could not start {session.name}: {e}]\r\n")
+            return
+
+        session.record = self.supervisor.register(f"terminal {session.number}: {session.name}", session.process)
+        session.process.start(
+            asyncio.get_running_loop(),
+            partial(self._on_process_output, session),
+            partial(self._on_process_exit, session),
         )
-        
-        threading.Thread(target=self._read_output, args=(self.process.stdout,), daemon=True).start()
-        threading.Thread(target=self._read_output, args=(self.process.stderr,), daemon=True).start()
-        self.output_buffer.append(f"{self.prompt}")
-    
-    def _read_output(self, pipe):
-        while self.process and self.process.poll() is None:
-            try:
-                line = pipe.readline()
-                if not line:
-                    char = pipe.read(1)
-                    if not char:
-                        break
-                    self.output_queue.put(char)
-                else:
-                    self.output_queue.put(line)
-            except (OSError, ValueError):
-                break
-    
+        if session.local_echo:
+            session.screen.feed(self.prompt)
+
+    def adopt_session(self, session):
+        session.owner = self
+        session.number = self._next_number
+        self._next_number += 1
+        self.sessions.append(session)
+        rows, columns = self.pty_size()
+        session.screen.resize(rows, columns)
+        if session.process:
+            session.process.set_size(rows, columns)
+        self.switch_session(session)
+
+    def switch_session(self, session):
+        if self.search_bar is not None:
+            self.close_search()
+        self.session = session
+        self._strips.clear()
+        self._scrollback_strips.clear()
+        self._painted_cursor = None
+        self.update_memory(force=True)
+        session.screen.mark_all_dirty()
+        self._refresh_dirty()
+
+    def cycle_session(self, step):
+        if len(self.sessions) < 2:
+            return
+        index = self.sessions.index(self.session)
+        self.switch_session(self.sessions[(index + step) % len(self.sessions)])
+
+    def close_session(self, session=None):
+        session = session or self.session
+        if session is None:
+            return
+
+        if session.record is not None and session.record.alive:
+            self.supervisor.terminate(session.record)
+            self.set_timer(self.CLOSE_TIMEOUT, partial(self._finish_close, session))
+        else:
+            self._finish_close(session)
+
+        index = self.sessions.index(session)
+        self.sessions.remove(session)
+        if not self.sessions:
+            self.new_session()
+        elif session is self.session:
+            self.switch_session(self.sessions[min(index, len(self.sessions) - 1)])
+        else:
+            self._update_title()
+
+    def _finish_close(self, session):
+        if session.record is not None:
+            self.supervisor.shutdown([session.record], timeout=0)
+            self.supervisor.forget(session.record)
+        if session.process:
+            session.process.close()
+
+    def update_memory(self, force=False):
+        now = time.monotonic()
+        if not force and self._memory_sampled is not None and now - self._memory_sampled < self.MEMORY_INTERVAL:
+            return
+        if not self.display or self.app.screen is not self.screen:
+            return
+        records = [session.record for session in self.sessions if session.record and session.record.alive]
+        if records:
+            self._memory_sampled = now
+            self.run_worker(partial(self._memory_worker, records), thread=True, group="memory", exclusive=True)
+
+    def _memory_worker(self, records):
+        usage = self.supervisor.memory_usage(records)
+        self.app.call_from_thread(self._apply_memory, usage)
+
+    def _apply_memory(self, usage):
+        for session in self.sessions:
+            if session.record in usage:
+                session.memory = usage[session.record]
+        if self.session:
+            self._update_title()
+
+    def _on_process_output(self, session, data):
+        session.pending_output.append(session.decoder.decode(data))
+        session.pending_size += len(data)
+        if session.pending_size >= self.MAX_PENDING_OUTPUT:
+            session.process.pause_reading()
+        self._schedule_flush()
+
+    def _on_process_exit(self, session, returncode):
+        if session.record is not None:
+            self.supervisor.mark_exited(session.record, returncode)
+        session.pending_output.append(session.decoder.decode(b"", final=True))
+        session.pending_output.append(f"\r\n[Process exited with code {returncode}]\r\n")
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        refresh_scheduler(self).schedule(self.update_output)
+
     def update_output(self):
-        updated = False
-        while not self.output_queue.empty():
-            try:
-                data = self.output_queue.get_nowait()
-                if isinstance(data, bytes):
-                    try:
-                        text = data.decode('utf-8', errors='replace')
-                    except UnicodeDecodeError:
-                        text = data.decode('latin-1')
-                    self.output_buffer.append(text)
-                else:
-                    self.output_buffer.append(data)
-                updated = True
-            except queue.Empty:
-                break
-        
-        if len(self.output_buffer) > 5000:
-            self.output_buffer = self.output_buffer[-5000:]
-        
-        if updated:
-            self.renderable = self.render()
-            self.refresh(layout=True)
-    
-    def render(self) -> RenderableType:
-        if not hasattr(self, "output_buffer") or self.output_buffer is None:
-            return Panel(
-                "",
-                title="PowerShell",
-                border_style="#555555",
-                box=box.ROUNDED
+        for session in self.sessions:
+            if session.pending_output:
+                self._flush_session(session)
+        self.update_memory()
+
+    def _flush_session(self, session):
+        screen = session.screen
+        data = "".join(session.pending_output)
+        session.pending_output.clear()
+        if session.pending_size >= self.MAX_PENDING_OUTPUT and session.process:
+            session.process.resume_reading()
+        session.pending_size = 0
+        if session.local_echo:
+            data = data.replace("\r\n", "\n").replace("\n", "\r\n")
+        screen.feed(data)
+
+        if screen.responses:
+            responses = "".join(screen.responses)
+            screen.responses.clear()
+            self.write_to_terminal(responses, session)
+
+        scrolled = screen.lines_scrolled - session.lines_scrolled
+        session.lines_scrolled = screen.lines_scrolled
+        if session.history_offset and scrolled:
+            session.history_offset = min(session.history_offset + scrolled, len(screen.scrollback))
+
+        if session is self.session:
+            self._refresh_dirty()
+        elif session.exited:
+            self._update_title()
+
+    def _cursor_cell(self):
+        session = self.session
+        screen = session.screen
+        if session.history_offset or not (self.has_focus and self.is_active and screen.cursor_visible):
+            return None
+        x = min(screen.x, screen.columns - 1)
+        if session.local_echo:
+            x = min(screen.x + session.cursor_position, screen.columns - 1)
+        return (x, screen.y)
+
+    def _update_title(self):
+        session = self.session
+        if len(self.sessions) > 1:
+            title = "".join(
+                f"[reverse] {escape(other.label())} [/reverse]" if other is session else f" {escape(other.label())} "
+                for other in self.sessions
             )
-            
-        content = "".join(self.output_buffer)
-        content_lines = content.split("\n")
-        visible_content_lines = content_lines[-self.visible_lines:] if content_lines else []
-        visible_content = "\n".join(visible_content_lines)
-        
-        if self.has_focus and self.is_active:
-            cursor = "█"
-            input_line = (
-                self.input_buffer[:self.cursor_position] + 
-                cursor + 
-                self.input_buffer[self.cursor_position:]
+        else:
+            title = escape(session.screen.title or session.label())
+        if session.history_offset:
+            title = f"{title} \\[-{session.history_offset}]"
+        if self.border_title != title:
+            self.border_title = title
+
+    def _refresh_dirty(self):
+        screen = self.session.screen
+        dirty = screen.take_dirty()
+        cursor = self._cursor_cell()
+        if cursor != self._painted_cursor:
+            if self._painted_cursor is not None:
+                dirty.add(self._painted_cursor[1])
+            if cursor is not None:
+                dirty.add(cursor[1])
+            self._painted_cursor = cursor
+
+        self._update_title()
+
+        if not dirty:
+            return
+        for row in dirty:
+            self._strips.pop(row, None)
+        if self.session.history_offset or len(dirty) >= screen.rows:
+            refresh_scheduler(self).mark_dirty(self)
+        else:
+            width = self.size.width
+            refresh_scheduler(self).mark_dirty(self, *[Region(0, row, width, 1) for row in dirty if row < screen.rows])
+
+    def _style(self, attrs):
+        style = self._styles.get(attrs)
+        if style is None:
+            style = self.rich_style + Style(
+                color=attrs.fg,
+                bgcolor=attrs.bg,
+                bold=attrs.bold or None,
+                dim=attrs.dim or None,
+                italic=attrs.italic or None,
+                underline=attrs.underline or None,
+                blink=attrs.blink or None,
+                reverse=attrs.reverse or None,
+                strike=attrs.strike or None,
             )
-            
-            if not visible_content.endswith(self.prompt):
-                visible_content += self.prompt
-                
-            if visible_content.endswith(self.prompt):
-                visible_content = visible_content[:-len(self.prompt)] + self.prompt + input_line
-        
-        terminal_content = Text(visible_content)
-        
-        border_style = "#007FFF" if self.is_active else "#555555"
-        
-        return Panel(
-            terminal_content,
-            title="PowerShell",
-            border_style=border_style,
-            box=box.ROUNDED
-        )
-    
+            self._styles[attrs] = style
+        return style
+
+    def _scrollback_strip(self, index):
+        screen = self.session.screen
+        key = screen.scrollback.first_index + index
+        strip = self._scrollback_strips.get(key)
+        if strip is None:
+            if len(self._scrollback_strips) > 4 * screen.rows:
+                self._scrollback_strips.clear()
+            line = screen.scrollback[index]
+            strip = Strip([Segment(text, self._style(attrs)) for text, attrs in line.runs if text])
+            self._scrollback_strips[key] = strip
+        return strip
+
+    def scroll_history(self, lines):
+        session = self.session
+        if session is None:
+            return
+        offset = max(0, min(session.history_offset + lines, len(session.screen.scrollback)))
+        if offset == session.history_offset:
+            return
+        session.history_offset = offset
+        session.lines_scrolled = session.screen.lines_scrolled
+        session.screen.mark_all_dirty()
+        self._refresh_dirty()
+
+    def _line_strip(self, row):
+        strip = self._strips.get(row)
+        if strip is None:
+            line = self.session.screen.lines[row]
+            strip = Strip([Segment(text, self._style(attrs)) for text, attrs in line.runs() if text])
+            self._strips[row] = strip
+        return strip
+
+    def render_line(self, y):
+        width = self.size.width
+        session = self.session
+        if session is None or y >= session.screen.rows:
+            return Strip.blank(width, self.rich_style)
+        screen = session.screen
+
+        if session.history_offset:
+            scrollback_rows = len(screen.scrollback)
+            index = scrollback_rows - session.history_offset + y
+            if index < scrollback_rows:
+                strip = self._scrollback_strip(index)
+                line = screen.scrollback.first_index + index
+                if line in session.match_spans:
+                    strip = self._highlight_matches(strip, line, screen.scrollback[index].text)
+                return strip.crop_extend(0, width, self.rich_style)
+            y = index - scrollback_rows
+
+        strip = self._line_strip(y)
+        line = screen.scrollback.first_index + len(screen.scrollback) + y
+        if line in session.match_spans:
+            strip = self._highlight_matches(strip, line, screen.lines[y].freeze().text)
+        if session.local_echo and y == screen.y and (session.input_buffer or self.has_focus):
+            x = min(screen.x, screen.columns)
+            strip = Strip.join([strip.crop(0, x), Strip([Segment(session.input_buffer, self.rich_style)])])
+
+        cursor = self._cursor_cell()
+        if cursor is not None and cursor[1] == y:
+            x = cursor[0]
+            strip = strip.extend_cell_length(x + 1, self.rich_style)
+            before, at, after = strip.divide([x, x + 1, strip.cell_length])
+            strip = Strip.join([before, at.apply_style(self.CURSOR_STYLE), after])
+        return strip.crop_extend(0, width, self.rich_style)
+
+    def _highlight_matches(self, strip, line, text):
+        session = self.session
+        current = session.matches[session.current_match] if session.current_match is not None else None
+        for match in session.match_spans[line]:
+            start = cell_len(text[:match.start])
+            end = start + cell_len(text[match.start:match.end])
+            style = self.CURRENT_MATCH_STYLE if match == current else self.MATCH_STYLE
+            strip = strip.extend_cell_length(end, self.rich_style)
+            before, inside, after = strip.divide([start, end, strip.cell_length])
+            strip = Strip.join([before, Strip(Segment.apply_style(inside, post_style=style)), after])
+        return strip
+
+    def snapshot_lines(self, session):
+        scrollback = session.screen.scrollback
+        lines = scrollback.slice(0, len(scrollback))
+        lines.extend(line.freeze() for line in session.screen.lines)
+        return lines, scrollback.first_index
+
+    def open_search(self):
+        if self.search_bar is None:
+            self.search_bar = TerminalSearchBar(self)
+            self.parent.mount(self.search_bar, after=self)
+        else:
+            self.search_bar.focus_input()
+
+    def close_search(self):
+        if self.session:
+            self.clear_search(self.session)
+        if self.search_bar is not None:
+            self.search_bar.remove()
+            self.search_bar = None
+        self.focus()
+
+    def clear_search(self, session):
+        if session.search is not None:
+            session.search.cancel()
+        session.search = None
+        session.matches = []
+        session.match_spans = {}
+        session.current_match = None
+        if session is self.session:
+            refresh_scheduler(self).mark_dirty(self)
+
+    def set_search_status(self, status):
+        if self.search_bar is not None:
+            self.search_bar.set_status(status)
+
+    def start_search(self, query, regex=False):
+        session = self.session
+        self.clear_search(session)
+        if not query:
+            self.set_search_status("")
+            return
+
+        lines, first_line = self.snapshot_lines(session)
+        try:
+            search = ScrollbackSearch(lines, first_line, query, regex=regex)
+        except re.error as e:
+            self.set_search_status(f"Invalid pattern: {e}")
+            return
+        session.search = search
+        self.set_search_status("Searching...")
+        self.run_worker(partial(self._search_worker, session, search), thread=True, group="scrollback-search")
+
+    def _search_worker(self, session, search):
+        def deliver(matches):
+            try:
+                self.app.call_from_thread(self.add_search_matches, session, search, matches)
+            except RuntimeError:
+                search.cancel()
+
+        search.run(deliver)
+        try:
+            self.app.call_from_thread(self.finish_search, session, search)
+        except RuntimeError:
+            pass
+
+    def add_search_matches(self, session, search, matches):
+        if search is not session.search:
+            return
+        session.matches.extend(matches)
+        for match in matches:
+            session.match_spans.setdefault(match.line, []).append(match)
+        self._schedule_search_render()
+
+    def finish_search(self, session, search):
+        if search is not session.search or session is not self.session:
+            return
+        if session.matches and session.current_match is None:
+            self.select_match(-1)
+        else:
+            self._render_search()
+
+    def search_status(self, session):
+        search = session.search
+        if search is None:
+            return ""
+        if not session.matches:
+            return "No matches" if search.complete or search.truncated else "Searching..."
+        position = "-" if session.current_match is None else session.current_match + 1
+        status = f"{position}/{len(session.matches)}"
+        if search.truncated:
+            return f"{status}+"
+        if not search.complete:
+            return f"{status} ({search.lines_searched * 100 // max(1, len(search.lines))}%)"
+        return status
+
+    def _schedule_search_render(self):
+        refresh_scheduler(self).schedule(self._render_search)
+
+    def _render_search(self):
+        if self.session:
+            self.set_search_status(self.search_status(self.session))
+        refresh_scheduler(self).mark_dirty(self)
+
+    def select_match(self, step):
+        session = self.session
+        if not session or not session.matches:
+            return
+        count = len(session.matches)
+        first_line = session.screen.scrollback.first_index
+        index = session.current_match
+        if index is None:
+            index = count if step < 0 else -1
+        for _ in range(count):
+            index = (index + step) % count
+            if session.matches[index].line >= first_line:
+                break
+        else:
+            session.current_match = None
+            self._render_search()
+            return
+
+        session.current_match = index
+        self.reveal_line(session.matches[index].line)
+        self._render_search()
+
+    def reveal_line(self, line):
+        session = self.session
+        screen = session.screen
+        scrollback_rows = len(screen.scrollback)
+        index = line - screen.scrollback.first_index
+        offset = max(0, min(scrollback_rows - index + screen.rows // 2, scrollback_rows))
+        self.scroll_history(offset - session.history_offset)
+
+    def export_scrollback(self):
+        session = self.session
+        lines, _ = self.snapshot_lines(session)
+        while lines and not lines[-1].text:
+            lines.pop()
+        path = os.path.join(os.getcwd(), f"terminal-{session.number}-{time.strftime('%Y%m%d-%H%M%S')}.log")
+        self.run_worker(partial(self._export_worker, lines, path), thread=True, group="scrollback-export")
+
+    def _export_worker(self, lines, path):
+        try:
+            count = export_lines(lines, path)
+        except OSError as e:
+            self.app.call_from_thread(self.app.notify, f"Error exporting terminal output: {str(e)}", severity="error")
+            return
+        self.app.call_from_thread(self.app.notify, f"Saved {count} lines to {path}")
+
     def action_send_ctrl_c(self):
         if not self.is_active:
             return
-            
-        if self.process and self.process.poll() is None:
+
+        process = self.process
+        if process and process.poll() is None:
+            if not self.local_echo:
+                self.write_to_terminal("\x03")
+                return
             try:
-                self.process.send_signal(subprocess.signal.CTRL_C_EVENT)
-            except:
+                process.send_signal(signal.CTRL_C_EVENT)
+            except (AttributeError, OSError, ValueError):
                 self.write_to_terminal("\x03")
-    
-    def write_to_terminal(self, data):
-        if not self.process or self.process.poll() is not None:
+
+    def write_to_terminal(self, data, session=None):
+        session = session or self.session
+        if not session or not session.process or session.process.poll() is not None:
             return
-        
+
         try:
-            self.process.stdin.write(data)
-            self.process.stdin.flush()
-        except (BrokenPipeError, IOError):
-            self.output_buffer.append("[Process terminated]\n")
-    
+            session.process.write(data.encode("utf-8"))
+        except (BrokenPipeError, OSError):
+            session.screen.feed("\r\n[Process terminated]\r\n")
+            if session is self.session:
+                self._refresh_dirty()
+
+    def on_paste(self, event: events.Paste):
+        if not self.is_active or not self.session or self.local_echo:
+            return
+        event.stop()
+        text = event.text.replace("\r\n", "\r").replace("\n", "\r")
+        if self.screen_model.bracketed_paste:
+            text = f"\x1b[200~{text}\x1b[201~"
+        self.write_to_terminal(text)
+
+    def keymap_action(self, event):
+        if not hasattr(self.app, "keymap"):
+            return None
+        return self.app.keymap.dispatch(self.KEYMAP_MODE, event, self.key_handlers)
+
     def on_key(self, event: events.Key):
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("q"):
+        if not self.has_focus or not self.is_active or not self.session:
             return
-        
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("2"):
+
+        action = self.keymap_action(event)
+        if action is not None and action != PENDING and action not in self.key_handlers:
+            return
+
+        event.prevent_default()
+        event.stop()
+
+        if action is not None:
             return
-            
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("3"):
+
+        session = self.session
+        screen = session.screen
+        if event.key == "shift+pageup":
+            self.scroll_history(screen.rows - 1)
             return
-            
-        if keyboard.is_pressed("ctrl") and keyboard.is_pressed("5"):
+        if event.key == "shift+pagedown":
+            self.scroll_history(-(screen.rows - 1))
             return
-        
-        if not self.has_focus or not self.is_active:
+        if session.history_offset:
+            self.scroll_history(-session.history_offset)
+
+        if not session.local_echo:
+            data = encode_key(event.key, event.character, screen.application_cursor)
+            if data:
+                self.write_to_terminal(data)
             return
-        
-        event.prevent_default()
-        event.stop()
-        
+
         if event.key == "escape":
             return
-        
+
         if event.key == "enter":
-            command = self.input_buffer + "\n"
-            
-            if self.output_buffer and self.output_buffer[-1].endswith(self.prompt):
-                self.output_buffer[-1] = self.output_buffer[-1][:-len(self.prompt)]
-            
-            self.output_buffer.append(f"{self.prompt}{self.input_buffer}\n")
-            
-            self.input_buffer = ""
-            self.cursor_position = 0
-            
+            command = session.input_buffer + "\n"
+            screen.feed(session.input_buffer + "\r\n")
+
+            session.input_buffer = ""
+            session.cursor_position = 0
+
             self.write_to_terminal(command)
-            
-            self.output_buffer.append(f"{self.prompt}")
-            
-            self.renderable = self.render()
-            self.refresh(layout=True)
-            
+
+            screen.feed(self.prompt)
+
         elif event.key == "backspace":
-            if self.cursor_position > 0:
-                self.input_buffer = (
-                    self.input_buffer[:self.cursor_position - 1] + 
-                    self.input_buffer[self.cursor_position:]
+            if session.cursor_position > 0:
+                session.input_buffer = (
+                    session.input_buffer[:session.cursor_position - 1] +
+                    session.input_buffer[session.cursor_position:]
                 )
-                self.cursor_position -= 1
-                self.renderable = self.render()
-                self.refresh(layout=True)
-                
+                session.cursor_position -= 1
+
         elif event.key == "delete":
-            if self.cursor_position < len(self.input_buffer):
-                self.input_buffer = (
-                    self.input_buffer[:self.cursor_position] + 
-                    self.input_buffer[self.cursor_position + 1:]
+            if session.cursor_position < len(session.input_buffer):
+                session.input_buffer = (
+                    session.input_buffer[:session.cursor_position] +
+                    session.input_buffer[session.cursor_position + 1:]
                 )
-                self.renderable = self.render()
-                self.refresh(layout=True)
-                
+
         elif event.key == "left":
-            if self.cursor_position > 0:
-                self.cursor_position -= 1
-                self.renderable = self.render()
-                self.refresh(layout=True)
-                
+            if session.cursor_position > 0:
+                session.cursor_position -= 1
+
         elif event.key == "right":
-            if self.cursor_position < len(self.input_buffer):
-                self.cursor_position += 1
-                self.renderable = self.render()
-                self.refresh(layout=True)
-                
+            if session.cursor_position < len(session.input_buffer):
+                session.cursor_position += 1
+
         elif event.key == "home":
-            self.cursor_position = 0
-            self.renderable = self.render()
-            self.refresh(layout=True)
-            
+            session.cursor_position = 0
+
         elif event.key == "end":
-            self.cursor_position = len(self.input_buffer)
-            self.renderable = self.render()
-            self.refresh(layout=True)
-            
+            session.cursor_position = len(session.input_buffer)
+
         elif event.key == "tab":
             self.write_to_terminal("\t")
-            self.renderable = self.render()
-            self.refresh(layout=True)
-            
+
         elif event.key == "ctrl+l":
-            self.output_buffer = [f"{self.prompt}"]
-            self.renderable = self.render()
-            self.refresh(layout=True)
-            
+            screen.reset()
+            screen.feed(self.prompt)
+
         elif event.is_printable:
-            self.input_buffer = (
-                self.input_buffer[:self.cursor_position] + 
-                event.character + 
-                self.input_buffer[self.cursor_position:]
+            session.input_buffer = (
+                session.input_buffer[:session.cursor_position] +
+                event.character +
+                session.input_buffer[session.cursor_position:]
             )
-            self.cursor_position += 1
-            self.renderable = self.render()
-            self.refresh(layout=True)
-    
+            session.cursor_position += 1
+
+        screen.dirty.add(screen.y)
+        self._refresh_dirty()
+
+    def on_mouse_scroll_up(self, event: events.MouseScrollUp):
+        event.stop()
+        self.scroll_history(self.WHEEL_LINES)
+
+    def on_mouse_scroll_down(self, event: events.MouseScrollDown):
+        event.stop()
+        self.scroll_history(-self.WHEEL_LINES)
+
     def on_focus(self) -> None:
-        self.renderable = self.render()
-        self.refresh(layout=True)
-    
+        if self.session:
+            self._refresh_dirty()
+            self.update_memory()
+
     def on_blur(self) -> None:
-        self.renderable = self.render()
-        self.refresh(layout=True)
-        
+        if self.session:
+            self._refresh_dirty()
+
     def on_unmount(self) -> None:
-        if self.process and self.process.poll() is None:
-            self.process.terminate()
-            try:
-                self.process.wait(timeout=1)
-            except subprocess.TimeoutExpired:
-                self.process.kill()
-                
-    def refresh(self, **kwargs):
-        super().refresh(**kwargs)
+        for session in self.sessions:
+            if session.search is not None:
+                session.search.cancel()
+        self.supervisor.shutdown([session.record for session in self.sessions if session.record])
+        for session in self.sessions:
+            if session.process:
+                session.process.close()
+
+
+class EmbeddedTerminal(Terminal):
+    DEFAULT_CSS = """
+    EmbeddedTerminal {
+        height: 1fr;
+        border: round #007FFF;
+        padding: 0;
+    }
+    """
+
+    is_active: bool = reactive(True, repaint=False)
+
+    KEYMAP_MODE = "tool"
+    RESTART_MIN_RUNTIME = 5.0
+
+    def __init__(self, command, toggle_action, *args, acquire=None, **kwargs):
+        super().__init__(*args, shell=command, **kwargs)
+        self.key_handlers = {toggle_action: self.leave}
+        self.acquire = acquire
+        self._acquiring = False
+
+    def new_session(self, shell=None):
+        if self.acquire is None:
+            return super().new_session(shell)
+        if not self._acquiring:
+            self._acquiring = True
+            self.run_worker(self._adopt_tool_session(), group="tool-session")
+
+    async def _adopt_tool_session(self):
+        try:
+            session = await self.acquire()
+        except OSError:
+            self.leave()
+            return
+        finally:
+            self._acquiring = False
+        self.adopt_session(session)
+
+    def watch_is_active(self, is_active: bool) -> None:
+        if self.session:
+            self._refresh_dirty()
+
+    def restart(self):
+        self.close_session()
+
+    def leave(self):
+        if self.app.screen is self.screen:
+            self.app.pop_screen()
+
+    def _on_process_exit(self, session, returncode):
+        super()._on_process_exit(session, returncode)
+        if session is self.session:
+            self.leave()
+            if session.record is not None and session.record.runtime >= self.RESTART_MIN_RUNTIME:
+                self.restart()
+
+    def _update_title(self):
+        session = self.session
+        title = escape(session.screen.title or session.label())
+        if self.border_title != title:
+            self.border_title = title
+
+    def on_key(self, event: events.Key):
+        if not self.has_focus or not self.session:
+            return
+
+        event.prevent_default()
+        event.stop()
+
+        action = self.keymap_action(event)
+        if action == PENDING or action in self.key_handlers:
+            return
+
+        data = encode_key(event.key, event.character, self.session.screen.application_cursor)
+        if data:
+            self.write_to_terminal(data)
@@ -0,0 +1,434 @@
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+if os.name == "nt":
+    try:
+        from winpty import PtyProcess as WinPty
+    except ImportError:
+        WinPty = None
+else:
+    WinPty = None
+
+READ_CHUNK = 64 * 1024
+
+SHELL_COMMANDS = {
+    "win32": ["powershell.exe", "-NoLogo"],
+    "darwin": None,
+    "linux": None,
+}
+
+KEY_SEQUENCES = {
+    "enter": "\r",
+    "tab": "\t",
+    "shift+tab": "\x1b[Z",
+    "backspace": "\x7f",
+    "escape": "\x1b",
+    "delete": "\x1b[3~",
+    "insert": "\x1b[2~",
+    "up": "\x1b[A",
+    "down": "\x1b[B",
+    "right": "\x1b[C",
+    "left": "\x1b[D",
+    "home": "\x1b[H",
+    "end": "\x1b[F",
+    "pageup": "\x1b[5~",
+    "pagedown": "\x1b[6~",
+    "ctrl+left": "\x1b[1;5D",
+    "ctrl+right": "\x1b[1;5C",
+    "f1": "\x1bOP",
+    "f2": "\x1bOQ",
+    "f3": "\x1bOR",
+    "f4": "\x1bOS",
+    "f5": "\x1b[15~",
+    "f6": "\x1b[17~",
+    "f7": "\x1b[18~",
+    "f8": "\x1b[19~",
+    "f9": "\x1b[20~",
+    "f10": "\x1b[21~",
+    "f11": "\x1b[23~",
+    "f12": "\x1b[24~",
+}
+
+
+def shell_command(platform=None, environ=None):
+    environ = os.environ if environ is None else environ
+    override = environ.get("LAZYEDIT_SHELL")
+    if override:
+        return shlex.split(override, posix=not (platform or sys.platform).startswith("win"))
+
+    platform = platform or sys.platform
+    for prefix, command in SHELL_COMMANDS.items():
+        if platform.startswith(prefix) and command:
+            return list(command)
+    if platform.startswith("win"):
+        return [environ.get("COMSPEC", "cmd.exe")]
+    return [environ.get("SHELL") or "/bin/sh"]
+
+
+APPLICATION_CURSOR_KEYS = {
+    "up": "\x1bOA",
+    "down": "\x1bOB",
+    "right": "\x1bOC",
+    "left": "\x1bOD",
+    "home": "\x1bOH",
+    "end": "\x1bOF",
+}
+
+
+def encode_key(key, character=None, application_cursor=False):
+    if application_cursor and key in APPLICATION_CURSOR_KEYS:
+        return APPLICATION_CURSOR_KEYS[key]
+    if key in KEY_SEQUENCES:
+        return KEY_SEQUENCES[key]
+    if key.startswith("ctrl+") and len(key) == 6 and key[5].isalpha():
+        return chr(ord(key[5]) - ord("a") + 1)
+    if character and character.isprintable():
+        return character
+    return None
+
+
+def _exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return None
+
+
+class PtyProcess:
+    echoes_input = True
+
+    def __init__(self, argv, rows=24, cols=80, cwd=None, env=None):
+        import pty
+
+        env = dict(os.environ if env is None else env)
+        env.setdefault("TERM", "xterm-256color")
+        env["LINES"] = str(rows)
+        env["COLUMNS"] = str(cols)
+
+        pid, fd = pty.fork()
+        if pid == 0:
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                os.execvpe(argv[0], argv, env)
+            finally:
+                os._exit(127)
+
+        self.argv = argv
+        self.pid = pid
+        self.fd = fd
+        self.returncode = None
+        self._loop = None
+        self._on_data = None
+        self._on_exit = None
+        self._pending = bytearray()
+        self._reading = False
+        os.set_blocking(fd, False)
+        self.set_size(rows, cols)
+
+    def start(self, loop, on_data, on_exit):
+        self._loop = loop
+        self._on_data = on_data
+        self._on_exit = on_exit
+        self.resume_reading()
+
+    def pause_reading(self):
+        if self._reading and self.fd is not None:
+            self._loop.remove_reader(self.fd)
+            self._reading = False
+
+    def resume_reading(self):
+        if not self._reading and self.fd is not None and self.returncode is None:
+            self._loop.add_reader(self.fd, self._on_readable)
+            self._reading = True
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.fd, READ_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if data:
+            self._on_data(data)
+            return
+
+        self._detach()
+        self._report_exit()
+
+    def _report_exit(self):
+        if self.fd is None:
+            return
+        if self.poll() is None:
+            self._loop.call_later(0.05, self._report_exit)
+            return
+        if self._on_exit is not None:
+            self._on_exit(self.returncode)
+
+    def _detach(self):
+        if self._loop is not None and self.fd is not None:
+            self._loop.remove_reader(self.fd)
+            self._loop.remove_writer(self.fd)
+            self._reading = False
+
+    def write(self, data: bytes):
+        if self.fd is None:
+            raise BrokenPipeError("terminal closed")
+        self._pending.extend(data)
+        self._flush()
+
+    def _flush(self):
+        while self._pending:
+            try:
+                written = os.write(self.fd, self._pending)
+            except BlockingIOError:
+                if self._loop is not None:
+                    self._loop.add_writer(self.fd, self._flush)
+                return
+            except OSError:
+                self._pending.clear()
+                break
+            del self._pending[:written]
+        if self._loop is not None and self.fd is not None:
+            self._loop.remove_writer(self.fd)
+
+    def set_size(self, rows, cols):
+        import fcntl
+        import struct
+        import termios
+
+        if self.fd is None or rows <= 0 or cols <= 0:
+            return
+        try:
+            fcntl.ioctl(self.fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+        except OSError:
+            pass
+
+    def poll(self):
+        if self.returncode is None:
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                self.returncode = -1
+                return self.returncode
+            if pid:
+                self.returncode = _exit_code(status)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.01)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGHUP)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def close(self):
+        self._detach()
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+
+class PipeProcess:
+    echoes_input = False
+
+    def __init__(self, argv, rows=24, cols=80, cwd=None, env=None):
+        self.argv = argv
+        self.process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=cwd,
+            env=env,
+            bufsize=0,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self.pid = self.process.pid
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    def start(self, loop, on_data, on_exit):
+        threading.Thread(target=self._read_output, args=(loop, on_data, on_exit), daemon=True).start()
+
+    def _read_output(self, loop, on_data, on_exit):
+        stdout = self.process.stdout
+        while True:
+            try:
+                data = stdout.read(READ_CHUNK)
+            except (OSError, ValueError):
+                break
+            if not data:
+                break
+            try:
+                loop.call_soon_threadsafe(on_data, data)
+            except RuntimeError:
+                return
+        returncode = self.process.wait()
+        try:
+            loop.call_soon_threadsafe(on_exit, returncode)
+        except RuntimeError:
+            pass
+
+    def pause_reading(self):
+        pass
+
+    def resume_reading(self):
+        pass
+
+    def write(self, data: bytes):
+        self.process.stdin.write(data)
+
+    def set_size(self, rows, cols):
+        pass
+
+    def poll(self):
+        return self.process.poll()
+
+    def wait(self, timeout=None):
+        try:
+            return self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+
+    def send_signal(self, sig):
+        if self.process.poll() is None:
+            self.process.send_signal(sig)
+
+    def terminate(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+
+    def close(self):
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class ConPtyProcess:
+    echoes_input = True
+
+    def __init__(self, argv, rows=24, cols=80, cwd=None, env=None):
+        env = dict(os.environ if env is None else env)
+        env.setdefault("TERM", "xterm-256color")
+        self.argv = argv
+        try:
+            self.process = WinPty.spawn(list(argv), cwd=cwd, env=env, dimensions=(rows, cols))
+        except Exception as e:
+            raise OSError(f"could not start {argv[0]}: {e}") from e
+        self.pid = self.process.pid
+        self.returncode = None
+
+    def start(self, loop, on_data, on_exit):
+        threading.Thread(target=self._read_output, args=(loop, on_data, on_exit), daemon=True).start()
+
+    def _read_output(self, loop, on_data, on_exit):
+        while True:
+            try:
+                data = self.process.read(READ_CHUNK)
+            except (EOFError, OSError):
+                break
+            if not data:
+                if not self.process.isalive():
+                    break
+                continue
+            try:
+                loop.call_soon_threadsafe(on_data, data.encode("utf-8"))
+            except RuntimeError:
+                return
+        returncode = self.wait()
+        try:
+            loop.call_soon_threadsafe(on_exit, returncode)
+        except RuntimeError:
+            pass
+
+    def pause_reading(self):
+        pass
+
+    def resume_reading(self):
+        pass
+
+    def write(self, data: bytes):
+        if self.poll() is not None:
+            raise BrokenPipeError("terminal closed")
+        self.process.write(data.decode("utf-8", errors="replace"))
+
+    def set_size(self, rows, cols):
+        if rows > 0 and cols > 0 and self.poll() is None:
+            try:
+                self.process.setwinsize(rows, cols)
+            except Exception:
+                pass
+
+    def poll(self):
+        if self.returncode is None and not self.process.isalive():
+            self.returncode = self.process.exitstatus if self.process.exitstatus is not None else -1
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.01)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if sig == signal.SIGINT:
+            self.write(b"\x03")
+        else:
+            self.terminate()
+
+    def terminate(self):
+        if self.poll() is None:
+            self.process.terminate(force=True)
+
+    def kill(self):
+        self.terminate()
+
+    def close(self):
+        try:
+            self.process.close(force=True)
+        except Exception:
+            pass
+
+
+def spawn_shell(argv, rows=24, cols=80, cwd=None, env=None, console=False):
+    if os.name == "nt":
+        if WinPty is not None:
+            return ConPtyProcess(argv, rows, cols, cwd, env)
+        if console:
+            raise OSError(f"{argv[0]} needs a console, install pywinpty to run it inside LazyEdit")
+        return PipeProcess(argv, rows, cols, cwd, env)
+    return PtyProcess(argv, rows, cols, cwd, env)
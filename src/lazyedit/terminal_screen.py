@@ -0,0 +1,684 @@
+from typing import NamedTuple, Optional
+import re
+
+from rich.cells import get_character_cell_size
+
+from .scrollback import ScrollbackBuffer, DEFAULT_SCROLLBACK_LINES, DEFAULT_SCROLLBACK_BYTES
+
+TAB_WIDTH = 8
+
+GROUND = 0
+ESCAPE = 1
+CSI = 2
+OSC = 3
+CHARSET = 4
+DCS = 5
+
+CONTROL = re.compile(r"[\x00-\x1f\x7f]")
+
+
+class Attrs(NamedTuple):
+    fg: Optional[str] = None
+    bg: Optional[str] = None
+    bold: bool = False
+    dim: bool = False
+    italic: bool = False
+    underline: bool = False
+    blink: bool = False
+    reverse: bool = False
+    strike: bool = False
+
+
+DEFAULT_ATTRS = Attrs()
+
+
+class FrozenLine(NamedTuple):
+    text: str
+    runs: tuple
+    wrapped: bool = False
+
+
+class ScreenLine:
+    __slots__ = ("chars", "attrs", "wrapped")
+
+    def __init__(self, columns, attrs=DEFAULT_ATTRS):
+        self.chars = [" "] * columns
+        self.attrs = [attrs] * columns
+        self.wrapped = False
+
+    @property
+    def text(self):
+        return "".join(self.chars)
+
+    def resize(self, columns):
+        width = len(self.chars)
+        if columns < width:
+            del self.chars[columns:]
+            del self.attrs[columns:]
+        elif columns > width:
+            self.chars.extend([" "] * (columns - width))
+            self.attrs.extend([DEFAULT_ATTRS] * (columns - width))
+
+    def runs(self):
+        chars = self.chars
+        attrs = self.attrs
+        current = attrs[0]
+        if attrs.count(current) == len(attrs):
+            return [("".join(chars), current)]
+
+        runs = []
+        start = 0
+        for index, value in enumerate(attrs):
+            if value is not current and value != current:
+                runs.append(("".join(chars[start:index]), current))
+                start = index
+                current = value
+        runs.append(("".join(chars[start:]), current))
+        return runs
+
+    def freeze(self):
+        attrs = self.attrs
+        if attrs.count(DEFAULT_ATTRS) == len(attrs):
+            text = "".join(self.chars).rstrip()
+            return FrozenLine(text, ((text, DEFAULT_ATTRS),) if text else (), self.wrapped)
+
+        runs = self.runs()
+        while runs and runs[-1][1] == DEFAULT_ATTRS and not runs[-1][0].strip():
+            runs.pop()
+        if runs and runs[-1][1] == DEFAULT_ATTRS:
+            runs[-1] = (runs[-1][0].rstrip(), DEFAULT_ATTRS)
+        return FrozenLine("".join(text for text, _ in runs), tuple(runs), self.wrapped)
+
+
+def _color(code, params, index):
+    if code == 5 and index < len(params):
+        return f"color({params[index]})", index + 1
+    if code == 2 and index + 2 < len(params):
+        r, g, b = (max(0, min(255, value)) for value in params[index:index + 3])
+        return f"#{r:02x}{g:02x}{b:02x}", index + 3
+    return None, len(params)
+
+
+class Screen:
+    def __init__(self, rows=24, columns=80, scrollback_lines=DEFAULT_SCROLLBACK_LINES,
+                 scrollback_bytes=DEFAULT_SCROLLBACK_BYTES):
+        self.rows = max(1, rows)
+        self.columns = max(1, columns)
+        self.scrollback = ScrollbackBuffer(scrollback_lines, scrollback_bytes)
+        self.lines = [ScreenLine(self.columns) for _ in range(self.rows)]
+        self.dirty = set(range(self.rows))
+        self.responses = []
+        self.title = None
+        self.lines_scrolled = 0
+        self.reset_state()
+        self._state = GROUND
+        self._params = ""
+        self._osc = ""
+
+    def reset_state(self):
+        self.x = 0
+        self.y = 0
+        self.attrs = DEFAULT_ATTRS
+        self.saved_cursor = (0, 0, DEFAULT_ATTRS)
+        self.scroll_top = 0
+        self.scroll_bottom = self.rows - 1
+        self.autowrap = True
+        self.cursor_visible = True
+        self.application_cursor = False
+        self.bracketed_paste = False
+        self.alternate = None
+
+    @property
+    def in_alternate_screen(self) -> bool:
+        return self.alternate is not None
+
+    def take_dirty(self):
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
+
+    def mark_all_dirty(self):
+        self.dirty.update(range(self.rows))
+
+    def blank_attrs(self):
+        if self.attrs.bg is None and not self.attrs.reverse:
+            return DEFAULT_ATTRS
+        return Attrs(bg=self.attrs.bg, reverse=self.attrs.reverse)
+
+    def blank_line(self):
+        return ScreenLine(self.columns, self.blank_attrs())
+
+    def resize(self, rows, columns):
+        rows = max(1, rows)
+        columns = max(1, columns)
+        if rows == self.rows and columns == self.columns:
+            return
+
+        for line in self.lines:
+            line.resize(columns)
+        if rows < self.rows:
+            excess = self.rows - rows
+            below_cursor = self.rows - 1 - self.y
+            trim_bottom = min(excess, below_cursor)
+            if trim_bottom:
+                del self.lines[-trim_bottom:]
+            trim_top = excess - trim_bottom
+            if trim_top:
+                self._push_scrollback(self.lines[:trim_top])
+                del self.lines[:trim_top]
+                self.y -= trim_top
+        else:
+            self.lines.extend(ScreenLine(columns) for _ in range(rows - self.rows))
+
+        self.rows = rows
+        self.columns = columns
+        self.scroll_top = 0
+        self.scroll_bottom = rows - 1
+        self.x = min(self.x, columns - 1)
+        self.y = max(0, min(self.y, rows - 1))
+        if self.alternate is not None:
+            main_lines, cursor = self.alternate
+            for line in main_lines:
+                line.resize(columns)
+            main_lines[:] = (main_lines + [ScreenLine(columns) for _ in range(rows)])[:rows]
+        self.dirty = set(range(rows))
+
+    def _push_scrollback(self, lines):
+        if self.alternate is not None:
+            return
+        for line in lines:
+            self.scrollback.append(line.freeze())
+        self.lines_scrolled += len(lines)
+
+    def feed(self, data):
+        index = 0
+        length = len(data)
+        while index < length:
+            state = self._state
+            if state == GROUND:
+                match = CONTROL.search(data, index)
+                end = match.start() if match else length
+                if end > index:
+                    self.draw(data[index:end])
+                    index = end
+                    continue
+                self.control(data[index])
+                index += 1
+            elif state == ESCAPE:
+                self.escape(data[index])
+                index += 1
+            elif state == CSI:
+                index = self._feed_csi(data, index)
+            elif state == OSC:
+                index = self._feed_osc(data, index)
+            elif state == DCS:
+                index = self._feed_dcs(data, index)
+            else:
+                self._state = GROUND
+                index += 1
+
+    def _feed_csi(self, data, index):
+        length = len(data)
+        start = index
+        while index < length:
+            char = data[index]
+            code = ord(char)
+            if 0x40 <= code <= 0x7E:
+                self._params += data[start:index]
+                self._state = GROUND
+                params = self._params
+                self._params = ""
+                self.csi(params, char)
+                return index + 1
+            if char == "\x1b":
+                self._params = ""
+                self._state = ESCAPE
+                return index + 1
+            if char in "\x18\x1a":
+                self._params = ""
+                self._state = GROUND
+                return index + 1
+            if code < 0x20:
+                self._params += data[start:index]
+                self.control(char)
+                start = index + 1
+            index += 1
+        self._params += data[start:index]
+        return index
+
+    def _feed_osc(self, data, index):
+        length = len(data)
+        start = index
+        while index < length:
+            char = data[index]
+            if char == "\x07" or char == "\x1b":
+                self._osc += data[start:index]
+                self.osc(self._osc)
+                self._osc = ""
+                self._state = ESCAPE if char == "\x1b" else GROUND
+                return index + 1
+            index += 1
+        self._osc += data[start:index]
+        return index
+
+    def _feed_dcs(self, data, index):
+        length = len(data)
+        while index < length:
+            char = data[index]
+            if char in "\x07\x18\x1a":
+                self._state = GROUND
+                return index + 1
+            if char == "\x1b":
+                self._state = ESCAPE
+                return index + 1
+            index += 1
+        return index
+
+    def draw(self, text):
+        if not text.isascii():
+            for char in text:
+                width = get_character_cell_size(char)
+                if width == 0:
+                    if self.x > 0:
+                        line = self.lines[self.y]
+                        line.chars[self.x - 1] += char
+                    continue
+                self._put(char, width)
+            return
+
+        while text:
+            if self.x >= self.columns:
+                if not self.autowrap:
+                    self.x = self.columns - 1
+                    text = text[-1]
+                else:
+                    self.lines[self.y].wrapped = True
+                    self.carriage_return()
+                    self.linefeed()
+            count = min(len(text), self.columns - self.x)
+            line = self.lines[self.y]
+            self._split_wide(line, self.x, self.x + count)
+            line.chars[self.x:self.x + count] = text[:count]
+            line.attrs[self.x:self.x + count] = [self.attrs] * count
+            self.dirty.add(self.y)
+            self.x += count
+            text = text[count:]
+
+    def _split_wide(self, line, start, end):
+        if start > 0 and line.chars[start] == "":
+            line.chars[start - 1] = " "
+        if end < self.columns and line.chars[end] == "":
+            line.chars[end] = " "
+
+    def _put(self, char, width):
+        if self.x + width > self.columns:
+            if self.autowrap:
+                self.lines[self.y].wrapped = True
+                self.carriage_return()
+                self.linefeed()
+            else:
+                self.x = self.columns - width
+        line = self.lines[self.y]
+        self._split_wide(line, self.x, min(self.columns, self.x + width))
+        line.chars[self.x] = char
+        line.attrs[self.x] = self.attrs
+        if width == 2 and self.x + 1 < self.columns:
+            line.chars[self.x + 1] = ""
+            line.attrs[self.x + 1] = self.attrs
+        self.dirty.add(self.y)
+        self.x += width
+
+    def control(self, char):
+        if char == "\r":
+            self.carriage_return()
+        elif char in "\n\x0b\x0c":
+            self.linefeed()
+        elif char == "\x08":
+            if self.x > 0:
+                self.x = min(self.x, self.columns) - 1
+        elif char == "\t":
+            self.x = min(self.columns - 1, (self.x // TAB_WIDTH + 1) * TAB_WIDTH)
+        elif char == "\x1b":
+            self._state = ESCAPE
+
+    def escape(self, char):
+        self._state = GROUND
+        if char == "[":
+            self._state = CSI
+            self._params = ""
+        elif char == "]":
+            self._state = OSC
+            self._osc = ""
+        elif char in "PX^_":
+            self._state = DCS
+        elif char in "()*+":
+            self._state = CHARSET
+        elif char == "7":
+            self.save_cursor()
+        elif char == "8":
+            self.restore_cursor()
+        elif char == "D":
+            self.linefeed()
+        elif char == "E":
+            self.carriage_return()
+            self.linefeed()
+        elif char == "M":
+            self.reverse_index()
+        elif char == "c":
+            self.reset()
+
+    def osc(self, data):
+        code, _, value = data.partition(";")
+        if code in ("0", "2"):
+            self.title = value
+
+    def csi(self, params, final):
+        private = ""
+        if params and params[0] in "?>=<":
+            private, params = params[0], params[1:]
+        params = params.rstrip(" !\"#$%&'()*+,-./")
+        try:
+            values = [int(value) if value else 0 for value in params.replace(":", ";").split(";")] if params else []
+        except ValueError:
+            return
+
+        def arg(index=0, default=1):
+            value = values[index] if index < len(values) else 0
+            return value or default
+
+        if private == "?":
+            if final in "hl":
+                self.set_private_modes(values, final == "h")
+            return
+        if private:
+            if final == "c":
+                self.responses.append("\x1b[>0;0;0c")
+            return
+
+        if final == "m":
+            self.select_graphic_rendition(values)
+        elif final == "A":
+            self.y = max(self.scroll_top if self.y >= self.scroll_top else 0, self.y - arg())
+            self.x = min(self.x, self.columns - 1)
+        elif final in "Be":
+            self.y = min(self.scroll_bottom if self.y <= self.scroll_bottom else self.rows - 1, self.y + arg())
+            self.x = min(self.x, self.columns - 1)
+        elif final in "Ca":
+            self.x = min(self.columns - 1, self.x + arg())
+        elif final == "D":
+            self.x = max(0, min(self.x, self.columns - 1) - arg())
+        elif final == "E":
+            self.y = min(self.rows - 1, self.y + arg())
+            self.x = 0
+        elif final == "F":
+            self.y = max(0, self.y - arg())
+            self.x = 0
+        elif final in "G`":
+            self.x = min(self.columns - 1, arg() - 1)
+        elif final == "d":
+            self.y = min(self.rows - 1, arg() - 1)
+        elif final in "Hf":
+            self.y = min(self.rows - 1, arg(0) - 1)
+            self.x = min(self.columns - 1, arg(1) - 1)
+        elif final == "J":
+            self.erase_display(arg(0, 0))
+        elif final == "K":
+            self.erase_line(arg(0, 0))
+        elif final == "L":
+            self.insert_lines(arg())
+        elif final == "M":
+            self.delete_lines(arg())
+        elif final == "@":
+            self.insert_characters(arg())
+        elif final == "P":
+            self.delete_characters(arg())
+        elif final == "X":
+            self.erase_characters(arg())
+        elif final == "S":
+            self.scroll_up(arg())
+        elif final == "T":
+            self.scroll_down(arg())
+        elif final == "r":
+            top = arg(0) - 1
+            bottom = min(self.rows, arg(1, self.rows)) - 1
+            if top < bottom:
+                self.scroll_top = top
+                self.scroll_bottom = bottom
+                self.x = 0
+                self.y = 0
+        elif final == "s":
+            self.save_cursor()
+        elif final == "u":
+            self.restore_cursor()
+        elif final == "n":
+            if arg(0, 0) == 6:
+                self.responses.append(f"\x1b[{self.y + 1};{min(self.x, self.columns - 1) + 1}R")
+            elif arg(0, 0) == 5:
+                self.responses.append("\x1b[0n")
+        elif final == "c":
+            self.responses.append("\x1b[?1;2c")
+
+    def set_private_modes(self, modes, enabled):
+        for mode in modes:
+            if mode == 1:
+                self.application_cursor = enabled
+            elif mode == 7:
+                self.autowrap = enabled
+            elif mode == 25:
+                self.cursor_visible = enabled
+                self.dirty.add(self.y)
+            elif mode == 2004:
+                self.bracketed_paste = enabled
+            elif mode in (47, 1047, 1049):
+                if enabled:
+                    self.enter_alternate_screen(save_cursor=mode == 1049)
+                else:
+                    self.exit_alternate_screen(restore_cursor=mode == 1049)
+
+    def select_graphic_rendition(self, values):
+        if not values:
+            values = [0]
+        attrs = self.attrs
+        index = 0
+        while index < len(values):
+            code = values[index]
+            index += 1
+            if code == 0:
+                attrs = DEFAULT_ATTRS
+            elif code == 1:
+                attrs = attrs._replace(bold=True)
+            elif code == 2:
+                attrs = attrs._replace(dim=True)
+            elif code == 3:
+                attrs = attrs._replace(italic=True)
+            elif code == 4:
+                attrs = attrs._replace(underline=True)
+            elif code in (5, 6):
+                attrs = attrs._replace(blink=True)
+            elif code == 7:
+                attrs = attrs._replace(reverse=True)
+            elif code == 9:
+                attrs = attrs._replace(strike=True)
+            elif code == 21 or code == 22:
+                attrs = attrs._replace(bold=False, dim=False)
+            elif code == 23:
+                attrs = attrs._replace(italic=False)
+            elif code == 24:
+                attrs = attrs._replace(underline=False)
+            elif code == 25:
+                attrs = attrs._replace(blink=False)
+            elif code == 27:
+                attrs = attrs._replace(reverse=False)
+            elif code == 29:
+                attrs = attrs._replace(strike=False)
+            elif 30 <= code <= 37:
+                attrs = attrs._replace(fg=f"color({code - 30})")
+            elif code == 38:
+                if index < len(values):
+                    color, index = _color(values[index], values, index + 1)
+                    attrs = attrs._replace(fg=color)
+            elif code == 39:
+                attrs = attrs._replace(fg=None)
+            elif 40 <= code <= 47:
+                attrs = attrs._replace(bg=f"color({code - 40})")
+            elif code == 48:
+                if index < len(values):
+                    color, index = _color(values[index], values, index + 1)
+                    attrs = attrs._replace(bg=color)
+            elif code == 49:
+                attrs = attrs._replace(bg=None)
+            elif 90 <= code <= 97:
+                attrs = attrs._replace(fg=f"color({code - 90 + 8})")
+            elif 100 <= code <= 107:
+                attrs = attrs._replace(bg=f"color({code - 100 + 8})")
+        self.attrs = attrs
+
+    def carriage_return(self):
+        self.x = 0
+
+    def linefeed(self):
+        if self.y == self.scroll_bottom:
+            self.scroll_up(1)
+        elif self.y < self.rows - 1:
+            self.y += 1
+
+    def reverse_index(self):
+        if self.y == self.scroll_top:
+            self.scroll_down(1)
+        elif self.y > 0:
+            self.y -= 1
+
+    def scroll_up(self, count):
+        top, bottom = self.scroll_top, self.scroll_bottom
+        count = min(count, bottom - top + 1)
+        removed = self.lines[top:top + count]
+        if top == 0:
+            self._push_scrollback(removed)
+        del self.lines[top:top + count]
+        for _ in range(count):
+            self.lines.insert(bottom - count + 1, self.blank_line())
+        self.dirty.update(range(top, bottom + 1))
+
+    def scroll_down(self, count):
+        top, bottom = self.scroll_top, self.scroll_bottom
+        count = min(count, bottom - top + 1)
+        del self.lines[bottom - count + 1:bottom + 1]
+        for _ in range(count):
+            self.lines.insert(top, self.blank_line())
+        self.dirty.update(range(top, bottom + 1))
+
+    def insert_lines(self, count):
+        if not self.scroll_top <= self.y <= self.scroll_bottom:
+            return
+        top = self.scroll_top
+        self.scroll_top = self.y
+        self.scroll_down(count)
+        self.scroll_top = top
+        self.x = 0
+
+    def delete_lines(self, count):
+        if not self.scroll_top <= self.y <= self.scroll_bottom:
+            return
+        top = self.scroll_top
+        self.scroll_top = self.y
+        count = min(count, self.scroll_bottom - self.y + 1)
+        del self.lines[self.y:self.y + count]
+        for _ in range(count):
+            self.lines.insert(self.scroll_bottom - count + 1, self.blank_line())
+        self.dirty.update(range(self.y, self.scroll_bottom + 1))
+        self.scroll_top = top
+        self.x = 0
+
+    def _clear(self, line, start, end):
+        blank = self.blank_attrs()
+        line.chars[start:end] = [" "] * (end - start)
+        line.attrs[start:end] = [blank] * (end - start)
+
+    def erase_line(self, mode):
+        line = self.lines[self.y]
+        x = min(self.x, self.columns)
+        if mode == 0:
+            self._clear(line, x, self.columns)
+        elif mode == 1:
+            self._clear(line, 0, min(x + 1, self.columns))
+        else:
+            self._clear(line, 0, self.columns)
+        self.dirty.add(self.y)
+
+    def erase_display(self, mode):
+        if mode == 0:
+            self.erase_line(0)
+            rows = range(self.y + 1, self.rows)
+        elif mode == 1:
+            self.erase_line(1)
+            rows = range(0, self.y)
+        elif mode == 2:
+            rows = range(self.rows)
+        else:
+            self.scrollback.clear()
+            return
+        for row in rows:
+            self.lines[row] = self.blank_line()
+            self.dirty.add(row)
+
+    def insert_characters(self, count):
+        line = self.lines[self.y]
+        x = min(self.x, self.columns - 1)
+        count = min(count, self.columns - x)
+        blank = self.blank_attrs()
+        line.chars[x:x] = [" "] * count
+        line.attrs[x:x] = [blank] * count
+        line.resize(self.columns)
+        self.dirty.add(self.y)
+
+    def delete_characters(self, count):
+        line = self.lines[self.y]
+        x = min(self.x, self.columns - 1)
+        count = min(count, self.columns - x)
+        del line.chars[x:x + count]
+        del line.attrs[x:x + count]
+        blank = self.blank_attrs()
+        line.chars.extend([" "] * count)
+        line.attrs.extend([blank] * count)
+        self.dirty.add(self.y)
+
+    def erase_characters(self, count):
+        x = min(self.x, self.columns - 1)
+        self._clear(self.lines[self.y], x, min(self.columns, x + count))
+        self.dirty.add(self.y)
+
+    def save_cursor(self):
+        self.saved_cursor = (self.x, self.y, self.attrs)
+
+    def restore_cursor(self):
+        x, y, attrs = self.saved_cursor
+        self.x = min(x, self.columns - 1)
+        self.y = min(y, self.rows - 1)
+        self.attrs = attrs
+
+    def enter_alternate_screen(self, save_cursor=True):
+        if self.alternate is not None:
+            return
+        if save_cursor:
+            self.save_cursor()
+        self.alternate = (self.lines, (self.x, self.y))
+        self.lines = [ScreenLine(self.columns) for _ in range(self.rows)]
+        self.mark_all_dirty()
+
+    def exit_alternate_screen(self, restore_cursor=True):
+        if self.alternate is None:
+            return
+        self.lines, (self.x, self.y) = self.alternate
+        self.alternate = None
+        if restore_cursor:
+            self.restore_cursor()
+        self.mark_all_dirty()
+
+    def reset(self):
+        self.alternate = None
+        self.lines = [ScreenLine(self.columns) for _ in range(self.rows)]
+        self.reset_state()
+        self.mark_all_dirty()
+
+    def display_lines(self):
+        return [line.freeze().text for line in self.lines]
@@ -0,0 +1,74 @@
+from textual.widgets import Input, Label
+from textual.containers import Horizontal
+from rich.text import Text
+from functools import partial
+
+SEARCH_DELAY = 0.15
+
+
+class TerminalSearchBar(Horizontal):
+    DEFAULT_CSS = """
+    TerminalSearchBar {
+        height: auto;
+        background: #0C0C0C;
+    }
+    TerminalSearchBar Label {
+        padding: 1 1;
+    }
+    TerminalSearchBar Input {
+        width: 1fr;
+    }
+    """
+
+    def __init__(self, terminal):
+        super().__init__()
+        self.terminal = terminal
+        self.regex = False
+        self.search_timer = None
+
+    def compose(self):
+        yield Label(self.title_text(), id="terminal_search_title")
+        yield Input(id="terminal_search_input")
+        yield Label("", id="terminal_search_status")
+
+    def title_text(self):
+        mode = "regex" if self.regex else "literal"
+        return f"Search output ({mode}, Ctrl+r):"
+
+    def on_mount(self):
+        self.focus_input()
+
+    def focus_input(self):
+        self.query_one(Input).focus()
+
+    def set_status(self, status):
+        self.query_one("#terminal_search_status", Label).update(Text(status))
+
+    def on_input_changed(self, event):
+        if self.search_timer is not None:
+            self.search_timer.stop()
+        self.search_timer = self.set_timer(SEARCH_DELAY, partial(self.terminal.start_search, event.value, self.regex))
+
+    def on_input_submitted(self, event):
+        self.terminal.select_match(-1)
+
+    def close(self):
+        if self.search_timer is not None:
+            self.search_timer.stop()
+        self.terminal.close_search()
+
+    def on_key(self, event):
+        if event.key == "escape":
+            event.stop()
+            self.close()
+        elif event.key == "ctrl+r":
+            event.stop()
+            self.regex = not self.regex
+            self.query_one("#terminal_search_title", Label).update(self.title_text())
+            self.terminal.start_search(self.query_one(Input).value, self.regex)
+        elif event.key == "up":
+            event.stop()
+            self.terminal.select_match(-1)
+        elif event.key == "down":
+            event.stop()
+            self.terminal.select_match(1)
@@ -0,0 +1,102 @@
+from functools import partial
+import asyncio
+import subprocess
+
+from .terminal import TerminalSession
+from .terminal_backend import spawn_shell
+from .terminal_screen import Screen
+
+TOOL_SCROLLBACK_LINES = 1000
+
+
+def use_default_docker_context():
+    try:
+        subprocess.run(["docker", "context", "use", "default"],
+                        check=True,
+                        text=True,
+                        capture_output=True)
+    except subprocess.CalledProcessError as e:
+        return f"Failed to set Docker context: {e.stderr}"
+    except FileNotFoundError:
+        return "Docker not found! Please install it."
+    return None
+
+
+class ToolPool:
+    def __init__(self, supervisor, rows=24, columns=80, notify=None):
+        self.supervisor = supervisor
+        self.notify = notify
+        self.rows = rows
+        self.columns = columns
+        self.sessions = {}
+        self._starting = {}
+        self._docker_context = None
+
+    def docker_context(self):
+        if self._docker_context is None:
+            self._docker_context = asyncio.get_running_loop().run_in_executor(None, use_default_docker_context)
+        return self._docker_context
+
+    def warm(self, name, command, prepare=None):
+        task = self._starting.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._start(name, command, prepare))
+            self._starting[name] = task
+            task.add_done_callback(partial(self._started, name))
+        return task
+
+    def _started(self, name, task):
+        self._starting.pop(name, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None and self.notify is not None:
+            self.notify(f"Error launching {name}: {error}", severity="error")
+
+    async def acquire(self, name, command, prepare=None):
+        session = self.sessions.get(name)
+        if session is None or session.exited or session.owner is not None:
+            session = await self.warm(name, command, prepare)
+        return session
+
+    async def _start(self, name, command, prepare):
+        session = self.sessions.get(name)
+        if session is not None and not session.exited and session.owner is None:
+            return session
+        if prepare is not None:
+            await prepare()
+
+        screen = Screen(self.rows, self.columns, TOOL_SCROLLBACK_LINES)
+        session = TerminalSession(0, command, screen)
+        session.process = spawn_shell(command, self.rows, self.columns, console=True)
+        session.record = self.supervisor.register(name, session.process)
+        session.process.start(
+            asyncio.get_running_loop(),
+            partial(self._on_output, session),
+            partial(self._on_exit, name, session),
+        )
+        self.sessions[name] = session
+        return session
+
+    def _on_output(self, session, data):
+        if session.owner is not None:
+            session.owner._on_process_output(session, data)
+            return
+        session.screen.feed(session.decoder.decode(data))
+        if session.screen.responses:
+            responses = "".join(session.screen.responses)
+            session.screen.responses.clear()
+            try:
+                session.process.write(responses.encode("utf-8"))
+            except OSError:
+                pass
+
+    def _on_exit(self, name, session, returncode):
+        self.supervisor.mark_exited(session.record, returncode)
+        if self.sessions.get(name) is session:
+            del self.sessions[name]
+        if session.owner is not None:
+            session.owner._on_process_exit(session, returncode)
+        else:
+            self.supervisor.forget(session.record)
+            session.process.close()
@@ -0,0 +1,47 @@
+from textual.screen import Screen
+from functools import partial
+import shutil
+
+from .terminal import EmbeddedTerminal
+
+
+class ToolScreen(Screen):
+    DEFAULT_CSS = """
+    ToolScreen {
+        background: #0C0C0C;
+    }
+    """
+
+    NAME = ""
+    TOOL_NAME = ""
+    COMMAND = []
+
+    def __init__(self, tool_pool):
+        super().__init__()
+        self.tool_pool = tool_pool
+        self.terminal = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return shutil.which(cls.COMMAND[0]) is not None
+
+    async def prepare(self):
+        pass
+
+    def warm(self):
+        if self.available():
+            self.tool_pool.warm(self.NAME, self.COMMAND, self.prepare)
+
+    def compose(self):
+        self.terminal = EmbeddedTerminal(
+            self.COMMAND,
+            self.NAME,
+            supervisor=self.tool_pool.supervisor,
+            acquire=partial(self.tool_pool.acquire, self.NAME, self.COMMAND, self.prepare),
+        )
+        yield self.terminal
+
+    def on_screen_resume(self):
+        if self.terminal.session is not None and self.terminal.session.exited:
+            self.terminal.restart()
+        self.terminal.focus()
@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+Location = Tuple[int, int]
+
+DEFAULT_UNDO_BYTES = 16 * 1024 * 1024
+
+
+def end_location(start: Location, text: str) -> Location:
+    row, column = start
+    newlines = text.count("\n")
+    if not newlines:
+        return (row, column + len(text))
+    return (row + newlines, len(text) - text.rfind("\n") - 1)
+
+
+def text_size(text: str) -> int:
+    return len(text.encode("utf-8", errors="surrogatepass"))
+
+
+@dataclass
+class EditDelta:
+    start: Location
+    old_end: Location
+    new_end: Location
+    old_text: str
+    new_text: str
+    cursor_before: Location
+    cursor_after: Location
+
+    @property
+    def size(self) -> int:
+        return text_size(self.old_text) + text_size(self.new_text)
+
+    @property
+    def kind(self) -> str:
+        if not self.old_text:
+            return "insert"
+        if not self.new_text:
+            return "delete"
+        return "replace"
+
+
+@dataclass
+class UndoGroup:
+    deltas: List[EditDelta] = field(default_factory=list)
+    size: int = 0
+
+    @property
+    def cursor_before(self) -> Location:
+        return self.deltas[0].cursor_before
+
+    @property
+    def cursor_after(self) -> Location:
+        return self.deltas[-1].cursor_after
+
+
+class UndoHistory:
+    def __init__(self, max_bytes: int = DEFAULT_UNDO_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_stack: List[UndoGroup] = []
+        self.redo_stack: List[UndoGroup] = []
+        self.total_bytes = 0
+        self._group_open = False
+
+    def __bool__(self) -> bool:
+        return bool(self.undo_stack or self.redo_stack)
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def record(self, delta: EditDelta) -> None:
+        if delta.old_text == delta.new_text:
+            return
+
+        self._drop_redo()
+
+        group = self.undo_stack[-1] if self._group_open and self.undo_stack else None
+        if group is None or group.deltas[-1].kind != delta.kind:
+            group = UndoGroup()
+            self.undo_stack.append(group)
+            self._group_open = True
+
+        if not (group.deltas and self._coalesce(group.deltas[-1], delta)):
+            group.deltas.append(delta)
+        group.size += delta.size
+        self.total_bytes += delta.size
+        self._trim()
+
+    def close_group(self) -> None:
+        self._group_open = False
+
+    def pop_undo(self) -> Optional[UndoGroup]:
+        if not self.undo_stack:
+            return None
+        self._group_open = False
+        group = self.undo_stack.pop()
+        self.redo_stack.append(group)
+        return group
+
+    def pop_redo(self) -> Optional[UndoGroup]:
+        if not self.redo_stack:
+            return None
+        self._group_open = False
+        group = self.redo_stack.pop()
+        self.undo_stack.append(group)
+        return group
+
+    def clear(self) -> None:
+        self.undo_stack = []
+        self.redo_stack = []
+        self.total_bytes = 0
+        self._group_open = False
+
+    def _drop_redo(self) -> None:
+        if self.redo_stack:
+            self.total_bytes -= sum(group.size for group in self.redo_stack)
+            self.redo_stack = []
+
+    def _trim(self) -> None:
+        while self.total_bytes > self.max_bytes and len(self.undo_stack) > 1:
+            dropped = self.undo_stack.pop(0)
+            self.total_bytes -= dropped.size
+
+    def _coalesce(self, last: EditDelta, delta: EditDelta) -> bool:
+        if "\n" in delta.new_text or "\n" in delta.old_text:
+            return False
+
+        if last.kind == delta.kind == "insert" and delta.start == last.new_end:
+            last.new_text += delta.new_text
+            last.new_end = delta.new_end
+            last.cursor_after = delta.cursor_after
+            return True
+
+        if last.kind == delta.kind == "delete":
+            if delta.old_end == last.start:
+                last.old_text = delta.old_text + last.old_text
+                last.start = delta.start
+                last.new_end = delta.start
+                last.old_end = end_location(delta.start, last.old_text)
+                last.cursor_after = delta.cursor_after
+                return True
+            if delta.start == last.start:
+                last.old_text += delta.old_text
+                last.old_end = end_location(last.start, last.old_text)
+                last.cursor_after = delta.cursor_after
+                return True
+
+        return False
@@ -0,0 +1,51 @@
+import os
+import pytest
+from lazyedit.directory_tree import DirectoryTree
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("")
+    (tmp_path / "src" / "util.py").write_text("")
+    (tmp_path / "README.md").write_text("")
+    return tmp_path
+
+
+def paths(tree):
+    return [node.path for node in tree.rows]
+
+
+def test_rows_are_sorted_and_collapsed(project):
+    tree = DirectoryTree(str(project))
+    assert [node.name for node in tree.rows] == ["README.md", "src"]
+    assert tree.rows[1].is_dir
+
+
+def test_toggle_expands_and_collapses_in_place(project):
+    tree = DirectoryTree(str(project))
+    tree.toggle(1)
+    assert [node.name for node in tree.rows] == ["README.md", "src", "app.py", "util.py"]
+    assert tree.rows[2].depth == 1
+
+    tree.toggle(1)
+    assert [node.name for node in tree.rows] == ["README.md", "src"]
+
+
+def test_refresh_node_keeps_expansion_and_picks_up_changes(project):
+    tree = DirectoryTree(str(project))
+    tree.toggle(1)
+    (project / "src" / "new.py").write_text("")
+    os.remove(project / "src" / "util.py")
+
+    tree.refresh_node(tree.rows[1].path)
+
+    assert [node.name for node in tree.rows] == ["README.md", "src", "app.py", "new.py"]
+    assert tree.index_of(os.path.join(str(project), "src", "util.py")) == -1
+
+
+def test_reveal_outside_the_root_is_not_found(project, tmp_path_factory):
+    tree = DirectoryTree(str(project))
+    outside = tmp_path_factory.mktemp("outside") / "notes.txt"
+    assert tree.reveal(str(outside)) == -1
+    assert tree.reveal(os.path.join(str(project), "src", "app.py")) == 2
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+from lazyedit.edit_journal import EditJournal, find_recoveries, is_running
+from lazyedit.rope_document import RopeDocument
+
+DEAD_PID = 4194305
+
+
+def crash(journal):
+    journal.close()
+    for name in os.listdir(journal.directory):
+        digest = name.split(".")[0]
+        os.rename(os.path.join(journal.directory, name), os.path.join(journal.directory, f"{digest}.{DEAD_PID}.journal"))
+
+
+def test_edits_are_replayed_onto_the_saved_file(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one\ntwo\n")
+    journal = EditJournal(str(tmp_path / "journal"))
+    journal.begin(str(path), RopeDocument("one\ntwo\n").snapshot())
+    journal.record(str(path), (0, 3), (0, 3), "!")
+    journal.record(str(path), (2, 0), (2, 0), "three")
+    journal.record(str(path), (1, 0), (1, 3), "TWO")
+    assert journal.is_open(str(path))
+    assert find_recoveries(journal.directory) == []
+
+    crash(journal)
+    with open(os.path.join(journal.directory, os.listdir(journal.directory)[0]), "ab") as f:
+        f.write(b'[0, 0, 0')
+
+    [recovery] = find_recoveries(journal.directory)
+    assert recovery.path == str(path)
+    assert recovery.saved_text == "one\ntwo\n"
+    assert recovery.text == "one!\nTWO\nthree"
+
+
+def test_stale_and_unchanged_journals_are_dropped(tmp_path):
+    journal = EditJournal(str(tmp_path / "journal"))
+    stale, clean, unsaved = (tmp_path / name for name in ("stale.txt", "clean.txt", "unsaved.txt"))
+    for path in (stale, clean, unsaved):
+        path.write_text("x\n")
+        journal.begin(str(path), RopeDocument("x\n").snapshot())
+    journal.begin(str(unsaved), RopeDocument("edited\n").snapshot(), saved=False)
+    journal.record(str(stale), (0, 0), (0, 0), "y")
+    journal.record(str(clean), (0, 0), (0, 0), "y")
+    journal.record(str(clean), (0, 0), (0, 1), "")
+    journal.record(str(unsaved), (1, 0), (1, 0), "more")
+    crash(journal)
+    stale.write_text("changed on disk\n")
+
+    assert [recovery.text for recovery in find_recoveries(journal.directory)] == ["edited\nmore"]
+    assert len(os.listdir(journal.directory)) == 1
+
+
+def test_discard_removes_the_journal(tmp_path):
+    path = str(tmp_path / "a.txt")
+    journal = EditJournal(str(tmp_path / "journal"))
+    journal.begin(path, RopeDocument("").snapshot())
+    journal.record(path, (0, 0), (0, 0), "x")
+    journal.discard(path)
+    assert not journal.is_open(path)
+    journal.close()
+    assert os.listdir(journal.directory) == []
+
+
+def test_is_running_sees_live_and_exited_processes():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        assert is_running(os.getpid())
+        assert is_running(process.pid)
+    finally:
+        process.kill()
+        process.wait()
+    assert not is_running(process.pid)
+    assert not is_running(DEAD_PID)
@@ -0,0 +1,60 @@
+import os
+import pytest
+from lazyedit import file_io
+from lazyedit.file_io import read_text, write_lines_atomic, OperationCancelled
+
+
+def test_write_lines_atomic_round_trip(tmp_path):
+    path = tmp_path / "example.txt"
+    path.write_text("old")
+
+    write_lines_atomic(str(path), ["first", "second", ""], chunk_size=4)
+
+    assert read_text(str(path)) == "first\nsecond\n"
+    assert os.listdir(tmp_path) == ["example.txt"]
+
+
+def test_cancelled_save_keeps_original(tmp_path):
+    path = tmp_path / "example.txt"
+    path.write_text("original")
+
+    with pytest.raises(OperationCancelled):
+        write_lines_atomic(str(path), ["a" * 10] * 10, chunk_size=5, is_cancelled=lambda: True)
+
+    assert path.read_text() == "original"
+    assert os.listdir(tmp_path) == ["example.txt"]
+
+
+def test_crlf_newlines_are_written_exactly_once(tmp_path):
+    path = tmp_path / "example.txt"
+    write_lines_atomic(str(path), ["a", "b", ""], newline="\r\n")
+    assert path.read_bytes() == b"a\r\nb\r\n"
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt", reason="needs POSIX symlinks")
+def test_saving_through_a_symlink_updates_the_target(tmp_path):
+    target = tmp_path / "real.txt"
+    target.write_text("old")
+    target.chmod(0o640)
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    write_lines_atomic(str(link), ["new"])
+
+    assert link.is_symlink()
+    assert target.read_text() == "new"
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert sorted(os.listdir(tmp_path)) == ["link.txt", "real.txt"]
+
+
+def test_files_whose_owner_cannot_be_kept_are_rewritten_in_place(tmp_path, monkeypatch):
+    path = tmp_path / "example.txt"
+    path.write_text("a much longer original text")
+    inode = path.stat().st_ino
+    monkeypatch.setattr(file_io, "_keep_owner", lambda path, temp_path: False)
+
+    write_lines_atomic(str(path), ["short"])
+
+    assert path.read_text() == "short"
+    assert path.stat().st_ino == inode
+    assert os.listdir(tmp_path) == ["example.txt"]
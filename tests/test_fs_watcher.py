@@ -0,0 +1,23 @@
+import os
+import pytest
+from lazyedit.fs_watcher import PollingBackend
+
+
+def test_polling_backend_reports_changed_directories_and_files(tmp_path):
+    watched_file = tmp_path / "a.txt"
+    watched_file.write_text("one")
+    backend = PollingBackend(interval=0)
+    backend.watch(str(tmp_path))
+    backend.watch_file(str(watched_file))
+
+    dirs, files = set(), set()
+    backend.wait(0, dirs, files)
+    assert not dirs and not files
+
+    (tmp_path / "b.txt").write_text("")
+    watched_file.write_text("two and more")
+    os.utime(tmp_path, ns=(0, 1))
+    backend.wait(0, dirs, files)
+
+    assert dirs == {str(tmp_path)}
+    assert files == {str(watched_file)}
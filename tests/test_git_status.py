@@ -0,0 +1,79 @@
+import os
+import shutil
+import subprocess
+import pytest
+from lazyedit.git_status import (
+    GitStatus, parse_status, line_changes,
+    MODIFIED, STAGED, UNTRACKED, IGNORED, ADDED_LINE, MODIFIED_LINE, DELETED_LINE,
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "Test")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("one\ntwo\nthree\n")
+    (tmp_path / "src" / "util.py").write_text("util\n")
+    (tmp_path / ".gitignore").write_text("build/\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "init")
+    return tmp_path
+
+
+def test_parse_status_records():
+    data = (
+        b"1 .M N... 100644 100644 100644 a a src/app.py\0"
+        b"2 R. N... 100644 100644 100644 a a R100 new name.py\0old.py\0"
+        b"? notes/\0"
+        b"! build/\0"
+    )
+    assert [tuple(entry) for entry in parse_status(data)] == [
+        ("src/app.py", MODIFIED, False),
+        ("new name.py", STAGED, False),
+        ("notes", UNTRACKED, True),
+        ("build", IGNORED, True),
+    ]
+
+
+def test_status_full_and_incremental_refresh(repo):
+    (repo / "src" / "app.py").write_text("one\n2\nthree\n")
+    (repo / "src" / "util.py").write_text("changed\n")
+    git(repo, "add", "src/util.py")
+    (repo / "build").mkdir()
+    (repo / "build" / "out.o").write_text("")
+    (repo / "todo.txt").write_text("")
+
+    status = GitStatus(str(repo))
+    assert status.discover()
+    status.apply(status.read())
+
+    app = os.path.join("src", "app.py")
+    assert status.status_of(app) == MODIFIED
+    assert status.status_of(os.path.join("src", "util.py")) == STAGED
+    assert status.status_of("src", is_dir=True) == MODIFIED
+    assert status.status_of("todo.txt") == UNTRACKED
+    assert status.status_of(os.path.join("build", "out.o")) == IGNORED
+
+    (repo / "src" / "app.py").write_text("one\ntwo\nthree\n")
+    assert status.apply(status.read([app]), [app])
+    assert status.status_of(app) is None
+    assert status.status_of("src", is_dir=True) == STAGED
+    assert status.status_of("todo.txt") == UNTRACKED
+
+
+def test_line_changes_against_index(repo):
+    status = GitStatus(str(repo))
+    status.discover()
+    base = status.index_text(os.path.join("src", "app.py"))
+    assert base == "one\ntwo\nthree\n"
+
+    assert line_changes(base, "zero\none\nTWO\n") == {0: ADDED_LINE, 2: MODIFIED_LINE}
+    assert line_changes(base, "one\nthree\n") == {0: DELETED_LINE}
@@ -0,0 +1,30 @@
+import pytest
+from lazyedit.ignore_rules import IgnoreRules
+
+
+@pytest.fixture
+def rules(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.pyc\nbuild/\n/dist\n!keep.pyc\ndocs/**/*.tmp\n")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / ".gitignore").write_text("generated.py\n")
+    return IgnoreRules(str(tmp_path))
+
+
+def test_basename_patterns_match_at_any_depth(rules):
+    assert rules.is_ignored("a.pyc")
+    assert rules.is_ignored("pkg/sub/a.pyc")
+    assert not rules.is_ignored("keep.pyc")
+
+
+def test_directory_only_and_anchored_patterns(rules):
+    assert rules.is_ignored("build", is_dir=True)
+    assert not rules.is_ignored("build", is_dir=False)
+    assert rules.is_ignored("dist", is_dir=True)
+    assert not rules.is_ignored("pkg/dist", is_dir=True)
+    assert rules.is_ignored("docs/a/b/c.tmp")
+
+
+def test_nested_gitignore_and_git_directory(rules):
+    assert rules.is_ignored("pkg/generated.py")
+    assert not rules.is_ignored("generated.py")
+    assert rules.is_ignored(".git", is_dir=True)
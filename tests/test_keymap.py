@@ -0,0 +1,68 @@
+import json
+from types import SimpleNamespace
+from lazyedit.keymap import Keymap, PENDING, normalize_key
+
+
+def key(name):
+    return SimpleNamespace(key=name, time=0.0)
+
+
+def test_default_modes_and_normalization():
+    keymap = Keymap()
+    assert keymap.resolve("editor", "ctrl+s") == "save"
+    assert keymap.resolve("terminal", "ctrl+s") is None
+    assert keymap.resolve("terminal", "ctrl+q") == "quit"
+    assert keymap.resolve("tool", "ctrl+q") is None
+    assert keymap.resolve("tool", "ctrl+g") == "lazygit"
+    assert keymap.resolve("editor", "f3") == "editor_mode"
+    assert keymap.resolve("editor", "ctrl+b") == PENDING
+    assert keymap.resolve("editor", "f") == "find_in_files"
+    assert keymap.resolve("terminal", "ctrl+b") == PENDING
+    assert keymap.resolve("terminal", "/") == "search"
+    assert normalize_key("Shift+Ctrl+PageDown") == "ctrl+shift+pagedown"
+    assert normalize_key("ctrl++") == "ctrl+plus"
+    assert normalize_key("G") == "G"
+
+
+def test_user_chords_replace_defaults(tmp_path):
+    path = tmp_path / "keymap.json"
+    path.write_text(json.dumps({
+        "global": {"editor_mode": "f3"},
+        "terminal": {"new_session": ["ctrl+b c"], "search": "ctrl+b /"},
+        "editor": {"quick_open": "ctrl+g p", "nope": "f1"},
+    }))
+    keymap = Keymap.load(str(path))
+    assert keymap.errors == ["Unknown action 'nope' in keymap mode 'editor'"]
+
+    assert keymap.resolve("directory", "ctrl+3") is None
+    assert keymap.resolve("directory", "f3") == "editor_mode"
+    assert keymap.resolve("editor", "ctrl+g") == PENDING
+    assert keymap.resolve("editor", "p") == "quick_open"
+    assert keymap.resolve("directory", "ctrl+g") == "lazygit"
+
+    assert keymap.resolve("terminal", "ctrl+b") == PENDING
+    assert keymap.resolve("terminal", "z") is None
+    assert keymap.resolve("terminal", "ctrl+b") == PENDING
+    assert keymap.resolve("terminal", "x") == "close_session"
+    assert keymap.resolve("terminal", "ctrl+q") == "quit"
+    assert keymap.resolve("terminal", "ctrl+shift+t") is None
+
+
+def test_dispatch_runs_handler_once_and_records_timing():
+    keymap = Keymap()
+    calls = []
+    handlers = {"next_session": lambda: calls.append("next")}
+    event = key("ctrl+pagedown")
+
+    assert keymap.dispatch("terminal", event, handlers) == "next_session"
+    assert keymap.dispatch("terminal", event, handlers) == "next_session"
+    assert calls == ["next"]
+
+    quit_event = key("ctrl+q")
+    assert keymap.dispatch("terminal", quit_event, handlers) == "quit"
+    assert keymap.dispatch("terminal", quit_event, {"quit": lambda: calls.append("quit")}) == "quit"
+    assert calls == ["next", "quit"]
+
+    assert keymap.dispatches == 2
+    assert keymap.timings["next_session"].count == 1
+    assert len(keymap.summary()) == 3
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from lazyedit.languages import Languages, modeline_language, shebang_interpreter
+from lazyedit.rope_document import TREE_SITTER
+
+
+def test_detects_filenames_shebangs_and_modelines():
+    languages = Languages()
+    assert languages.detect("src/app.py", "") == "python"
+    assert languages.detect("events.jsonl", '{"a": 1}\n') == "json"
+    assert languages.detect("docker/Dockerfile", "FROM python\n") == "dockerfile"
+    assert languages.detect("Dockerfile.dev", "FROM python\n") == "dockerfile"
+    assert languages.detect("GNUmakefile", "all:\n") == "make"
+    assert languages.detect("bin/deploy", "#!/usr/bin/env -S bash -e\necho hi\n") == "bash"
+    assert languages.detect("bin/tool", "#!/usr/bin/python3.11\n") == "python"
+    assert languages.detect("notes", "plain text\n") is None
+    assert languages.detect("build.txt", "x\n" * 2000 + "# vim: set ft=yml :\n") == "yaml"
+    assert languages.detect("config", "# -*- mode: python; coding: utf-8 -*-\n") == "python"
+    assert languages.detect("script.sh", "# -*- coding: utf-8 -*-\n") == "bash"
+
+
+def test_parsers():
+    assert shebang_interpreter("#!/usr/bin/env FOO=1 node --harmony") == "node"
+    assert shebang_interpreter("# not a shebang") is None
+    assert modeline_language(["x = 1  # vim:ft=sh"]) == "sh"
+    assert modeline_language(["-*- Python -*-"]) == "python"
+    assert modeline_language(["review: ft=python"]) is None
+
+
+def test_detection_is_cached_per_path():
+    languages = Languages()
+    assert languages.detect("run", "#!/bin/sh\n") == "bash"
+    assert languages.detect("run", "#!/usr/bin/env python\n") == "bash"
+    languages.forget("run")
+    assert languages.detect("run", "#!/usr/bin/env python\n") == "python"
+
+
+def test_config_extends_tables_and_reports_errors(tmp_path):
+    path = tmp_path / "languages.json"
+    path.write_text(json.dumps({
+        "extensions": {"tpl": "html", ".h": None},
+        "filenames": {"Justfile": "make"},
+        "interpreters": {"python": "ruby"},
+        "grammars": {"nix": {"highlights": "~/nix.scm"}, "bad": {}},
+        "colours": {},
+    }))
+    languages = Languages.load(str(path))
+    assert languages.detect("page.TPL", "") == "html"
+    assert languages.detect("x.h", "") is None
+    assert languages.detect("justfile", "") == "make"
+    assert languages.detect("tool", "#!/usr/bin/python\n") == "ruby"
+    assert languages.grammars["nix"]["highlights"].endswith("nix.scm")
+    assert "~" not in languages.grammars["nix"]["highlights"]
+    assert len(languages.errors) == 2
+
+    path.write_text("[")
+    assert Languages.load(str(path)).errors
+    assert Languages.load(str(tmp_path / "missing.json")).errors == []
+
+
+@pytest.mark.skipif(not TREE_SITTER, reason="tree-sitter not installed")
+def test_grammars_load_once_and_failures_are_remembered(tmp_path):
+    query = tmp_path / "broken.scm"
+    query.write_text("(no_such_node) @x")
+    languages = Languages({"grammars": {"json": {"highlights": str(query)}}})
+    assert not languages.is_loaded("bash")
+    bash = languages.load_grammar("bash")
+    assert languages.grammar("bash") is bash is languages.load_grammar("bash")
+    for name in ("dockerfile", "make", "python"):
+        assert languages.is_available(name) and languages.load_grammar(name).query
+    assert not languages.is_available("go")
+
+    with pytest.raises(NameError):
+        languages.load_grammar("json")
+    assert languages.is_loaded("json") and languages.grammar("json") is None
@@ -0,0 +1,70 @@
+import pytest
+
+from lazyedit import large_file
+from lazyedit.large_file import MappedDocument
+
+
+def write(tmp_path, data):
+    path = tmp_path / "big.log"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_index_spans_chunk_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(large_file, "FIRST_SCREEN_BYTES", 5)
+    monkeypatch.setattr(large_file, "INDEX_CHUNK_BYTES", 7)
+    lines = [f"line {i} " + "x" * (i % 11) for i in range(50)]
+    document = MappedDocument(write(tmp_path, "\n".join(lines).encode()))
+    assert not document.complete
+    document.build_index()
+
+    assert document.complete and document.indexed_fraction == 1.0
+    assert document.line_count == 50
+    assert document[:] == lines
+    assert document[-1] == lines[-1]
+    assert document.get_size(4).width == max(map(len, lines))
+    document.close()
+
+
+def test_crlf_lines_and_ranges(tmp_path):
+    document = MappedDocument(write(tmp_path, b"one\r\ntwo\r\nthree\r\n"))
+    document.build_index()
+    assert document.newline == "\r\n"
+    assert document.lines == ["one", "two", "three", ""]
+    assert document.get_text_range((0, 1), (2, 2)) == "ne\r\ntwo\r\nth"
+    document.close()
+
+
+def test_reads_before_indexing_completes(tmp_path, monkeypatch):
+    monkeypatch.setattr(large_file, "FIRST_SCREEN_BYTES", 10)
+    document = MappedDocument(write(tmp_path, b"aaaa\nbbbb\ncccc\ndddd\n"))
+    assert not document.complete
+    assert document.line_count == 2
+    assert document[:] == ["aaaa", "bbbb"]
+    assert document.get_line(2) == ""
+
+    document.index_chunk(6)
+    assert document.line_count == 3 and document[2] == "cccc"
+    document.build_index()
+    assert document.line_count == 5 and document[3] == "dddd"
+    document.close()
+
+
+def test_close_and_read_only(tmp_path):
+    document = MappedDocument(write(tmp_path, b"a\nb\n"))
+    assert document[0] == "a"
+    with pytest.raises(PermissionError):
+        document.replace_range((0, 0), (0, 0), "x")
+    with pytest.raises(ValueError):
+        document.text
+
+    document.close()
+    assert document.closed
+    assert document.get_line(0) == ""
+    assert document.index_chunk()
+
+
+def test_empty_file(tmp_path):
+    document = MappedDocument(write(tmp_path, b""))
+    assert document.complete and document.line_count == 1 and document[0] == ""
+    document.close()
@@ -0,0 +1,67 @@
+import os
+import threading
+import pytest
+from lazyedit.path_index import PathIndex, FuzzySearch, build_chunks
+
+
+def run(search):
+    while not search.step():
+        pass
+    return search.results()
+
+
+def test_fuzzy_search_ranks_basename_matches_first():
+    paths = ["docs/main_notes.md", "src/main.py", "src/domain/ain.py", "mxaxixn.txt"]
+    results = run(FuzzySearch(build_chunks(paths, chunk_size=2), "main"))
+
+    assert results[0] == "src/main.py"
+    assert results[1] == "docs/main_notes.md"
+    assert set(results) == {"docs/main_notes.md", "src/main.py", "src/domain/ain.py", "mxaxixn.txt"}
+
+
+def test_index_honours_gitignore_and_persists(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("")
+    (root / "build").mkdir()
+    (root / "build" / "out.js").write_text("")
+    (root / ".gitignore").write_text("build/\n")
+    cache = tmp_path / "cache"
+
+    index = PathIndex(str(root), cache_dir=str(cache))
+    index.build()
+    assert index.paths == [".gitignore", os.path.join("src", "app.py")]
+
+    (root / "src" / "new.py").write_text("")
+    reloaded = PathIndex(str(root), cache_dir=str(cache))
+    assert reloaded.load()
+    assert reloaded.refresh_stale() == 1
+    assert os.path.join("src", "new.py") in reloaded.paths
+
+
+def test_search_uses_published_chunks_without_waiting_for_the_lock(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("")
+    index = PathIndex(str(root), cache_dir=str(tmp_path / "cache"))
+    index.build()
+
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with index._lock:
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+    try:
+        assert run(index.search("app")) == [os.path.join("src", "app.py")]
+    finally:
+        release.set()
+        thread.join()
+
+    (root / "src" / "apple.py").write_text("")
+    assert index.update_dirs(["src"])
+    assert run(index.search("apple")) == [os.path.join("src", "apple.py")]
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import pytest
+from lazyedit.process_supervisor import ProcessSupervisor
+from lazyedit.terminal_backend import PtyProcess
+
+
+@pytest.mark.skipif(os.name == "nt", reason="pseudo-terminals are POSIX only")
+def test_shutdown_stops_sessions_in_parallel():
+    supervisor = ProcessSupervisor()
+    stubborn = "import signal, time; signal.signal(signal.SIGHUP, signal.SIG_IGN); print('ready', flush=True); time.sleep(30)"
+    records = [supervisor.register(f"sleep {i}", PtyProcess(["sleep", "30"])) for i in range(4)]
+    records.append(supervisor.register("stubborn", PtyProcess([sys.executable, "-c", stubborn])))
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    supervisor.shutdown(timeout=0.5)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert supervisor.live() == []
+    assert all(record.returncode is not None for record in records)
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="memory usage is read from /proc")
+def test_memory_usage_reports_live_sessions():
+    supervisor = ProcessSupervisor()
+    record = supervisor.register("sleep", PtyProcess(["sleep", "30"]))
+    try:
+        usage = supervisor.memory_usage()
+        assert usage[record] > 0
+    finally:
+        supervisor.shutdown()
+    assert supervisor.memory_usage() == {}
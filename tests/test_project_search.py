@@ -0,0 +1,51 @@
+import os
+import re
+import pytest
+from lazyedit.path_index import PathIndex
+from lazyedit.project_search import ProjectSearch, SearchPool, compile_query, search_file
+
+
+def test_search_file_reports_line_and_column(tmp_path):
+    (tmp_path / "a.txt").write_text("first\n  needle here\nno\nNEEDLE again needle\n")
+    matches = search_file(str(tmp_path), "a.txt", compile_query("needle"))
+
+    assert [(m.line, m.column, m.text) for m in matches] == [
+        (1, 2, "  needle here"),
+        (3, 0, "NEEDLE again needle"),
+    ]
+    assert search_file(str(tmp_path), "a.txt", compile_query("Needle")) == []
+
+
+def test_search_file_skips_binary_and_supports_regex(tmp_path):
+    (tmp_path / "blob.bin").write_bytes(b"needle\0\1\2")
+    (tmp_path / "code.py").write_text("def foo():\n    return bar_42\n")
+
+    assert search_file(str(tmp_path), "blob.bin", compile_query("needle")) == []
+    matches = search_file(str(tmp_path), "code.py", compile_query(r"bar_\d+", regex=True))
+    assert [(m.line, m.column) for m in matches] == [(1, 11)]
+    assert search_file(str(tmp_path), "code.py", compile_query("bar_\\d+")) == []
+    with pytest.raises(re.error):
+        compile_query("(", regex=True)
+
+
+def test_project_search_streams_matches_and_honours_gitignore(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "build").mkdir()
+    (root / ".gitignore").write_text("build/\n")
+    for i in range(100):
+        (root / "src" / f"m{i}.py").write_text("x = 1\n" + ("TODO fix\n" if i % 10 == 0 else ""))
+    (root / "build" / "out.py").write_text("TODO fix\n")
+
+    index = PathIndex(str(root), cache_dir=str(tmp_path / "cache"))
+    pool = SearchPool(workers=2)
+    batches = []
+    try:
+        search = ProjectSearch(index, "TODO")
+        assert search.run(pool, batches.append)
+    finally:
+        pool.shutdown()
+
+    paths = sorted(m.path for batch in batches for m in batch)
+    assert paths == sorted(os.path.join("src", f"m{i}.py") for i in range(0, 100, 10))
+    assert search.files_searched == search.total_files == 101
@@ -0,0 +1,63 @@
+from lazyedit.refresh_scheduler import RefreshScheduler
+
+
+class FakeWidget:
+    def __init__(self):
+        self.is_attached = True
+        self.refreshes = []
+
+    def refresh(self, *regions):
+        self.refreshes.append(set(regions) or None)
+
+
+class FakeLoop:
+    def __init__(self):
+        self.now = 0.0
+        self.pending = []
+
+    def set_timer(self, delay, callback):
+        self.pending.append((self.now + delay, callback))
+
+    def call_later(self, callback):
+        self.pending.append((self.now, callback))
+
+    def run(self):
+        while self.pending:
+            when, callback = self.pending.pop(0)
+            self.now = max(self.now, when)
+            callback()
+
+
+def test_requests_coalesce_into_one_paint_per_frame():
+    loop = FakeLoop()
+    scheduler = RefreshScheduler(loop.set_timer, loop.call_later, clock=lambda: loop.now)
+    editor, tree = FakeWidget(), FakeWidget()
+    renders = []
+
+    def render():
+        renders.append(loop.now)
+        scheduler.mark_dirty(tree, "row 3")
+
+    for _ in range(5):
+        scheduler.schedule(render)
+        scheduler.mark_dirty(editor, "row 1")
+    scheduler.mark_dirty(editor, "row 2")
+    assert len(loop.pending) == 1
+    loop.run()
+
+    assert renders == [0.0]
+    assert editor.refreshes == [{"row 1", "row 2"}]
+    assert tree.refreshes == [{"row 3"}]
+    assert scheduler.counters["frames"] == 1
+    assert scheduler.counters["repaints"] == 2
+    assert scheduler.counters["coalesced"] == 9
+
+    scheduler.mark_dirty(editor, "row 1")
+    scheduler.mark_dirty(editor)
+    tree.is_attached = False
+    scheduler.mark_dirty(tree)
+    loop.run()
+    assert loop.now == scheduler.frame_interval
+    assert editor.refreshes[-1] is None
+    assert len(tree.refreshes) == 1
+    assert scheduler.summary(keys=2)[1] == "1.50 repaints per key"
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+from textual.document._document import Document
+
+from lazyedit import rope_document
+from lazyedit.rope_document import RopeDocument, SyntaxAwareRopeDocument, TREE_SITTER, highlight_map
+
+
+def random_location(document, rng):
+    row = rng.randrange(document.line_count)
+    return row, rng.randrange(len(document[row]) + 1)
+
+
+def test_edits_match_textual_document(monkeypatch):
+    monkeypatch.setattr(rope_document, "BLOCK_LINES", 4)
+    monkeypatch.setattr(rope_document, "MAX_BLOCK_LINES", 8)
+    monkeypatch.setattr(rope_document, "MIN_BLOCK_LINES", 2)
+    rng = random.Random(7)
+    text = "\n".join(f"line {i} é\tx" for i in range(40)) + "\n"
+    rope, reference = RopeDocument(text), Document(text)
+    snapshot = rope.snapshot()
+    pieces = ["", "a", "ü\n", "\n\n", "x\ny\nz", "\n".join("q" * 20 for _ in range(12))]
+
+    for _ in range(400):
+        start, end = random_location(reference, rng), random_location(reference, rng)
+        insert = rng.choice(pieces)
+        assert rope.replace_range(start, end, insert) == reference.replace_range(start, end, insert)
+        assert rope.line_count == reference.line_count
+        assert rope.get_size(4) == reference.get_size(4)
+        start, end = random_location(reference, rng), random_location(reference, rng)
+        assert rope.get_text_range(start, end) == reference.get_text_range(start, end)
+
+    assert rope.text == reference.text
+    assert rope[-1] == reference[-1]
+    assert rope[3:9] == reference.lines[3:9]
+    with pytest.raises(IndexError):
+        rope.get_line(rope.line_count)
+    assert snapshot.text == text
+    assert len(snapshot) == 41
+
+
+def test_newline_style_and_empty_document():
+    document = RopeDocument("a\r\nb")
+    assert document.newline == "\r\n"
+    document.replace_range((1, 1), (1, 1), "\n")
+    assert document.text == "a\r\nb\r\n"
+    assert RopeDocument("").lines == [""]
+
+
+@pytest.mark.skipif(not TREE_SITTER, reason="tree-sitter not installed")
+def test_background_parse_tracks_edits_made_while_parsing():
+    from textual.document._syntax_aware_document import SyntaxAwareDocument
+
+    text = "def f():\n    return 'é'\n" * 600
+    rope, reference = SyntaxAwareRopeDocument(text, "python"), SyntaxAwareDocument(text, "python")
+    for location in [(0, 0), (1, 12), (599 * 2 + 1, 13), (1200, 0)]:
+        assert rope._location_to_byte_offset(location) == reference._location_to_byte_offset(location)
+
+    assert rope.query_syntax_tree(rope.prepare_query("(identifier) @name")) == []
+    rope.finish_parse(rope.parse(*rope.begin_parse()))
+    snapshot, tree = rope.begin_parse()
+    assert rope.parsing
+    for document in (rope, reference):
+        document.replace_range((700, 0), (700, 3), "async def")
+    rope.finish_parse(rope.parse(snapshot, tree))
+    rope.finish_parse(rope.parse(*rope.begin_parse()))
+    assert not rope.parsing
+    assert rope.syntax_tree.root_node.sexp() == reference._syntax_tree.root_node.sexp()
+
+    query = rope.prepare_query("(string) @string (function_definition) @function")
+    highlights = highlight_map(rope.query_syntax_tree(query, (10, 0), (20, 0)), 10, 20)
+    assert highlights[11] == [(0, 15, "function"), (11, 15, "string")]
+    assert highlights[10] == [(0, None, "function")]
+    assert min(highlights) >= 9 and max(highlights) <= 20
+
+
+def test_matches_saved_snapshot_after_edits_are_undone():
+    text = "".join(f"row {i}\n" for i in range(2000))
+    document = RopeDocument(text)
+    saved = document.snapshot()
+    assert document.matches(saved)
+
+    document.replace_range((10, 0), (10, 0), "x")
+    assert not document.matches(saved)
+    document.replace_range((10, 0), (10, 1), "")
+    assert document.matches(saved)
+
+    inserted = "\n".join("y" * 5 for _ in range(700)) + "\n"
+    end = document.replace_range((300, 0), (300, 0), inserted).end_location
+    assert not document.matches(saved)
+    document.replace_range((300, 0), end, "")
+    assert document.matches(saved)
+
+    document.replace_range((5, 0), (5, 5), "row 9")
+    assert not document.matches(saved)
+    assert RopeDocument(text).matches(saved)
+    assert not RopeDocument(text.replace("\n", "\r\n")).matches(saved)
+
+
+def test_documents_restore_from_snapshots():
+    text = "#!/bin/sh\r\n" + "".join(f"row {i}\r\n" for i in range(1000)) + "# vim: ft=sh"
+    original = RopeDocument(text)
+    snapshot = original.snapshot()
+    restored = RopeDocument(snapshot)
+    assert restored.text == text and restored.newline == "\r\n"
+    assert restored.byte_count == original.byte_count and restored.matches(snapshot)
+
+    restored.replace_range((1, 0), (1, 0), "x")
+    edited = restored.snapshot()
+    assert not snapshot.matches(edited) and not edited.matches(snapshot)
+    assert RopeDocument(text).snapshot().matches(snapshot)
+    assert snapshot.text == text
+
+    sample = snapshot.sample(2).split("\r\n")
+    assert sample == ["#!/bin/sh", "row 0", "row 999", "# vim: ft=sh"]
+    assert RopeDocument("a\nb").snapshot().sample(5) == "a\nb"
+
+
+@pytest.mark.skipif(not TREE_SITTER, reason="tree-sitter not installed")
+def test_query_rows_matches_full_query_under_wide_nodes():
+    text = "[\n" + "".join(f' {{"id": {i}, "name": "n{i}"}},\n' for i in range(2000)) + ' "last"\n]\n'
+    document = SyntaxAwareRopeDocument(text, "json")
+    document.finish_parse(document.parse(*document.begin_parse()))
+    query = document.prepare_query("(string) @string (number) @number (pair) @pair")
+    for start, end in [(0, 30), (1000, 1066), (1990, document.line_count)]:
+        rows = highlight_map(document.query_rows(query, start, end), start, end)
+        full = highlight_map(document.query_syntax_tree(query, (start, 0), (end, 0)), start, end)
+        assert rows and {row: sorted(spans) for row, spans in rows.items()} == {row: sorted(spans) for row, spans in full.items()}
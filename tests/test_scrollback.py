@@ -0,0 +1,39 @@
+from lazyedit.scrollback import ScrollbackBuffer, line_cost
+from lazyedit.terminal_screen import FrozenLine, Screen, DEFAULT_ATTRS
+
+
+def frozen(text):
+    return FrozenLine(text, ((text, DEFAULT_ATTRS),))
+
+
+def test_ring_buffer_evicts_by_line_count_and_slices_across_wrap():
+    buffer = ScrollbackBuffer(max_lines=4, max_bytes=1 << 20)
+    for i in range(10):
+        buffer.append(frozen(f"line {i}"))
+
+    assert len(buffer) == 4
+    assert buffer.first_index == 6
+    assert [line.text for line in buffer] == ["line 6", "line 7", "line 8", "line 9"]
+    assert [line.text for line in buffer.slice(1, 3)] == ["line 7", "line 8"]
+    assert buffer[-1].text == "line 9"
+
+
+def test_ring_buffer_evicts_by_bytes():
+    line = frozen("x" * 100)
+    buffer = ScrollbackBuffer(max_lines=1000, max_bytes=line_cost(line) * 3)
+    for _ in range(10):
+        buffer.append(line)
+
+    assert len(buffer) == 3
+    assert buffer.total_bytes == line_cost(line) * 3
+
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.total_bytes == 0 and buffer.first_index == 10
+
+
+def test_screen_scrollback_is_capped():
+    screen = Screen(rows=2, columns=10, scrollback_lines=5)
+    screen.feed("\r\n".join(str(i) for i in range(20)))
+
+    assert [line.text for line in screen.scrollback] == ["13", "14", "15", "16", "17"]
+    assert screen.display_lines() == ["18", "19"]
@@ -0,0 +1,40 @@
+from lazyedit.scrollback_search import ScrollbackMatch, ScrollbackSearch, export_lines
+from lazyedit.terminal_screen import Screen
+
+
+def test_search_reports_absolute_lines_and_columns():
+    screen = Screen(rows=2, columns=20, scrollback_lines=2)
+    screen.feed("\r\n".join(["error one", "ok", "Error two", "ok", "an error"]))
+    lines = list(screen.scrollback) + [line.freeze() for line in screen.lines]
+    search = ScrollbackSearch(lines, screen.scrollback.first_index, "error")
+
+    found = []
+    search.run(found.extend)
+
+    assert search.complete
+    assert found == [ScrollbackMatch(2, 0, 5), ScrollbackMatch(4, 3, 8)]
+
+
+def test_search_stops_at_match_limit_and_skips_cross_line_matches():
+    screen = Screen(rows=1, columns=10, scrollback_lines=100)
+    screen.feed("\r\n".join(["aa"] * 10))
+    lines = list(screen.scrollback)
+    search = ScrollbackSearch(lines, 0, r"a\sa", regex=True)
+    search.run(lambda matches: None)
+    assert search.match_count == 0
+
+    found = []
+    search = ScrollbackSearch(lines, 0, "a", max_matches=5)
+    search.run(found.extend)
+    assert len(found) == 5
+    assert search.truncated and not search.complete
+
+
+def test_export_joins_wrapped_lines(tmp_path):
+    screen = Screen(rows=2, columns=5)
+    screen.feed("helloworld\r\nnext\r\nlast")
+    lines = list(screen.scrollback) + [line.freeze() for line in screen.lines]
+    path = tmp_path / "out.log"
+
+    assert export_lines(lines, path) == 4
+    assert path.read_text() == "helloworld\nnext\nlast\n"
@@ -0,0 +1,42 @@
+import pytest
+from lazyedit.rope_document import RopeDocument
+from lazyedit.session_store import SessionStore
+from lazyedit.undo_history import UndoHistory
+
+
+def make_state(text):
+    return {'history': UndoHistory(), 'last_saved_state': text, 'snapshot': None}
+
+
+def test_clean_files_are_evicted_least_recently_used_first():
+    store = SessionStore(max_bytes=25)
+    for name in ("a", "b", "c"):
+        store[name] = make_state("x" * 10)
+        store.touch(name)
+
+    assert "a" not in store
+    assert "b" in store
+    assert "c" in store
+
+
+def test_dirty_files_are_spilled_and_reloaded():
+    dirty = {"a"}
+    store = SessionStore(max_bytes=15, is_dirty=lambda path: path in dirty)
+    store["a"] = make_state("saved")
+    store["a"]["snapshot"] = RopeDocument("unsaved text").snapshot()
+    store.touch("a")
+    store["b"] = make_state("y" * 10)
+    store.touch("b")
+
+    assert store.is_spilled("a")
+    assert store["a"]["snapshot"].text == "unsaved text"
+    assert not store.is_spilled("a")
+    store.close()
+
+
+def test_current_file_is_never_evicted():
+    store = SessionStore(max_bytes=1)
+    store["a"] = make_state("x" * 100)
+    store.touch("a")
+
+    assert "a" in store
@@ -0,0 +1,40 @@
+import json
+
+from lazyedit.rope_document import DEFAULT_HIGHLIGHT_BYTES
+from lazyedit.scrollback import DEFAULT_SCROLLBACK_BYTES, DEFAULT_SCROLLBACK_LINES
+from lazyedit.settings import Settings
+
+
+def test_defaults_and_overrides():
+    settings = Settings()
+    assert settings["scrollback_lines"] == DEFAULT_SCROLLBACK_LINES
+    assert settings["scrollback_bytes"] == DEFAULT_SCROLLBACK_BYTES
+    assert settings.errors == []
+
+    settings = Settings({"scrollback_lines": 1000, "scrollback_bytes": 4096, "highlight_max_line_length": 80})
+    assert settings["scrollback_lines"] == 1000
+    assert settings["scrollback_bytes"] == 4096
+    assert settings["highlight_max_line_length"] == 80
+    assert settings["highlight_max_bytes"] == DEFAULT_HIGHLIGHT_BYTES
+
+
+def test_invalid_values_keep_defaults_and_are_reported(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({
+        "scrollback_lines": 0,
+        "scrollback_bytes": "16MB",
+        "scrollback_colour": 1,
+        "highlight_max_bytes": -1,
+    }))
+    settings = Settings.load(str(path))
+    assert settings["scrollback_lines"] == DEFAULT_SCROLLBACK_LINES
+    assert settings["scrollback_bytes"] == DEFAULT_SCROLLBACK_BYTES
+    assert settings["highlight_max_bytes"] == DEFAULT_HIGHLIGHT_BYTES
+    assert len(settings.errors) == 4
+    assert Settings({"scrollback_lines": True}).errors
+
+    path.write_text("[1]")
+    assert Settings.load(str(path)).errors
+    path.write_text("{")
+    assert Settings.load(str(path)).errors
+    assert Settings.load(str(tmp_path / "missing.json")).errors == []
@@ -0,0 +1,46 @@
+import asyncio
+import os
+import pytest
+from lazyedit import terminal_backend
+from lazyedit.terminal_backend import PtyProcess, encode_key, shell_command, spawn_shell
+
+
+def test_shell_command_per_platform_and_override():
+    assert shell_command("win32", {}) == ["powershell.exe", "-NoLogo"]
+    assert shell_command("linux", {"SHELL": "/bin/zsh"}) == ["/bin/zsh"]
+    assert shell_command("linux", {}) == ["/bin/sh"]
+    assert shell_command("linux", {"SHELL": "/bin/zsh", "LAZYEDIT_SHELL": "fish -l"}) == ["fish", "-l"]
+
+
+def test_encode_key():
+    assert encode_key("enter") == "\r"
+    assert encode_key("up") == "\x1b[A"
+    assert encode_key("ctrl+c") == "\x03"
+    assert encode_key("a", "a") == "a"
+    assert encode_key("ctrl+shift+home") is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="pseudo-terminals are POSIX only")
+def test_pty_process_streams_output_and_reports_size():
+    async def run():
+        loop = asyncio.get_running_loop()
+        output = bytearray()
+        exited = loop.create_future()
+        process = PtyProcess(["/bin/sh", "-c", "stty size; exit 3"], rows=12, cols=34)
+        process.start(loop, output.extend, exited.set_result)
+        try:
+            returncode = await asyncio.wait_for(exited, timeout=5)
+        finally:
+            process.close()
+        return bytes(output), returncode
+
+    output, returncode = asyncio.run(run())
+    assert b"12 34" in output
+    assert returncode == 3
+
+
+def test_console_tools_refuse_pipes_without_conpty(monkeypatch):
+    monkeypatch.setattr(terminal_backend, "WinPty", None)
+    monkeypatch.setattr(terminal_backend.os, "name", "nt")
+    with pytest.raises(OSError, match="pywinpty"):
+        spawn_shell(["lazygit"], console=True)
@@ -0,0 +1,62 @@
+from lazyedit.terminal_screen import Screen, DEFAULT_ATTRS
+
+
+def test_text_wraps_and_scrolls_into_scrollback():
+    screen = Screen(rows=3, columns=5)
+    screen.feed("helloworld\r\nline2\r\nline3")
+
+    assert screen.display_lines() == ["world", "line2", "line3"]
+    assert [line.text for line in screen.scrollback] == ["hello"]
+    assert screen.scrollback[0].wrapped
+
+
+def test_cursor_movement_and_erase():
+    screen = Screen(rows=3, columns=10)
+    screen.feed("abcdefghij\r\n0123456789")
+    screen.feed("\x1b[1;3H\x1b[K")
+    screen.feed("\x1b[2;5H\x1b[1K")
+    screen.take_dirty()
+    screen.feed("\x1b[3;1HX\x1b[2P")
+
+    assert screen.display_lines() == ["ab", "     56789", "X"]
+    assert screen.take_dirty() == {2}
+
+
+def test_parser_handles_sequences_split_across_chunks():
+    screen = Screen(rows=2, columns=20)
+    for chunk in ["\x1b", "[3", "1;1", "mred", "\x1b[0m ok", "\x1b]0;ti", "tle\x07"]:
+        screen.feed(chunk)
+
+    runs = screen.lines[0].runs()
+    assert runs[0] == ("red", DEFAULT_ATTRS._replace(fg="color(1)", bold=True))
+    assert screen.display_lines()[0] == "red ok"
+    assert screen.title == "title"
+
+
+def test_device_control_strings_are_swallowed():
+    screen = Screen(rows=2, columns=30)
+    for chunk in ["a\x1bP+q544e\x1b", "\\b\x1bP$qm", "\x1b\\c", "\x1b_Gi=1;AAAA\x07d\x1bPtmux;x\x18e"]:
+        screen.feed(chunk)
+    assert screen.display_lines()[0] == "abcde"
+
+
+def test_alternate_screen_restores_main_buffer():
+    screen = Screen(rows=2, columns=10)
+    screen.feed("prompt$ ")
+    screen.feed("\x1b[?1049h\x1b[2J\x1b[Hfullscreen")
+    assert screen.display_lines()[0] == "fullscreen"
+
+    screen.feed("\x1b[?1049l")
+    assert screen.display_lines()[0] == "prompt$"
+    assert (screen.x, screen.y) == (8, 0)
+
+
+def test_scroll_region_and_cursor_report():
+    screen = Screen(rows=4, columns=5)
+    screen.feed("top\r\na\r\nb\r\nbot")
+    screen.feed("\x1b[2;3r\x1b[3;1H\n")
+    assert screen.display_lines() == ["top", "b", "", "bot"]
+    assert len(screen.scrollback) == 0
+
+    screen.feed("\x1b[6n")
+    assert screen.responses == ["\x1b[3;1R"]
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from lazyedit import terminal_backend, tool_pool
+from lazyedit.process_supervisor import ProcessSupervisor
+from lazyedit.tool_pool import ToolPool
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="pseudo-terminals are POSIX only")
+
+SLEEPER = [sys.executable, "-c", "import time; print('ready', flush=True); time.sleep(30)"]
+QUICK = [sys.executable, "-c", "print('done')"]
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=10))
+
+
+async def wait_until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+def test_acquire_reattaches_to_the_warm_session():
+    async def scenario():
+        supervisor = ProcessSupervisor()
+        pool = ToolPool(supervisor, rows=10, columns=40)
+        try:
+            warmed = await pool.warm("tool", SLEEPER)
+            assert await pool.acquire("tool", SLEEPER) is warmed
+            assert len(supervisor.live()) == 1
+            await wait_until(lambda: "ready" in warmed.screen.lines[0].text)
+            assert warmed.screen.rows == 10 and warmed.screen.columns == 40
+        finally:
+            supervisor.shutdown()
+
+    run(scenario())
+
+
+def test_session_restarts_after_it_exits():
+    async def scenario():
+        supervisor = ProcessSupervisor()
+        pool = ToolPool(supervisor)
+        try:
+            first = await pool.acquire("tool", QUICK)
+            await wait_until(lambda: first.exited)
+            assert "tool" not in pool.sessions
+            second = await pool.acquire("tool", QUICK)
+            assert second is not first and second.process.pid != first.process.pid
+        finally:
+            supervisor.shutdown()
+
+    run(scenario())
+
+
+def test_docker_context_runs_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tool_pool, "use_default_docker_context", lambda: calls.append(1) or "no docker")
+
+    async def scenario():
+        pool = ToolPool(ProcessSupervisor())
+        results = await asyncio.gather(pool.docker_context(), pool.docker_context())
+        return results + [await pool.docker_context()]
+
+    assert run(scenario()) == ["no docker"] * 3
+    assert calls == [1]
+
+
+def test_failing_prepare_or_spawn_is_reported(monkeypatch):
+    notices = []
+
+    async def prepare():
+        raise OSError("context switch failed")
+
+    async def scenario():
+        pool = ToolPool(ProcessSupervisor(), notify=lambda message, **kwargs: notices.append((message, kwargs)))
+        with pytest.raises(OSError):
+            await pool.warm("docker", QUICK, prepare)
+        await asyncio.sleep(0)
+
+        monkeypatch.setattr(terminal_backend, "WinPty", None)
+        monkeypatch.setattr(terminal_backend.os, "name", "nt")
+        task = pool.warm("git", ["lazygit"])
+        await asyncio.wait([task])
+        await asyncio.sleep(0)
+        assert pool._starting == {}
+
+    run(scenario())
+    assert notices[0] == ("Error launching docker: context switch failed", {"severity": "error"})
+    assert notices[1][0].startswith("Error launching git:") and "pywinpty" in notices[1][0]
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from textual.app import App
+
+from lazyedit import tool_pool
+from lazyedit.lazydocker_screen import LazyDockerScreen
+from lazyedit.process_supervisor import ProcessSupervisor
+from lazyedit.tool_pool import ToolPool
+from lazyedit.tool_screen import ToolScreen
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="pseudo-terminals are POSIX only")
+
+
+class SleeperScreen(ToolScreen):
+    NAME = "sleeper"
+    TOOL_NAME = "Sleeper"
+    COMMAND = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+class ToolApp(App):
+    def __init__(self, screen_class):
+        super().__init__()
+        self.notices = []
+        self.process_supervisor = ProcessSupervisor()
+        self.tool_pool = ToolPool(self.process_supervisor, notify=self.notify)
+        self.screen_class = screen_class
+
+    def notify(self, message, **kwargs):
+        self.notices.append((message, kwargs.get("severity")))
+
+    def on_mount(self):
+        self.install_screen(self.screen_class(self.tool_pool), name="tool")
+
+    def on_unmount(self):
+        self.process_supervisor.shutdown()
+
+
+async def wait_until(pilot, condition):
+    for _ in range(500):
+        if condition():
+            return
+        await pilot.pause(0.01)
+    raise AssertionError("timed out")
+
+
+def test_reopening_the_screen_reattaches_to_the_running_tool():
+    async def scenario():
+        app = ToolApp(SleeperScreen)
+        async with app.run_test() as pilot:
+            screen = app.get_screen("tool")
+            screen.warm()
+            warmed = await app.tool_pool.warm(screen.NAME, screen.COMMAND)
+            app.push_screen("tool")
+            await wait_until(pilot, lambda: screen.terminal is not None and screen.terminal.session is not None)
+            assert screen.terminal.session is warmed and warmed.owner is screen.terminal
+            app.pop_screen()
+            app.push_screen("tool")
+            await pilot.pause(0.05)
+            assert screen.terminal.session is warmed
+            assert len(app.process_supervisor.live()) == 1
+
+    asyncio.run(scenario())
+
+
+def test_docker_context_warning_is_reported_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tool_pool, "use_default_docker_context", lambda: calls.append(1) or "Docker not found!")
+
+    async def scenario():
+        app = ToolApp(LazyDockerScreen)
+        async with app.run_test() as pilot:
+            screen = app.get_screen("tool")
+            await screen.prepare()
+            await screen.prepare()
+            await pilot.pause(0)
+            return app.notices
+
+    assert asyncio.run(scenario()) == [("Docker not found!", "warning")]
+    assert calls == [1]
@@ -0,0 +1,76 @@
+import pytest
+from lazyedit.undo_history import UndoHistory, EditDelta, end_location
+
+
+def insert(location, text):
+    end = end_location(location, text)
+    return EditDelta(location, location, end, "", text, location, end)
+
+
+def delete(start, end, text):
+    return EditDelta(start, end, start, text, "", end, start)
+
+
+def test_end_location():
+    assert end_location((2, 3), "abc") == (2, 6)
+    assert end_location((2, 3), "ab\ncde") == (3, 3)
+    assert end_location((0, 0), "ab\n") == (1, 0)
+
+
+def test_typing_run_is_coalesced():
+    history = UndoHistory()
+    for column, char in enumerate("hello"):
+        history.record(insert((0, column), char))
+
+    assert len(history.undo_stack) == 1
+    group = history.undo_stack[0]
+    assert len(group.deltas) == 1
+    assert group.deltas[0].new_text == "hello"
+    assert group.deltas[0].new_end == (0, 5)
+
+
+def test_backspace_run_is_coalesced():
+    history = UndoHistory()
+    history.record(delete((0, 4), (0, 5), "o"))
+    history.record(delete((0, 3), (0, 4), "l"))
+
+    delta = history.undo_stack[0].deltas[0]
+    assert delta.old_text == "lo"
+    assert delta.start == (0, 3)
+    assert delta.old_end == (0, 5)
+
+
+def test_close_group_and_kind_change_start_new_group():
+    history = UndoHistory()
+    history.record(insert((0, 0), "a"))
+    history.close_group()
+    history.record(insert((0, 1), "b"))
+    history.record(delete((0, 1), (0, 2), "b"))
+
+    assert len(history.undo_stack) == 3
+
+
+def test_undo_redo_moves_groups():
+    history = UndoHistory()
+    history.record(insert((0, 0), "a"))
+
+    group = history.pop_undo()
+    assert group is not None
+    assert history.can_redo()
+    assert history.pop_redo() is group
+    assert history.pop_redo() is None
+
+    history.pop_undo()
+    history.record(insert((0, 0), "b"))
+    assert not history.can_redo()
+
+
+def test_memory_budget_drops_oldest_groups():
+    history = UndoHistory(max_bytes=10)
+    for row in range(5):
+        history.record(insert((row, 0), "abcd"))
+        history.close_group()
+
+    assert history.total_bytes <= 10
+    assert len(history.undo_stack) == 2
+    assert history.undo_stack[-1].deltas[0].start == (4, 0)